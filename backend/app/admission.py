@@ -0,0 +1,109 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Iterable
+from fastapi.responses import JSONResponse
+from .metrics import ADMISSION, ADMISSION_QUEUE_WAIT
+from .rate_limit import retry_after_header
+
+
+class AdmissionMiddleware:
+    def __init__(
+        self,
+        app,
+        max_in_flight: int = 64,
+        max_queue: int = 128,
+        queue_timeout: float = 0.5,
+        retry_after: float = 1,
+        exempt_paths: Iterable[str] = ("/", "/metrics")
+    ):
+        """
+        Pure ASGI middleware capping how many requests a worker serves at once.
+
+        Up to `max_in_flight` requests run concurrently; the next `max_queue` wait
+        in arrival order for a slot, each for at most `queue_timeout` seconds.
+        Anything beyond that, or still waiting at its deadline, is answered 503
+        with Retry-After straight away, so an overloaded worker sheds load in
+        milliseconds instead of letting every request's latency grow without
+        bound. Health checks, metrics and CORS preflights are never queued.
+
+        Args:
+            app: The ASGI app to protect
+            max_in_flight: Requests served concurrently
+            max_queue: Requests allowed to wait for a slot
+            queue_timeout: Seconds a request may wait before it is shed
+            retry_after: Seconds clients are told to wait after a 503
+            exempt_paths: Paths admitted without counting against the cap
+        """
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.exempt_paths = frozenset(exempt_paths)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self._acquire():
+            response = JSONResponse(
+                {"detail": "Server is busy, retry later"},
+                status_code=503,
+                headers={"Retry-After": retry_after_header(self.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._release()
+
+    async def _acquire(self) -> bool:
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            ADMISSION.inc("admitted")
+            return True
+        if len(self._waiters) >= self.max_queue:
+            ADMISSION.inc("shed_queue_full")
+            return False
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+
+        def expire():
+            if not waiter.done():
+                waiter.set_result(False)
+                self._waiters.remove(waiter)
+
+        timer = loop.call_later(self.queue_timeout, expire)
+        start = time.perf_counter()
+        try:
+            admitted = await waiter
+        except asyncio.CancelledError:
+            # Client went away while queued; pass on a slot it was handed meanwhile.
+            if not waiter.cancelled() and waiter.result():
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+        finally:
+            timer.cancel()
+
+        ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - start, "admitted" if admitted else "shed")
+        ADMISSION.inc("queued" if admitted else "shed_timeout")
+        return admitted
+
+    def _release(self) -> None:
+        # Hand the slot straight to the oldest waiter, so in_flight never dips and lets a newcomer jump the queue.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.in_flight -= 1
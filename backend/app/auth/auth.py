@@ -2,7 +2,9 @@ from fastapi import HTTPException, status, Header, Depends
 from typing import Optional, Callable, Dict, Any
 from loguru import logger
 import os
-from .validate_token import validate_jwt, CognitoTokenValidationError
+from .validate_token import validate_jwt, validate_jwt_async, CognitoTokenValidationError
+from .token_cache import VerifiedTokenCache
+from ..metrics import AUTH_STAGE_DURATION, AUTH_TOKEN_CACHE
 
 def extract_token(authorization: str = Header()) -> str:
     if not authorization or not authorization.startswith("Bearer "):
@@ -19,7 +21,8 @@ def create_cognito_auth_dependency(
     jwks_fetcher,
     audience: str,
     region: str,
-    user_pool_id: str
+    user_pool_id: str,
+    token_cache: Optional[VerifiedTokenCache] = None
 ) -> Callable:
     """
     Function to create a configured Cognito authentication dependency.
@@ -29,6 +32,7 @@ def create_cognito_auth_dependency(
         audience: Cognito App Client ID
         region: AWS region
         user_pool_id: Cognito User Pool ID
+        token_cache: Optional cache of verified tokens; hits skip signature and claim checks
         
     Returns:
         FastAPI dependency function that validates tokens and returns user info
@@ -47,31 +51,99 @@ def create_cognito_auth_dependency(
         Raises:
             HTTPException: If token validation fails
         """
+        if token_cache is not None:
+            cached_token = token_cache.get(token)
+            AUTH_TOKEN_CACHE.inc("miss" if cached_token is None else "hit")
+            if cached_token is not None:
+                return cached_token
+
+        try:
+            with AUTH_STAGE_DURATION.time("total"):
+                decoded_token = validate_jwt(
+                    token=token,
+                    jwks_fetcher=jwks_fetcher,
+                    audience=audience,
+                    region=region,
+                    user_pool_id=user_pool_id
+                )
+
+            if token_cache is not None:
+                token_cache.put(token, decoded_token)
+            
+            logger.info(f"Authentication successful for user: {decoded_token.get('sub')}")
+            return decoded_token
+            
+        except Exception as e:
+            raise _authentication_error(e)
+    
+    return cognito_auth_dependency
+
+
+def create_async_cognito_auth_dependency(
+    jwks_fetcher,
+    audience: str,
+    region: str,
+    user_pool_id: str,
+    token_cache: Optional[VerifiedTokenCache] = None,
+    offload_verification: bool = True
+) -> Callable:
+    """
+    Async variant of create_cognito_auth_dependency that never blocks the event loop.
+    
+    Args:
+        jwks_fetcher: Instance of AsyncCognitoJWKSFetcher
+        audience: Cognito App Client ID
+        region: AWS region
+        user_pool_id: Cognito User Pool ID
+        token_cache: Optional cache of verified tokens; hits skip signature and claim checks
+        offload_verification: Run RS256 verification in the threadpool instead of on the loop
+        
+    Returns:
+        Async FastAPI dependency function that validates tokens and returns user info
+    """
+    
+    async def cognito_auth_dependency(token: str = Depends(extract_token)) -> Dict[str, Any]:
+        if token_cache is not None:
+            cached_token = token_cache.get(token)
+            AUTH_TOKEN_CACHE.inc("miss" if cached_token is None else "hit")
+            if cached_token is not None:
+                return cached_token
+
         try:
-            decoded_token = validate_jwt(
-                token=token,
-                jwks_fetcher=jwks_fetcher,
-                audience=audience,
-                region=region,
-                user_pool_id=user_pool_id
-            )
+            with AUTH_STAGE_DURATION.time("total"):
+                decoded_token = await validate_jwt_async(
+                    token=token,
+                    jwks_fetcher=jwks_fetcher,
+                    audience=audience,
+                    region=region,
+                    user_pool_id=user_pool_id,
+                    offload_verification=offload_verification
+                )
+
+            if token_cache is not None:
+                token_cache.put(token, decoded_token)
             
             logger.info(f"Authentication successful for user: {decoded_token.get('sub')}")
             return decoded_token
             
-        except CognitoTokenValidationError as e:
-            logger.warning(f"Token validation failed: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=f"Authentication failed: {str(e)}",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
         except Exception as e:
-            logger.error(f"Unexpected authentication error: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authentication failed",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+            raise _authentication_error(e)
     
     return cognito_auth_dependency
+
+
+def _authentication_error(e: Exception) -> HTTPException:
+    if isinstance(e, CognitoTokenValidationError):
+        logger.warning(f"Token validation failed: {e}")
+        return HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Authentication failed: {str(e)}",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    logger.error(f"Unexpected authentication error: {e}")
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Authentication failed",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
@@ -1,28 +1,110 @@
+import asyncio
+import httpx
 import requests
 import json
 import os
+import threading
+import time
 from typing import Dict, Any, Optional
 from loguru import logger
+from .validate_token import _jwk_to_public_key
+from ..metrics import JWKS_CACHE, JWKS_FETCH_DURATION
 
-class CognitoJWKSFetcher:
-    def __init__(self, region: str, pool_id: str):
+class _JWKSCache:
+    def __init__(
+        self,
+        region: str,
+        pool_id: str,
+        cache_ttl: float = 3600,
+        min_refresh_interval: float = 30,
+        jwks_url: Optional[str] = None
+    ):
+        """
+        Kid-indexed cache of a Cognito user pool's JSON Web Key Set.
+
+        Args:
+            region: AWS region
+            pool_id: Cognito User Pool ID
+            cache_ttl: Seconds a fetched key set is considered fresh
+            min_refresh_interval: Minimum seconds between refreshes triggered by an unknown kid
+            jwks_url: Override for the JWKS endpoint (defaults to the Cognito well-known URL)
+        """
         self.region = region
         self.pool_id = pool_id
-        self.jwks_url = f"https://cognito-idp.{region}.amazonaws.com/{pool_id}/.well-known/jwks.json"
-    
+        self.jwks_url = jwks_url or f"https://cognito-idp.{region}.amazonaws.com/{pool_id}/.well-known/jwks.json"
+        self.cache_ttl = cache_ttl
+        self.min_refresh_interval = min_refresh_interval
+
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._public_keys: Dict[str, Any] = {}
+        self._fetched_at: Optional[float] = None
+        self._last_attempt: Optional[float] = None
+        self._generation = 0
+
+    def _cached(self, kid: str, table: str) -> Optional[Any]:
+        key = getattr(self, table).get(kid) if self._is_fresh() else None
+        JWKS_CACHE.inc("miss" if key is None else "hit")
+        return key
+
+    def _found(self, kid: str, table: str) -> Optional[Any]:
+        key = getattr(self, table).get(kid)
+        if key is None:
+            logger.warning(f"Key with kid '{kid}' not found in JWKS")
+            return None
+
+        logger.debug("Found key with kid: {}", kid)
+        return key
+
+    def _is_fresh(self) -> bool:
+        return self._fetched_at is not None and time.monotonic() - self._fetched_at < self.cache_ttl
+
+    def _should_refresh(self, kid: str) -> bool:
+        if self._is_fresh() and kid in self._keys:
+            return False
+
+        # Unknown kids and failed refreshes are retried at most once per interval so
+        # garbage tokens or a Cognito outage can't turn into a request per call.
+        interval = min(self.min_refresh_interval, self.cache_ttl)
+        return self._last_attempt is None or time.monotonic() - self._last_attempt >= interval
+
+    def _validate(self, jwks_data: Dict[str, Any]) -> Dict[str, Any]:
+        if 'keys' not in jwks_data:
+            raise ValueError("Invalid JWKS format: missing 'keys' field")
+
+        logger.info(f"Successfully fetched JWKS with {len(jwks_data['keys'])} keys")
+        return jwks_data
+
+    def _load(self, jwks: Dict[str, Any]) -> None:
+        keys = {key['kid']: key for key in jwks['keys'] if key.get('kid')}
+        public_keys = {}
+
+        for kid, jwk in keys.items():
+            try:
+                public_keys[kid] = _jwk_to_public_key(jwk)
+            except Exception as e:
+                logger.warning(f"Skipping unusable key '{kid}': {e}")
+
+        # Swap both maps in one go so rotated-out kids are evicted together.
+        self._keys, self._public_keys = keys, public_keys
+        self._fetched_at = time.monotonic()
+        self._generation += 1
+
+
+class CognitoJWKSFetcher(_JWKSCache):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._refresh_lock = threading.Lock()
+
     def fetch_jwks(self) -> Dict[str, Any]:
+        start, outcome = time.perf_counter(), "error"
         try:
             response = requests.get(self.jwks_url, timeout=10)
             response.raise_for_status()
-            
-            jwks_data = response.json()
-            
-            if 'keys' not in jwks_data:
-                raise ValueError("Invalid JWKS format: missing 'keys' field")
-            
-            logger.info(f"Successfully fetched JWKS with {len(jwks_data['keys'])} keys")
-            return jwks_data
-            
+
+            jwks = self._validate(response.json())
+            outcome = "ok"
+            return jwks
+
         except requests.RequestException as e:
             logger.error(f"Failed to fetch JWKS: {e}")
             raise
@@ -32,19 +114,130 @@ class CognitoJWKSFetcher:
         except Exception as e:
             logger.error(f"Unexpected error fetching JWKS: {e}")
             raise
-    
+        finally:
+            JWKS_FETCH_DURATION.observe(time.perf_counter() - start, outcome)
+
     def get_key_by_kid(self, kid: str) -> Optional[Dict[str, Any]]:
+        return self._lookup(kid, "_keys")
+
+    def get_public_key(self, kid: str) -> Optional[Any]:
+        """
+        Return the prebuilt public key object for a kid.
+
+        Keys are converted once when the JWKS is loaded, so callers only pay for
+        signature verification.
+        """
+        return self._lookup(kid, "_public_keys")
+
+    def _lookup(self, kid: str, table: str) -> Optional[Any]:
+        key = self._cached(kid, table)
+        if key is not None:
+            return key
+
         try:
+            self._refresh(kid)
+        except Exception as e:
+            logger.error(f"Error getting key by kid: {e}")
+
+        return self._found(kid, table)
+
+    def _refresh(self, kid: str) -> None:
+        """
+        Refresh the key set if the cache is stale or the kid is unknown.
+
+        Concurrent callers are collapsed into a single outbound fetch: whoever holds
+        the lock fetches, everyone else waits and reuses the result. On failure the
+        previously fetched keys are kept so they can still be served.
+        """
+        generation = self._generation
+
+        with self._refresh_lock:
+            if self._generation != generation or not self._should_refresh(kid):
+                return
+
+            self._last_attempt = time.monotonic()
             jwks = self.fetch_jwks()
-            
-            for key in jwks['keys']:
-                if key.get('kid') == kid:
-                    logger.debug(f"Found key with kid: {kid}")
-                    return key
-            
-            logger.warning(f"Key with kid '{kid}' not found in JWKS")
-            return None
-            
+            self._load(jwks)
+
+
+class AsyncCognitoJWKSFetcher(_JWKSCache):
+    def __init__(self, *args, http_client: Optional[httpx.AsyncClient] = None, **kwargs):
+        """
+        Asyncio counterpart of CognitoJWKSFetcher backed by a pooled httpx.AsyncClient.
+
+        Takes the same arguments as CognitoJWKSFetcher plus an optional shared
+        http_client; when omitted one is created on first use and closed by aclose().
+        """
+        super().__init__(*args, **kwargs)
+        self._http_client = http_client
+        self._owns_client = http_client is None
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(timeout=10)
+        return self._http_client
+
+    async def aclose(self) -> None:
+        if self._owns_client and self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    async def fetch_jwks(self) -> Dict[str, Any]:
+        start, outcome = time.perf_counter(), "error"
+        try:
+            response = await self.http_client.get(self.jwks_url)
+            response.raise_for_status()
+
+            jwks = self._validate(response.json())
+            outcome = "ok"
+            return jwks
+
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to fetch JWKS: {e}")
+            raise
+        except json.JSONDecodeError as e:
+            logger.error(f"Invalid JSON in JWKS response: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error fetching JWKS: {e}")
+            raise
+        finally:
+            JWKS_FETCH_DURATION.observe(time.perf_counter() - start, outcome)
+
+    async def prefetch(self) -> None:
+        """Load the key set ahead of the first request, e.g. during app startup."""
+        async with self._refresh_lock:
+            self._last_attempt = time.monotonic()
+            jwks = await self.fetch_jwks()
+            self._load(jwks)
+
+    async def get_key_by_kid(self, kid: str) -> Optional[Dict[str, Any]]:
+        return await self._lookup(kid, "_keys")
+
+    async def get_public_key(self, kid: str) -> Optional[Any]:
+        return await self._lookup(kid, "_public_keys")
+
+    async def _lookup(self, kid: str, table: str) -> Optional[Any]:
+        key = self._cached(kid, table)
+        if key is not None:
+            return key
+
+        try:
+            await self._refresh(kid)
         except Exception as e:
             logger.error(f"Error getting key by kid: {e}")
-            return None
+
+        return self._found(kid, table)
+
+    async def _refresh(self, kid: str) -> None:
+        generation = self._generation
+
+        async with self._refresh_lock:
+            if self._generation != generation or not self._should_refresh(kid):
+                return
+
+            self._last_attempt = time.monotonic()
+            jwks = await self.fetch_jwks()
+            self._load(jwks)
@@ -0,0 +1,115 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from .get_jwks import CognitoJWKSFetcher, AsyncCognitoJWKSFetcher
+from ..metrics import JWKS_CACHE, JWKS_FETCH_DURATION
+from ..fixtures import *
+
+
+def make_fetcher(server, **kwargs):
+    return CognitoJWKSFetcher(region="us-east-1", pool_id="pool", jwks_url=server.url, **kwargs)
+
+
+def test_keys_are_cached_within_ttl(stub_jwks_server):
+    """Test repeated lookups of known kids only fetch the JWKS once"""
+    fetcher = make_fetcher(stub_jwks_server)
+    hits, misses, fetches = JWKS_CACHE.value("hit"), JWKS_CACHE.value("miss"), JWKS_FETCH_DURATION.count("ok")
+
+    for _ in range(10):
+        assert fetcher.get_key_by_kid("key-1")["kid"] == "key-1"
+        assert fetcher.get_key_by_kid("key-2")["kid"] == "key-2"
+
+    assert stub_jwks_server.fetch_count == 1
+    assert JWKS_CACHE.value("hit") - hits == 19
+    assert JWKS_CACHE.value("miss") - misses == 1
+    assert JWKS_FETCH_DURATION.count("ok") - fetches == 1
+
+
+def test_refetch_after_ttl_expires(stub_jwks_server):
+    """Test an expired key set is fetched again"""
+    fetcher = make_fetcher(stub_jwks_server, cache_ttl=60)
+
+    with patch("app.auth.get_jwks.time.monotonic", return_value=1000.0):
+        fetcher.get_key_by_kid("key-1")
+    with patch("app.auth.get_jwks.time.monotonic", return_value=1030.0):
+        fetcher.get_key_by_kid("key-1")
+    assert stub_jwks_server.fetch_count == 1
+
+    with patch("app.auth.get_jwks.time.monotonic", return_value=1061.0):
+        fetcher.get_key_by_kid("key-1")
+    assert stub_jwks_server.fetch_count == 2
+
+
+def test_unknown_kid_refresh_is_rate_limited(stub_jwks_server):
+    """Test unknown kids trigger a refresh at most once per interval"""
+    fetcher = make_fetcher(stub_jwks_server, min_refresh_interval=30)
+
+    with patch("app.auth.get_jwks.time.monotonic", return_value=1000.0):
+        fetcher.get_key_by_kid("key-1")
+    with patch("app.auth.get_jwks.time.monotonic", return_value=1010.0):
+        assert fetcher.get_key_by_kid("unknown") is None
+        assert fetcher.get_key_by_kid("unknown") is None
+    assert stub_jwks_server.fetch_count == 1
+
+    stub_jwks_server.keys.append(make_jwk("rotated"))
+    with patch("app.auth.get_jwks.time.monotonic", return_value=1031.0):
+        assert fetcher.get_key_by_kid("rotated")["kid"] == "rotated"
+    assert stub_jwks_server.fetch_count == 2
+
+
+def test_stale_keys_served_when_refresh_fails(stub_jwks_server):
+    """Test previously fetched keys are still returned while Cognito is failing"""
+    fetcher = make_fetcher(stub_jwks_server, cache_ttl=60)
+
+    with patch("app.auth.get_jwks.time.monotonic", return_value=1000.0):
+        fetcher.get_key_by_kid("key-1")
+
+    stub_jwks_server.fail = True
+    with patch("app.auth.get_jwks.time.monotonic", return_value=1100.0):
+        assert fetcher.get_key_by_kid("key-1")["kid"] == "key-1"
+        assert fetcher.get_key_by_kid("key-1")["kid"] == "key-1"
+    assert stub_jwks_server.fetch_count == 2
+
+
+def test_concurrent_misses_collapse_into_one_fetch(stub_jwks_server):
+    """Test a burst of concurrent cold lookups produces a single outbound fetch"""
+    stub_jwks_server.delay = 0.2
+    fetcher = make_fetcher(stub_jwks_server)
+
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        results = list(pool.map(fetcher.get_key_by_kid, ["key-1", "key-2"] * 100))
+
+    assert all(result is not None for result in results)
+    assert stub_jwks_server.fetch_count == 1
+
+
+def test_public_keys_prebuilt_and_evicted_on_rotation(stub_jwks_server):
+    """Test public key objects are built once per load and dropped when a kid rotates out"""
+    fetcher = make_fetcher(stub_jwks_server, cache_ttl=60)
+
+    with patch("app.auth.get_jwks.time.monotonic", return_value=1000.0):
+        key = fetcher.get_public_key("key-1")
+        assert fetcher.get_public_key("key-1") is key
+        assert key.public_numbers() == signing_key("key-1").public_key().public_numbers()
+
+    stub_jwks_server.keys = [make_jwk("key-2")]
+    with patch("app.auth.get_jwks.time.monotonic", return_value=1061.0):
+        assert fetcher.get_public_key("key-2") is not None
+        assert fetcher.get_public_key("key-1") is None
+
+
+def test_async_concurrent_misses_collapse_into_one_fetch(stub_jwks_server):
+    """Test the async fetcher shares one outbound fetch across concurrent coroutines"""
+    stub_jwks_server.delay = 0.2
+    fetcher = AsyncCognitoJWKSFetcher(region="us-east-1", pool_id="pool", jwks_url=stub_jwks_server.url)
+
+    async def burst():
+        try:
+            return await asyncio.gather(*(fetcher.get_public_key(kid) for kid in ["key-1", "key-2"] * 100))
+        finally:
+            await fetcher.aclose()
+
+    results = asyncio.run(burst())
+
+    assert all(result is not None for result in results)
+    assert stub_jwks_server.fetch_count == 1
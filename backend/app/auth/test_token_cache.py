@@ -0,0 +1,84 @@
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from .auth import create_cognito_auth_dependency
+from .get_jwks import CognitoJWKSFetcher
+from .token_cache import VerifiedTokenCache
+from .validate_token import validate_jwt
+from ..fixtures import *
+
+
+@pytest.fixture
+def cached_auth(stub_jwks_server):
+    fetcher = CognitoJWKSFetcher(region=TEST_REGION, pool_id=TEST_USER_POOL_ID, jwks_url=stub_jwks_server.url)
+    cache = VerifiedTokenCache(maxsize=2)
+    dependency = create_cognito_auth_dependency(
+        jwks_fetcher=fetcher,
+        audience=TEST_AUDIENCE,
+        region=TEST_REGION,
+        user_pool_id=TEST_USER_POOL_ID,
+        token_cache=cache
+    )
+    return dependency, cache
+
+
+def test_repeated_token_served_from_cache(cached_auth):
+    """Test a token is verified once and then answered from the cache"""
+    dependency, cache = cached_auth
+    token = make_id_token()
+
+    with patch("app.auth.auth.validate_jwt", wraps=validate_jwt) as mock_validate:
+        for _ in range(5):
+            assert dependency(token)["sub"] == "test-user-123"
+
+    assert mock_validate.call_count == 1
+    assert cache.stats() == {"size": 1, "hits": 4, "misses": 1}
+
+
+def test_invalid_token_never_cached(cached_auth):
+    """Test audience/issuer checks run on first sight and failures are not cached"""
+    dependency, cache = cached_auth
+    token = make_id_token(aud="other-client")
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            dependency(token)
+        assert exc.value.status_code == 401
+
+    assert len(cache) == 0
+
+
+def test_entry_expires_with_token():
+    """Test cached claims are never returned once the token's exp has passed"""
+    cache = VerifiedTokenCache()
+    cache.put("token", {"sub": "user", "exp": 1000})
+
+    with patch("app.auth.token_cache.time.time", return_value=999.0):
+        assert cache.get("token") == {"sub": "user", "exp": 1000}
+    with patch("app.auth.token_cache.time.time", return_value=1000.0):
+        assert cache.get("token") is None
+    assert len(cache) == 0
+
+
+def test_max_ttl_caps_entry_lifetime():
+    """Test max_ttl expires entries before exp"""
+    cache = VerifiedTokenCache(max_ttl=60)
+    with patch("app.auth.token_cache.time.time", return_value=0.0):
+        cache.put("token", {"sub": "user", "exp": 3600})
+    with patch("app.auth.token_cache.time.time", return_value=61.0):
+        assert cache.get("token") is None
+
+
+def test_least_recently_used_evicted():
+    """Test the cache stays within maxsize by dropping the least recently used token"""
+    cache = VerifiedTokenCache(maxsize=2)
+    exp = time.time() + 3600
+    cache.put("a", {"sub": "a", "exp": exp})
+    cache.put("b", {"sub": "b", "exp": exp})
+    cache.get("a")
+    cache.put("c", {"sub": "c", "exp": exp})
+
+    assert cache.get("b") is None
+    assert cache.get("a")["sub"] == "a"
+    assert cache.get("c")["sub"] == "c"
+
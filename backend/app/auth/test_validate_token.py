@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from .get_jwks import CognitoJWKSFetcher, AsyncCognitoJWKSFetcher
+from .validate_token import validate_jwt, validate_jwt_async, CognitoTokenValidationError
+from ..fixtures import *
+
+
+@pytest.fixture
+def fetcher(stub_jwks_server):
+    return CognitoJWKSFetcher(region=TEST_REGION, pool_id=TEST_USER_POOL_ID, jwks_url=stub_jwks_server.url)
+
+
+def validate(token, fetcher):
+    return validate_jwt(
+        token=token,
+        jwks_fetcher=fetcher,
+        audience=TEST_AUDIENCE,
+        region=TEST_REGION,
+        user_pool_id=TEST_USER_POOL_ID
+    )
+
+
+def test_validate_jwt_success(fetcher, stub_jwks_server):
+    """Test a valid id token is decoded with a single JWKS fetch across calls"""
+    for _ in range(5):
+        claims = validate(make_id_token(), fetcher)
+        assert claims["sub"] == "test-user-123"
+
+    assert stub_jwks_server.fetch_count == 1
+
+
+@pytest.mark.parametrize("token, message", [
+    (lambda: make_id_token(expires_in=-10), "Token has expired"),
+    (lambda: make_id_token(aud="other-client"), "Invalid audience"),
+    (lambda: make_id_token(iss="https://evil.example.com"), "Invalid issuer"),
+    (lambda: make_id_token(token_use="access"), "Invalid token_use"),
+    (lambda: make_id_token(kid="unknown-kid"), "Public key not found"),
+])
+def test_validate_jwt_rejections(fetcher, token, message):
+    """Test the claim and key checks still reject bad tokens"""
+    with pytest.raises(CognitoTokenValidationError, match=message):
+        validate(token(), fetcher)
+
+
+def test_validate_jwt_async(stub_jwks_server):
+    """Test the async validator accepts good tokens and rejects bad ones"""
+    fetcher = AsyncCognitoJWKSFetcher(region=TEST_REGION, pool_id=TEST_USER_POOL_ID, jwks_url=stub_jwks_server.url)
+
+    async def validate_async(token):
+        return await validate_jwt_async(token, fetcher, TEST_AUDIENCE, TEST_REGION, TEST_USER_POOL_ID)
+
+    async def scenario():
+        try:
+            claims = await validate_async(make_id_token())
+            with pytest.raises(CognitoTokenValidationError, match="Invalid audience"):
+                await validate_async(make_id_token(aud="other-client"))
+            return claims
+        finally:
+            await fetcher.aclose()
+
+    assert asyncio.run(scenario())["sub"] == "test-user-123"
@@ -0,0 +1,73 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+class VerifiedTokenCache:
+    def __init__(self, maxsize: int = 1024, max_ttl: Optional[float] = None):
+        """
+        LRU cache of already-verified tokens mapped to their decoded claims.
+
+        Tokens are keyed by their SHA-256 digest so raw tokens are never kept in
+        memory, and every entry expires no later than the token's own `exp`.
+
+        Args:
+            maxsize: Maximum number of tokens kept before the least recently used is evicted
+            max_ttl: Optional cap in seconds on how long an entry may live, regardless of `exp`
+        """
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._digest(token)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and time.time() < entry[0]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        exp = claims.get("exp")
+        if exp is None:
+            return
+
+        expires_at = float(exp)
+        if self.max_ttl is not None:
+            expires_at = min(expires_at, time.time() + self.max_ttl)
+
+        key = self._digest(token)
+        with self._lock:
+            self._entries[key] = (expires_at, dict(claims))
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
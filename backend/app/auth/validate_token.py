@@ -3,52 +3,93 @@ from datetime import datetime, timezone
 from typing import Dict, Any
 import base64
 import os
+from contextlib import contextmanager
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi.concurrency import run_in_threadpool
 from loguru import logger
+from ..metrics import AUTH_STAGE_DURATION
 
 class CognitoTokenValidationError(Exception):
     pass
 
 def validate_jwt(token, jwks_fetcher, audience, region, user_pool_id):
-    try:
-        unverified_header = jwt.get_unverified_header(token)
-        kid = unverified_header.get('kid')
-        
-        if not kid:
-            raise CognitoTokenValidationError("Token missing 'kid' in header")
-        
-        logger.debug(f"Token kid: {kid}")
-        
-        jwk = jwks_fetcher.get_key_by_kid(kid)
-        if not jwk:
+    expected_issuer = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}"
+
+    with _translate_errors(audience, expected_issuer):
+        kid = _get_kid(token)
+
+        with AUTH_STAGE_DURATION.time("key_lookup"):
+            public_key = jwks_fetcher.get_public_key(kid)
+        if public_key is None:
             raise CognitoTokenValidationError(f"Public key not found for kid: {kid}")
-        
-        public_key = _jwk_to_public_key(jwk)
-        
-        expected_issuer = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}"
-        
-        decoded_token = jwt.decode(
-            token,
-            public_key,
-            algorithms=['RS256'],  # Cognito uses RS256
-            audience=audience,
-            issuer=expected_issuer,
-            options={
-                'verify_signature': True,
-                'verify_exp': True,
-                'verify_aud': True,
-                'verify_iss': True,
-            }
+
+        with AUTH_STAGE_DURATION.time("verify"):
+            return _verify_token(token, public_key, audience, expected_issuer)
+
+
+async def validate_jwt_async(token, jwks_fetcher, audience, region, user_pool_id, offload_verification=True):
+    """
+    Async variant of validate_jwt for use with AsyncCognitoJWKSFetcher.
+
+    The key lookup awaits the async fetcher, and RS256 verification is run in the
+    threadpool when offload_verification is set so it never holds the event loop.
+    """
+    expected_issuer = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}"
+
+    with _translate_errors(audience, expected_issuer):
+        kid = _get_kid(token)
+
+        with AUTH_STAGE_DURATION.time("key_lookup"):
+            public_key = await jwks_fetcher.get_public_key(kid)
+        if public_key is None:
+            raise CognitoTokenValidationError(f"Public key not found for kid: {kid}")
+
+        with AUTH_STAGE_DURATION.time("verify"):
+            if offload_verification:
+                return await run_in_threadpool(_verify_token, token, public_key, audience, expected_issuer)
+            return _verify_token(token, public_key, audience, expected_issuer)
+
+
+def _get_kid(token: str) -> str:
+    unverified_header = jwt.get_unverified_header(token)
+    kid = unverified_header.get('kid')
+    
+    if not kid:
+        raise CognitoTokenValidationError("Token missing 'kid' in header")
+    
+    logger.debug("Token kid: {}", kid)
+    return kid
+
+
+def _verify_token(token: str, public_key, audience: str, expected_issuer: str) -> Dict[str, Any]:
+    decoded_token = jwt.decode(
+        token,
+        public_key,
+        algorithms=['RS256'],  # Cognito uses RS256
+        audience=audience,
+        issuer=expected_issuer,
+        options={
+            'verify_signature': True,
+            'verify_exp': True,
+            'verify_aud': True,
+            'verify_iss': True,
+        }
+    )
+    
+    token_use = decoded_token.get('token_use')
+    if token_use != 'id':
+        raise CognitoTokenValidationError(
+            f"Invalid token_use: expected 'id', got '{token_use}'"
         )
-        
-        token_use = decoded_token.get('token_use')
-        if token_use != 'id':
-            raise CognitoTokenValidationError(
-                f"Invalid token_use: expected 'id', got '{token_use}'"
-            )
-        
-        logger.info(f"Successfully validated token for user: {decoded_token.get('sub')}")
-        return decoded_token
-        
+    
+    logger.info(f"Successfully validated token for user: {decoded_token.get('sub')}")
+    return decoded_token
+
+
+@contextmanager
+def _translate_errors(audience: str, expected_issuer: str):
+    try:
+        yield
     except jwt.ExpiredSignatureError:
         raise CognitoTokenValidationError("Token has expired")
     except jwt.InvalidAudienceError:
@@ -93,7 +134,6 @@ def _jwk_to_public_key(jwk: Dict[str, Any]):
             n_int = int.from_bytes(n_bytes, 'big')
             e_int = int.from_bytes(e_bytes, 'big')
             
-            from cryptography.hazmat.primitives.asymmetric import rsa
             public_key = rsa.RSAPublicNumbers(e_int, n_int).public_key()
             return public_key
             
@@ -0,0 +1,281 @@
+import hashlib
+import json
+import secrets
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+from fastapi import Request, Response
+from loguru import logger
+from .compression import Compressor
+
+
+class CacheBackend(ABC):
+    """
+    Minimal async key/value interface the response caches are built on.
+
+    Implementations store opaque bytes with a time-to-live.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """The value stored under `key`, or None when missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Store `value` under `key` for `ttl` seconds."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Forget `key`; a missing key is not an error."""
+
+    async def aclose(self) -> None:
+        """Release connections; nothing to do for in-process backends."""
+
+
+class InMemoryLRUCache(CacheBackend):
+    def __init__(self, maxsize: int = 1024):
+        """
+        Per-process LRU backend; entries are only visible to the worker that wrote them.
+
+        Only for single-process deployments: a UserResponseCache on it keeps the
+        version tokens here too, so other workers never see an invalidation.
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class RedisCache(CacheBackend):
+    def __init__(self, client):
+        """
+        Shared backend over a redis.asyncio-compatible client, so every worker sees
+        the same entries and invalidations.
+        """
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCache":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RedisCache requires the 'redis' package (pip install redis)")
+        return cls(redis.from_url(url))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(key)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    # Content-Encoding -> body compressed with it, filled in as clients ask for them.
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, body: bytes, headers: Optional[Dict[str, str]] = None) -> "CachedResponse":
+        return cls(body=body, etag=make_etag(body), headers=headers or {})
+
+    def encode(self) -> bytes:
+        meta = {"etag": self.etag, "headers": self.headers}
+        if self.encoded:
+            # Compressed bodies follow the plain one, in the order their lengths are listed.
+            meta["encoded"] = {encoding: len(data) for encoding, data in self.encoded.items()}
+        return json.dumps(meta, separators=(",", ":")).encode() + b"\n" + self.body + b"".join(self.encoded.values())
+
+    @classmethod
+    def decode(cls, raw: bytes) -> "CachedResponse":
+        meta, _, payload = raw.partition(b"\n")
+        meta = json.loads(meta)
+        sizes = meta.get("encoded", {})
+        body_size = offset = len(payload) - sum(sizes.values())
+        encoded = {}
+        for encoding, size in sizes.items():
+            encoded[encoding] = payload[offset:offset + size]
+            offset += size
+        return cls(body=payload[:body_size], etag=meta["etag"], headers=meta["headers"], encoded=encoded)
+
+
+class UserResponseCache:
+    def __init__(self, backend: CacheBackend, namespace: str, ttl: float = 300):
+        """
+        Per-user cache of serialized responses with cheap whole-user invalidation.
+
+        Each user has a version token and entries are keyed by it, so invalidate()
+        only has to rotate the token for every cached variant of that user to go
+        stale. Callers read the version before querying and store under it; a write
+        that lands during the query rotates the token and the late store is never read.
+        Invalidations only reach processes sharing the backend, so with several
+        workers it must be a shared one (Redis).
+
+        Args:
+            backend: Storage backend (in-process LRU or shared Redis)
+            namespace: Key prefix, e.g. "recipes"
+            ttl: Seconds an entry may be served; bounds staleness if an invalidation is missed
+        """
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def lookup(self, user_id: str, variant: str) -> Tuple[Optional[CachedResponse], Optional[bytes]]:
+        """Return (cached entry or None, version token to store a fresh entry under)."""
+        try:
+            version = await self.backend.get(self._version_key(user_id))
+            if version is None:
+                version = await self._rotate(user_id)
+                raw = None
+            else:
+                raw = await self.backend.get(self._entry_key(user_id, version, variant))
+        except Exception as e:
+            logger.warning(f"Cache read failed for {self.namespace}: {e}")
+            self.misses += 1
+            return None, None
+
+        if raw is None:
+            self.misses += 1
+            return None, version
+
+        self.hits += 1
+        return CachedResponse.decode(raw), version
+
+    async def store(self, user_id: str, variant: str, version: Optional[bytes], entry: CachedResponse) -> None:
+        if version is None:
+            return
+
+        try:
+            await self.backend.set(self._entry_key(user_id, version, variant), entry.encode(), self.ttl)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {self.namespace}: {e}")
+
+    async def current_version(self, user_id: str) -> Optional[bytes]:
+        """The user's version token, so other per-user state can be checked against it; None if the backend fails."""
+        try:
+            return await self.backend.get(self._version_key(user_id)) or await self._rotate(user_id)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {self.namespace}: {e}")
+            return None
+
+    async def invalidate(self, user_id: str) -> Optional[bytes]:
+        """Rotate the user's version token and return the new one (None if the backend failed)."""
+        try:
+            return await self._rotate(user_id)
+        except Exception as e:
+            logger.error(f"❌ Cache invalidation failed for {self.namespace}: {e}")
+            return None
+
+    async def _rotate(self, user_id: str) -> bytes:
+        version = secrets.token_hex(8).encode()
+        await self.backend.set(self._version_key(user_id), version, self.ttl)
+        return version
+
+    def _version_key(self, user_id: str) -> str:
+        return f"{self.namespace}:{user_id}:version"
+
+    def _entry_key(self, user_id: str, version: bytes, variant: str) -> str:
+        return f"{self.namespace}:{user_id}:{version.decode()}:{variant}"
+
+
+def make_etag(body: bytes) -> str:
+    # Weak because the same entity may later be served with different content encodings.
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def cached_json_response(
+    request: Request,
+    entry: CachedResponse,
+    cache_control: str = "private, no-cache",
+    compressor: Optional[Compressor] = None
+) -> Response:
+    """
+    Render a cached entry, answering 304 without a body when the client's ETag matches.
+
+    With a compressor, the body is sent in the encoding the client negotiated,
+    reusing the entry's compressed copy when there is one (and keeping a new one
+    on the entry otherwise).
+    """
+    headers = {"ETag": entry.etag, "Cache-Control": cache_control, **entry.headers}
+    if compressor is not None:
+        headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+
+    if compressor is not None:
+        accept_encoding = request.headers.get("accept-encoding")
+        compressor.precompress(entry, accept_encoding)
+        encoding = compressor.negotiate(accept_encoding)
+        if encoding in entry.encoded:
+            headers["Content-Encoding"] = encoding
+            return Response(content=entry.encoded[encoding], media_type="application/json", headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+async def serve_cached(
+    request: Request,
+    cache: Optional[UserResponseCache],
+    user_id: str,
+    variant: str,
+    compressor: Optional[Compressor] = None
+) -> Tuple[Optional[Response], Optional[bytes]]:
+    """
+    Answer a request from the user's cached entry for `variant`, if there is one.
+
+    A hit in an encoding the entry doesn't have yet is compressed once and stored
+    again, so later hits in that encoding are served as they are.
+
+    Returns:
+        (the response, or None on a miss; version token to store a fresh entry under)
+    """
+    if cache is None:
+        return None, None
+    cached, version = await cache.lookup(user_id, variant)
+    if cached is None:
+        return None, version
+    if compressor is not None and not etag_matches(request, cached.etag):
+        if compressor.precompress(cached, request.headers.get("accept-encoding")):
+            await cache.store(user_id, variant, version, cached)
+    return cached_json_response(request, cached, compressor=compressor), version
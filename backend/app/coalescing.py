@@ -0,0 +1,70 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+from .metrics import READ_COALESCING
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self, window: float = 0.05):
+        """
+        Per-worker single-flight for reads: identical concurrent reads share one fetch.
+
+        The first caller for a (user, key) starts the fetch; callers that arrive
+        while it runs, or within `window` seconds after it finished, get the same
+        result instead of querying again. Calls are grouped by user first, so a
+        result is never handed to another user whatever the key, and forget()
+        drops a user's calls after they write. Failures are shared with callers
+        already waiting but never kept for the window. The fetch runs in its own
+        task, so a caller that disconnects doesn't cancel it for the others.
+
+        Args:
+            window: Seconds a finished result is still shared (0: only while in flight)
+        """
+        self.window = window
+        self._calls: Dict[str, Dict[Hashable, asyncio.Task]] = {}
+
+    async def do(self, user_id: str, key: Hashable, fetch: Callable[[], Awaitable[T]], route: str = "read") -> T:
+        calls = self._calls.setdefault(user_id, {})
+        task = calls.get(key)
+        if task is not None:
+            READ_COALESCING.inc(route, "shared")
+            if task.done():
+                return task.result()
+            return await asyncio.shield(task)
+
+        READ_COALESCING.inc(route, "fetched")
+        task = asyncio.ensure_future(fetch())
+        calls[key] = task
+        task.add_done_callback(lambda done: self._finished(user_id, key, done))
+        return await asyncio.shield(task)
+
+    def forget(self, user_id: str) -> None:
+        """Stop sharing the user's reads, e.g. after they wrote; fetches already running finish for their callers."""
+        self._calls.pop(user_id, None)
+
+    def _finished(self, user_id: str, key: Hashable, task: asyncio.Task) -> None:
+        if self.window > 0 and not task.cancelled() and task.exception() is None:
+            asyncio.get_running_loop().call_later(self.window, self._expire, user_id, key, task)
+        else:
+            self._expire(user_id, key, task)
+
+    def _expire(self, user_id: str, key: Hashable, task: asyncio.Task) -> None:
+        calls = self._calls.get(user_id)
+        if calls is not None and calls.get(key) is task:
+            del calls[key]
+            if not calls:
+                del self._calls[user_id]
+
+
+async def coalesced(
+    flight: Optional[SingleFlight],
+    user_id: str,
+    key: Hashable,
+    fetch: Callable[[], Awaitable[T]],
+    route: str = "read"
+) -> T:
+    """flight.do(...), or just fetch() when coalescing is disabled or there is no user to scope it to."""
+    if flight is None or not user_id:
+        return await fetch()
+    return await flight.do(user_id, key, fetch, route)
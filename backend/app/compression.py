@@ -0,0 +1,227 @@
+import functools
+import gzip
+import time
+import zlib
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from loguru import logger
+from starlette.datastructures import Headers, MutableHeaders
+from .metrics import COMPRESSION_DURATION, RESPONSE_BYTES
+
+# brotli and zstandard are optional: "br" and "zstd" are only offered when installed.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+DEFAULT_LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+
+# compress(body) for whole bodies; stream() -> (write(chunk), finish()) for streamed ones,
+# where every write is flushed so rows reach the client as soon as they are produced.
+Codec = Tuple[Callable[[bytes], bytes], Callable[[], Tuple[Callable[[bytes], bytes], Callable[[], bytes]]]]
+
+
+def _gzip(level: int) -> Codec:
+    def stream():
+        z = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return (lambda chunk: z.compress(chunk) + z.flush(zlib.Z_SYNC_FLUSH)), z.flush
+
+    return (lambda body: gzip.compress(body, compresslevel=level, mtime=0)), stream
+
+
+def _brotli(level: int) -> Codec:
+    def stream():
+        c = brotli.Compressor(quality=level)
+        return (lambda chunk: c.process(chunk) + c.flush()), c.finish
+
+    return (lambda body: brotli.compress(body, quality=level)), stream
+
+
+def _zstd(level: int) -> Codec:
+    compressor = zstandard.ZstdCompressor(level=level)
+
+    def stream():
+        z = compressor.compressobj()
+        return (lambda chunk: z.compress(chunk) + z.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)), z.flush
+
+    return compressor.compress, stream
+
+
+CODECS: Dict[str, Optional[Callable[[int], Codec]]] = {
+    "gzip": _gzip,
+    "br": _brotli if brotli is not None else None,
+    "zstd": _zstd if zstandard is not None else None,
+}
+
+
+class Compressor:
+    def __init__(
+        self,
+        encodings: Iterable[str] = ("zstd", "br", "gzip"),
+        minimum_size: int = 1024,
+        levels: Optional[Dict[str, int]] = None
+    ):
+        """
+        Content-Encoding negotiation and codecs, shared by CompressionMiddleware and
+        the response caches (which keep compressed bodies next to the plain one).
+
+        Args:
+            encodings: Encodings offered, preferred first; ones whose library isn't installed are skipped
+            minimum_size: Bodies smaller than this many bytes are sent as-is
+            levels: Compression level per encoding (gzip 1-9, br 0-11, zstd 1-22)
+        """
+        levels = {**DEFAULT_LEVELS, **(levels or {})}
+        self.minimum_size = minimum_size
+        self.codecs: Dict[str, Codec] = {}
+        for name in encodings:
+            if name not in CODECS:
+                raise ValueError(f"Unknown compression encoding: {name}")
+            if CODECS[name] is None:
+                logger.debug(f"Compression encoding {name} needs its library installed, not offering it")
+                continue
+            self.codecs[name] = CODECS[name](levels[name])
+        # Clients send a handful of distinct Accept-Encoding values; parse each once.
+        self.negotiate = functools.lru_cache(maxsize=256)(self.negotiate)
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """The encoding to answer an Accept-Encoding header with, or None for identity."""
+        if not accept_encoding:
+            return None
+
+        weights = {}
+        for part in accept_encoding.split(","):
+            name, _, params = part.partition(";")
+            weight = 1.0
+            params = params.replace(" ", "")
+            if params.startswith("q="):
+                try:
+                    weight = float(params[2:])
+                except ValueError:
+                    weight = 0.0
+            weights[name.strip().lower()] = weight
+
+        # Highest weight wins; ties go to the server's preference order.
+        best, best_weight = None, 0.0
+        for name in self.codecs:
+            weight = weights.get(name, weights.get("*", 0.0))
+            if weight > best_weight:
+                best, best_weight = name, weight
+        return best
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        start = time.perf_counter()
+        compressed = self.codecs[encoding][0](body)
+        COMPRESSION_DURATION.observe(time.perf_counter() - start, encoding)
+        return compressed
+
+    def stream(self, encoding: str) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+        """(write, finish) for an incrementally compressed body."""
+        write, finish = self.codecs[encoding][1]()
+
+        def timed(step):
+            def run(*args):
+                start = time.perf_counter()
+                compressed = step(*args)
+                COMPRESSION_DURATION.observe(time.perf_counter() - start, encoding)
+                return compressed
+            return run
+
+        return timed(write), timed(finish)
+
+    def precompress(self, entry, accept_encoding: Optional[str]) -> bool:
+        """
+        Add the body compressed with the negotiated encoding to a cached entry's
+        `encoded` bodies, so hits for the same encoding are served without compressing.
+
+        Returns:
+            True if an encoding was added (the entry is worth storing again)
+        """
+        if len(entry.body) < self.minimum_size:
+            return False
+        encoding = self.negotiate(accept_encoding)
+        if encoding is None or encoding in entry.encoded:
+            return False
+        entry.encoded[encoding] = self.compress(encoding, entry.body)
+        return True
+
+
+class CompressionMiddleware:
+    def __init__(self, app, compressor: Compressor):
+        """
+        Pure ASGI middleware compressing JSON, NDJSON and text responses.
+
+        Whole bodies under the compressor's minimum size are left alone; streamed
+        bodies are compressed chunk by chunk and flushed each time. Responses that
+        already carry a Content-Encoding (cached entries served precompressed) pass
+        through untouched. Strong ETags are weakened when the body is re-encoded.
+        Also counts body bytes sent per encoding.
+        """
+        self.app = app
+        self.compressor = compressor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = None if scope["method"] == "HEAD" else self.compressor.negotiate(
+            Headers(scope=scope).get("accept-encoding")
+        )
+        start_message = None
+        label = "identity"
+        write = finish = None
+
+        async def send_compressed(message):
+            nonlocal start_message, label, write, finish
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether the body is worth compressing.
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                if start_message is not None:
+                    await send(start_message)
+                    start_message = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                start, start_message = start_message, None
+                headers = MutableHeaders(scope=start)
+                if self._compressible(headers):
+                    headers.add_vary_header("Accept-Encoding")
+                    if encoding is not None and (more_body or len(body) >= self.compressor.minimum_size):
+                        label = encoding
+                        headers["Content-Encoding"] = encoding
+                        etag = headers.get("etag")
+                        if etag and not etag.startswith("W/"):
+                            headers["ETag"] = f"W/{etag}"
+                        if more_body:
+                            write, finish = self.compressor.stream(encoding)
+                            del headers["Content-Length"]
+                        else:
+                            body = self.compressor.compress(encoding, body)
+                            headers["Content-Length"] = str(len(body))
+                        message = {**message, "body": body}
+                label = headers.get("content-encoding", label)
+                await send(start)
+
+            if write is not None:
+                body = write(body) if more_body else write(body) + finish()
+                message = {**message, "body": body}
+            RESPONSE_BYTES.inc(label, amount=len(body))
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _compressible(headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return False
+        return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
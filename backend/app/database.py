@@ -0,0 +1,172 @@
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+from loguru import logger
+from sqlalchemy import delete, insert, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from .metrics import SQL_TRANSACTION_DURATION
+from .models.models import Recipe
+from .pagination import RECIPE_COLUMN_LIST, decode_cursor, split_page
+from .recipe_store import RecipeStore, Row
+
+RECIPES = Recipe.__table__
+
+# What PostgREST does at the start of every request: switch to the API role and
+# expose the caller's claims to row-level security policies, both transaction-local.
+_ACT_AS = text("select set_config('role', :role, true), set_config('request.jwt.claims', :claims, true)")
+
+_SEARCH_ARGUMENTS = (
+    "q => cast(:q as text), cuisine => cast(:cuisine as text), recipe_type => cast(:recipe_type as text), "
+    "min_time => cast(:min_time as integer), max_time => cast(:max_time as integer)"
+)
+_SEARCH_FILTERS = ("q", "cuisine", "recipe_type", "min_time", "max_time")
+
+
+def async_database_url(url: str) -> str:
+    """SQLAlchemy URL for a plain postgres:// connection string, using the async psycopg 3 driver."""
+    for prefix in ("postgres://", "postgresql://"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg://" + url[len(prefix):]
+    return url
+
+
+class PostgresDatabase:
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        pool_size: int = 10,
+        max_overflow: int = 10,
+        role: str = "authenticated",
+        engine: Optional[AsyncEngine] = None
+    ):
+        """
+        Pooled async SQLAlchemy engine used when DATA_BACKEND=postgres.
+
+        Queries go straight to Postgres instead of through PostgREST, saving an
+        HTTP round-trip and a JSON re-encode per query. Every transaction takes on
+        `role` and the caller's claims the way PostgREST does, so the same
+        row-level security policies apply; the connecting user must be allowed to
+        SET ROLE to `role` (Supabase's `postgres` user is).
+
+        Args:
+            url: Postgres connection string (postgres://, postgresql:// or a SQLAlchemy URL)
+            pool_size: Connections kept open per worker
+            max_overflow: Extra connections allowed under load, closed when returned
+            role: Database role queries run as
+            engine: Optional pre-built engine, mainly for tests and benchmarks
+        """
+        if engine is None:
+            if not url:
+                raise RuntimeError("DATA_BACKEND=postgres requires DATABASE_URL")
+            try:
+                import psycopg  # noqa: F401
+            except ImportError:
+                raise RuntimeError("DATA_BACKEND=postgres requires the 'psycopg' package (pip install 'psycopg[binary]')")
+            engine = create_async_engine(async_database_url(url), pool_size=pool_size, max_overflow=max_overflow)
+        self.engine = engine
+        self.role = role
+
+    def for_user(self, user_id: str) -> "SQLRecipeStore":
+        """Store whose queries act as `user_id`, so row-level security applies."""
+        return SQLRecipeStore(self, user_id)
+
+    @asynccontextmanager
+    async def transaction(self, user_id: str, operation: str) -> AsyncIterator[AsyncConnection]:
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            async with self.engine.begin() as conn:
+                await conn.execute(_ACT_AS, {"role": self.role, "claims": json.dumps({"sub": user_id, "role": self.role})})
+                yield conn
+            outcome = "ok"
+        finally:
+            SQL_TRANSACTION_DURATION.observe(time.perf_counter() - start, operation, outcome)
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """Open up to `connections` pooled connections before the first request needs them."""
+        async def ping():
+            async with self.engine.connect() as conn:
+                await conn.execute(text("select 1"))
+
+        await asyncio.gather(*(ping() for _ in range(connections)))
+
+    async def aclose(self) -> None:
+        await self.engine.dispose()
+        logger.info("Postgres connection pool closed")
+
+
+class SQLRecipeStore(RecipeStore):
+    def __init__(self, database: PostgresDatabase, user_id: str):
+        """RecipeStore over a direct Postgres connection, built on the Recipe model's table."""
+        self.database = database
+        self.user_id = user_id
+
+    async def list_page(self, columns: str, cursor: Optional[str], limit: Optional[int]) -> List[Row]:
+        query = select(*_columns(columns)).order_by(RECIPES.c.created_at.desc(), RECIPES.c.id.desc())
+        if cursor:
+            query = query.where(tuple_(RECIPES.c.created_at, RECIPES.c.id) < tuple_(*decode_cursor(cursor)))
+        if limit is not None:
+            query = query.limit(limit + 1)
+        return await self._rows("select", query)
+
+    async def pages(self, columns: str, page_size: int, cursor: Optional[str] = None) -> AsyncIterator[List[Row]]:
+        while True:
+            rows, cursor = split_page(await self.list_page(columns, cursor, page_size), page_size)
+            yield rows
+            if not cursor:
+                return
+
+    async def get_many(self, ids: List[Any], columns: str) -> List[Row]:
+        return await self._rows("select", select(*_columns(columns)).where(RECIPES.c.id.in_(ids)))
+
+    async def search(self, filters: Dict[str, Any], columns: str, page_size: int, page_offset: int) -> List[Row]:
+        # `columns` comes from select_columns(), so it only ever names known columns.
+        query = text(
+            f"select {columns} from public.search_recipes({_SEARCH_ARGUMENTS}, "
+            "page_size => :page_size, page_offset => :page_offset)"
+        )
+        return await self._rows("search", query, {**_search_params(filters), "page_size": page_size, "page_offset": page_offset})
+
+    async def search_facets(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._scalar("search_facets", text(f"select public.recipe_search_facets({_SEARCH_ARGUMENTS})"), _search_params(filters))
+
+    async def sync_version(self) -> int:
+        query = text("select version from public.recipe_sync_state where user_id = :user_id")
+        return await self._scalar("sync_version", query, {"user_id": self.user_id}) or 0
+
+    async def changes(self, since: Optional[int]) -> Dict[str, Any]:
+        return await self._scalar("changes", text("select public.recipe_changes(cast(:since as bigint))"), {"since": since})
+
+    async def insert(self, rows: Union[Row, List[Row]]) -> List[Row]:
+        rows = [rows] if isinstance(rows, dict) else rows
+        query = insert(RECIPES).values(rows).returning(*_columns(",".join(RECIPE_COLUMN_LIST)))
+        return await self._rows("insert", query)
+
+    async def delete(self, ids: List[Any]) -> List[Row]:
+        query = delete(RECIPES).where(RECIPES.c.user_id == self.user_id, RECIPES.c.id.in_(ids)).returning(RECIPES.c.id)
+        return await self._rows("delete", query)
+
+    async def _rows(self, operation: str, statement, params: Optional[Dict[str, Any]] = None) -> List[Row]:
+        async with self.database.transaction(self.user_id, operation) as conn:
+            result = await conn.execute(statement, params or {})
+            return [_row(mapping) for mapping in result.mappings()]
+
+    async def _scalar(self, operation: str, statement, params: Dict[str, Any]) -> Any:
+        async with self.database.transaction(self.user_id, operation) as conn:
+            return (await conn.execute(statement, params)).scalar()
+
+
+def _columns(columns: str):
+    return [RECIPES.c[name] for name in columns.split(",")]
+
+
+def _search_params(filters: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: filters.get(name) for name in _SEARCH_FILTERS}
+
+
+def _row(mapping) -> Row:
+    # Shape rows like PostgREST's JSON: timestamps as ISO 8601 strings.
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in mapping.items()}
@@ -1,18 +1,291 @@
-from .auth.auth import create_cognito_auth_dependency 
-from .auth.get_jwks import CognitoJWKSFetcher
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-
-jwks_fetch = CognitoJWKSFetcher(
-    region=os.getenv("REGION"),
-    pool_id=os.getenv("COGNITO_USER_POOL_ID")
-)
-
-auth_dependency = create_cognito_auth_dependency(
-    jwks_fetcher=jwks_fetch,
-    audience=os.getenv("COGNITO_APP_CLIENT_ID"),
-    region=os.getenv("REGION"),
-    user_pool_id=os.getenv("COGNITO_USER_POOL_ID")
-)
\ No newline at end of file
+from .auth.auth import create_async_cognito_auth_dependency, extract_token
+from .auth.get_jwks import AsyncCognitoJWKSFetcher
+from .auth.token_cache import VerifiedTokenCache
+from .supabase_clients import SupabaseClients
+from .cache import InMemoryLRUCache, RedisCache, UserResponseCache
+from .coalescing import SingleFlight
+from .compression import Compressor
+from .idempotency import IdempotencyKeys
+from .ingredient_index import IngredientIndexStore
+from .metrics import RATE_LIMITED
+from .rate_limit import InMemoryRateLimiter, RateLimiter, RedisRateLimiter, retry_after_header
+from .recipe_store import PostgRESTRecipeStore, RecipeStore
+from .user_provisioning import UserWriteBatcher, upsert_users
+from .settings import Settings, get_settings
+from fastapi import Depends, HTTPException, Request, status
+from typing import Any, Callable, Dict, Optional
+from loguru import logger
+
+
+def create_jwks_fetcher(settings: Settings) -> AsyncCognitoJWKSFetcher:
+    return AsyncCognitoJWKSFetcher(
+        region=settings.region,
+        pool_id=settings.cognito_user_pool_id,
+        cache_ttl=settings.jwks_cache_ttl,
+        min_refresh_interval=settings.jwks_min_refresh_interval,
+        jwks_url=settings.cognito_jwks_url
+    )
+
+
+def create_authenticator(settings: Settings, jwks_fetcher: AsyncCognitoJWKSFetcher) -> Callable:
+    """Token validator used by auth_dependency, with its own verified-token cache."""
+    size = settings.auth_token_cache_size
+    return create_async_cognito_auth_dependency(
+        jwks_fetcher=jwks_fetcher,
+        audience=settings.cognito_app_client_id,
+        region=settings.region,
+        user_pool_id=settings.cognito_user_pool_id,
+        token_cache=VerifiedTokenCache(maxsize=size) if size > 0 else None
+    )
+
+
+def create_supabase_clients(settings: Settings) -> SupabaseClients:
+    return SupabaseClients(
+        url=settings.proj_url,
+        anon_key=settings.anon_key,
+        service_role=settings.service_role,
+        max_connections=settings.supabase_max_connections
+    )
+
+
+def create_database(settings: Settings):
+    """Direct Postgres engine for DATA_BACKEND=postgres (SQLAlchemy's asyncio extension is only imported then)."""
+    from .database import PostgresDatabase
+
+    return PostgresDatabase(
+        url=settings.database_url,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        role=settings.database_role
+    )
+
+
+def create_recipe_cache(settings: Settings) -> Optional[UserResponseCache]:
+    """
+    Per-user cache of GET /recipes responses, configured by RECIPE_CACHE_BACKEND.
+
+    "none" (default) disables caching; "redis" shares entries and invalidations
+    across workers via REDIS_URL; "memory" keeps both inside the process, so it
+    is only correct with a single worker (development, tests).
+    """
+    backend = settings.recipe_cache_backend
+    ttl = settings.recipe_cache_ttl
+
+    if backend == "none":
+        return None
+    if backend == "redis":
+        return UserResponseCache(RedisCache.from_url(settings.redis_url), "recipes", ttl)
+    if backend == "memory":
+        return UserResponseCache(InMemoryLRUCache(settings.recipe_cache_size), "recipes", ttl)
+
+    raise ValueError(f"Unknown RECIPE_CACHE_BACKEND: {backend}")
+
+
+def create_ingredient_index(settings: Settings) -> IngredientIndexStore:
+    """
+    Per-worker ingredient indexes for POST /recipes/what-can-i-cook.
+
+    Indexes notice other workers' writes through the version tokens of a shared
+    (Redis) recipe cache. With several workers and no such cache they check the
+    per-user sync version in the database instead (migrations/003 must be applied).
+    """
+    database_versions = settings.workers > 1 and settings.recipe_cache_backend != "redis"
+    if database_versions:
+        logger.info(
+            f"Ingredient indexes are checked against recipe_sync_state on every query: {settings.workers} "
+            "workers and no redis recipe cache to share versions through"
+        )
+    return IngredientIndexStore(
+        maxsize=settings.ingredient_index_size,
+        ttl=settings.ingredient_index_ttl,
+        database_versions=database_versions
+    )
+
+
+def create_rate_limiter(settings: Settings) -> Optional[RateLimiter]:
+    """
+    Per-user token buckets, configured by RATE_LIMIT_BACKEND.
+
+    "memory" (default) keeps buckets per worker; "redis" shares them across
+    workers via REDIS_URL (any Redis-compatible server with Lua scripting);
+    "none" disables rate limiting.
+    """
+    backend = settings.rate_limit_backend
+    rate, burst = settings.rate_limit_per_second, settings.rate_limit_burst
+
+    if backend == "none":
+        return None
+    if backend == "redis":
+        return RedisRateLimiter.from_url(settings.redis_url, rate, burst)
+    if backend == "memory":
+        return InMemoryRateLimiter(rate, burst)
+
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
+
+
+def create_read_coalescer(settings: Settings) -> Optional[SingleFlight]:
+    """Per-worker single-flight for identical concurrent GETs; None when READ_COALESCING is off."""
+    if not settings.read_coalescing:
+        return None
+    return SingleFlight(window=settings.read_coalesce_window)
+
+
+def create_compressor(settings: Settings) -> Optional[Compressor]:
+    """Response compression per COMPRESSION_ENCODINGS; None when none is configured or installed."""
+    encodings = [name.strip() for name in settings.compression_encodings.split(",") if name.strip()]
+    if not encodings:
+        return None
+    compressor = Compressor(
+        encodings,
+        minimum_size=settings.compression_min_size,
+        levels={
+            "gzip": settings.compression_gzip_level,
+            "br": settings.compression_brotli_level,
+            "zstd": settings.compression_zstd_level
+        }
+    )
+    return compressor if compressor.codecs else None
+
+
+def create_user_idempotency(settings: Settings) -> Optional[IdempotencyKeys]:
+    """
+    Idempotency-Key records for POST /users/create-user, configured by IDEMPOTENCY_BACKEND.
+
+    "memory" (default) remembers keys per worker; "redis" shares them across
+    workers via REDIS_URL; "none" ignores the header.
+    """
+    backend = settings.idempotency_backend
+    ttl = settings.idempotency_ttl
+
+    if backend == "none":
+        return None
+    if backend == "redis":
+        return IdempotencyKeys(RedisCache.from_url(settings.redis_url), "create-user", ttl)
+    if backend == "memory":
+        return IdempotencyKeys(InMemoryLRUCache(settings.idempotency_cache_size), "create-user", ttl)
+
+    raise ValueError(f"Unknown IDEMPOTENCY_BACKEND: {backend}")
+
+
+def create_user_writer(settings: Settings, supabase: SupabaseClients) -> Optional[UserWriteBatcher]:
+    """Batched user provisioning when USER_WRITE_BATCHING is on; None writes each user directly."""
+    if not settings.user_write_batching:
+        return None
+    return UserWriteBatcher(
+        lambda rows: upsert_users(supabase, rows),
+        max_batch=settings.user_write_batch_size,
+        max_delay=settings.user_write_max_delay
+    )
+
+
+def app_settings(request: Request) -> Settings:
+    return getattr(request.app.state, "settings", None) or get_settings()
+
+
+def _resource(request: Request, name: str, factory: Callable[[Settings], Any]) -> Any:
+    """
+    Shared resource created in the app lifespan.
+
+    Falls back to creating it on first use when the app was started without
+    running its lifespan (e.g. a bare TestClient).
+    """
+    state = request.app.state
+    if not hasattr(state, name):
+        setattr(state, name, factory(app_settings(request)))
+    return getattr(state, name)
+
+
+def get_supabase(request: Request) -> SupabaseClients:
+    return _resource(request, "supabase", create_supabase_clients)
+
+
+def get_recipe_cache(request: Request) -> Optional[UserResponseCache]:
+    return _resource(request, "recipe_cache", create_recipe_cache)
+
+
+def get_ingredient_index(request: Request) -> IngredientIndexStore:
+    return _resource(request, "ingredient_index", create_ingredient_index)
+
+
+def get_rate_limiter(request: Request) -> Optional[RateLimiter]:
+    return _resource(request, "rate_limiter", create_rate_limiter)
+
+
+def get_read_coalescer(request: Request) -> Optional[SingleFlight]:
+    return _resource(request, "read_coalescer", create_read_coalescer)
+
+
+def get_compressor(request: Request) -> Optional[Compressor]:
+    return _resource(request, "compressor", create_compressor)
+
+
+def get_user_idempotency(request: Request) -> Optional[IdempotencyKeys]:
+    return _resource(request, "user_idempotency", create_user_idempotency)
+
+
+def get_user_writer(
+    request: Request,
+    settings: Settings = Depends(app_settings),
+    supabase: SupabaseClients = Depends(get_supabase)
+) -> Optional[UserWriteBatcher]:
+    if not settings.user_write_batching:
+        return None
+    return _resource(request, "user_writer", lambda settings: create_user_writer(settings, supabase))
+
+
+def get_database(request: Request):
+    return _resource(request, "database", create_database)
+
+
+def get_jwks_fetcher(request: Request) -> AsyncCognitoJWKSFetcher:
+    return _resource(request, "jwks_fetcher", create_jwks_fetcher)
+
+
+async def auth_dependency(request: Request, token: str = Depends(extract_token)) -> Dict[str, Any]:
+    """Validate the caller's Cognito JWT and return its claims."""
+    authenticate = _resource(
+        request, "authenticate",
+        lambda settings: create_authenticator(settings, get_jwks_fetcher(request))
+    )
+    return await authenticate(token)
+
+
+def get_recipe_store(
+    request: Request,
+    user: Dict[str, Any] = Depends(auth_dependency),
+    token: str = Depends(extract_token),
+    supabase: SupabaseClients = Depends(get_supabase),
+    settings: Settings = Depends(app_settings)
+) -> RecipeStore:
+    """The caller's recipes, on the backend DATA_BACKEND selects."""
+    backend = settings.data_backend
+    if backend == "postgres":
+        return get_database(request).for_user(user.get("sub"))
+    if backend == "postgrest":
+        return PostgRESTRecipeStore(supabase, token, user.get("sub"))
+
+    raise ValueError(f"Unknown DATA_BACKEND: {backend}")
+
+
+async def rate_limit(
+    user: Dict[str, Any] = Depends(auth_dependency),
+    limiter: Optional[RateLimiter] = Depends(get_rate_limiter)
+) -> None:
+    """
+    Take a token from the caller's bucket, or answer 429 with Retry-After.
+
+    Runs after token validation so buckets are keyed on a verified sub; a forged
+    token can't drain someone else's bucket.
+    """
+    user_id = user.get("sub")
+    if limiter is None or not user_id:
+        return
+
+    allowed, retry_after = await limiter.hit(user_id)
+    if not allowed:
+        RATE_LIMITED.inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": retry_after_header(retry_after)}
+        )
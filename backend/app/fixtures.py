@@ -1,52 +1,130 @@
+import asyncio
+import functools
+import httpx
+import json
+import math
+import os
+import multiprocessing
+import re
+import socket
+import threading
+import time
+import jwt
 import pytest
-from unittest.mock import patch, MagicMock
+import uvicorn
+from cryptography.hazmat.primitives.asymmetric import rsa
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch, MagicMock, AsyncMock
+
+def override_supabase(client=None, service_client=None, error=None):
+    """Point the get_supabase dependency at a mock pool handing out the given views."""
+    from .main import app
+    from .dependencies import get_supabase
+
+    pool = MagicMock()
+    pool.for_user.return_value = client
+    pool.service.return_value = service_client
+    if error is not None:
+        pool.for_user.side_effect = error
+    app.dependency_overrides[get_supabase] = lambda: pool
+    override_recipe_cache()
+    return pool
+
+def override_supabase_with_fake(fake):
+    """Point the get_supabase dependency at a real SupabaseClients talking to a FakePostgREST."""
+    from .main import app
+    from .dependencies import get_supabase
+    from .supabase_clients import SupabaseClients
+
+    pool = SupabaseClients(
+        url="http://fake-postgrest",
+        anon_key="anon-key",
+        service_role="service-key",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake))
+    )
+    app.dependency_overrides[get_supabase] = lambda: pool
+    override_recipe_cache()
+    return pool
+
+def override_recipe_cache(backend=None):
+    """Give each test a fresh recipe cache, ingredient index, read coalescer and rate limiter so per-user state never leaks between tests."""
+    from .main import app
+    from .dependencies import get_ingredient_index, get_rate_limiter, get_read_coalescer, get_recipe_cache
+    from .cache import InMemoryLRUCache, UserResponseCache
+    from .coalescing import SingleFlight
+    from .ingredient_index import IngredientIndexStore
+    from .rate_limit import InMemoryRateLimiter
+
+    cache = UserResponseCache(backend or InMemoryLRUCache(), "recipes")
+    indexes = IngredientIndexStore()
+    reads = SingleFlight()
+    limiter = InMemoryRateLimiter(rate=20, burst=40)
+    app.dependency_overrides[get_recipe_cache] = lambda: cache
+    app.dependency_overrides[get_ingredient_index] = lambda: indexes
+    app.dependency_overrides[get_read_coalescer] = lambda: reads
+    app.dependency_overrides[get_rate_limiter] = lambda: limiter
+    return cache
+
+def restore_supabase():
+    from .main import app
+    from .dependencies import get_ingredient_index, get_rate_limiter, get_read_coalescer, get_supabase, get_recipe_cache
+
+    app.dependency_overrides.pop(get_supabase, None)
+    app.dependency_overrides.pop(get_recipe_cache, None)
+    app.dependency_overrides.pop(get_ingredient_index, None)
+    app.dependency_overrides.pop(get_read_coalescer, None)
+    app.dependency_overrides.pop(get_rate_limiter, None)
 
 @pytest.fixture
 def mock_supabase_insert_recipe_success():
-    with patch('app.routers.recipes.create_client') as mock_create_client:
-        mock_client = MagicMock()
-        mock_client.table.return_value.insert.return_value.execute.return_value.data = {"id": 1}
-        mock_create_client.return_value = mock_client
-        yield mock_client
+    mock_client = MagicMock()
+    mock_client.table.return_value.insert.return_value.execute = AsyncMock(return_value=MagicMock(data={"id": 1}))
+    override_supabase(client=mock_client)
+    yield mock_client
+    restore_supabase()
         
 @pytest.fixture
-def mock_supabase_insert_user_success():
-    with patch('app.routers.users.service_client') as mock_service_client:
-        mock_service_client.table.return_value.insert.return_value.execute.return_value.data = {"id": 1}
-        yield mock_service_client
+def mock_supabase_upsert_user_success():
+    mock_service_client = MagicMock()
+    mock_service_client.table.return_value.upsert.return_value.execute = AsyncMock(return_value=MagicMock(data={"id": 1}))
+    override_supabase(service_client=mock_service_client)
+    yield mock_service_client
+    restore_supabase()
 
 @pytest.fixture
 def mock_supabase_failure():
-    with patch('app.routers.recipes.create_client') as mock_create_client:
-        mock_client = MagicMock()
-        mock_client.table.return_value.insert.return_value.execute.side_effect = Exception("Database error")
-        mock_create_client.return_value = mock_client
-        yield mock_client
+    mock_client = MagicMock()
+    mock_client.table.return_value.insert.return_value.execute = AsyncMock(side_effect=Exception("Database error"))
+    override_supabase(client=mock_client)
+    yield mock_client
+    restore_supabase()
     
 @pytest.fixture
 def mock_supabase_get_users_success():
-    with patch('app.routers.users.create_client') as mock_create_client:
-        mock_client = MagicMock()
-        mock_client.from_.return_value.select.return_value.execute.return_value.data = [
-            {"id": 1, "cognito_id": "user-123", "username": "testuser"},
-            {"id": 2, "cognito_id": "user-456", "username": "anotheruser"}
-        ]
-        mock_create_client.return_value = mock_client
-        yield mock_client
+    mock_client = MagicMock()
+    mock_client.from_.return_value.select.return_value.execute = AsyncMock(return_value=MagicMock(data=[
+        {"id": 1, "cognito_id": "user-123", "username": "testuser"},
+        {"id": 2, "cognito_id": "user-456", "username": "anotheruser"}
+    ]))
+    override_supabase(client=mock_client)
+    yield mock_client
+    restore_supabase()
 
 @pytest.fixture
 def mock_supabase_user_not_found():
-    with patch('app.routers.recipes.create_client') as mock_create_client:
-        mock_client = MagicMock()
-        mock_client.table.return_value.insert.return_value.execute.side_effect = Exception("Foreign key constraint violation: user_id not found")
-        mock_create_client.return_value = mock_client
-        yield mock_client
+    mock_client = MagicMock()
+    mock_client.table.return_value.insert.return_value.execute = AsyncMock(side_effect=Exception("Foreign key constraint violation: user_id not found"))
+    override_supabase(client=mock_client)
+    yield mock_client
+    restore_supabase()
         
 @pytest.fixture
 def mock_supabase_auth_error():
-    with patch('app.routers.recipes.create_client') as mock_create_client:
-        mock_create_client.side_effect = Exception("Invalid JWT token")
-        yield mock_create_client
+    pool = override_supabase(error=Exception("Invalid JWT token"))
+    yield pool.for_user
+    restore_supabase()
         
 @pytest.fixture        
 def mock_auth_dependency():
@@ -80,8 +158,569 @@ def mock_invalid_backend_secret():
 
 @pytest.fixture
 def mock_valid_backend_secret():
+    from dataclasses import replace
+    from .main import app
+    from .dependencies import app_settings
+    from .settings import get_settings
+
     test_secret = "test_example_secret_123"
-    with patch('app.routers.users.backend_secret', test_secret):
-        def _mock_valid_backend_secret():
-            return test_secret
-        yield _mock_valid_backend_secret
\ No newline at end of file
+    app.dependency_overrides[app_settings] = lambda: replace(get_settings(), backend_secret=test_secret)
+    def _mock_valid_backend_secret():
+        return test_secret
+    yield _mock_valid_backend_secret
+    app.dependency_overrides.pop(app_settings, None)
+
+class StubJWKSServer:
+    """Local stand-in for the Cognito JWKS endpoint that counts outbound fetches."""
+
+    def __init__(self, keys, delay: float = 0):
+        self.keys = keys
+        self.delay = delay
+        self.fail = False
+        self.fetch_count = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.fetch_count += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if stub.fail:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = json.dumps({"keys": stub.keys}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}/.well-known/jwks.json"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+TEST_REGION = "us-east-1"
+TEST_USER_POOL_ID = "us-east-1_testpool"
+TEST_AUDIENCE = "test-client-id"
+TEST_ISSUER = f"https://cognito-idp.{TEST_REGION}.amazonaws.com/{TEST_USER_POOL_ID}"
+
+_signing_keys = {}
+
+
+def signing_key(kid: str):
+    """Return a cached RSA private key for kid; generating keys is slow."""
+    if kid not in _signing_keys:
+        _signing_keys[kid] = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return _signing_keys[kid]
+
+
+def make_jwk(kid: str):
+    numbers = signing_key(kid).public_key().public_numbers()
+    to_b64 = lambda value: jwt.utils.base64url_encode(
+        value.to_bytes((value.bit_length() + 7) // 8, "big")).decode()
+    return {"kid": kid, "kty": "RSA", "alg": "RS256", "use": "sig", "n": to_b64(numbers.n), "e": to_b64(numbers.e)}
+
+
+def make_id_token(kid: str = "key-1", expires_in: int = 3600, **claims):
+    now = int(time.time())
+    payload = {
+        "sub": "test-user-123",
+        "email": "test@example.com",
+        "aud": TEST_AUDIENCE,
+        "iss": TEST_ISSUER,
+        "token_use": "id",
+        "iat": now,
+        "exp": now + expires_in,
+        **claims
+    }
+    return jwt.encode(payload, signing_key(kid), algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.fixture
+def stub_jwks_server():
+    server = StubJWKSServer(keys=[make_jwk("key-1"), make_jwk("key-2")])
+    yield server
+    server.close()
+
+
+class FakePostgREST:
+    """
+    In-memory ASGI stand-in for Supabase's PostgREST API (/rest/v1/<table>).
+
+    Supports the subset of the query syntax the routers use: column selection,
+    `eq`/`neq`/`lt`/`lte`/`gt`/`gte`/`in` filters, nested `or`/`and` groups,
+    `order`, `limit` and `offset`, upserts that ignore duplicates (`on_conflict`),
+    the unique columns in UNIQUE, plus the /rpc/ search functions.
+    `latency` injects a per-request delay; `clients` records distinct client
+    addresses so connection reuse can be observed.
+    """
+
+    UNIQUE = {"users": ("cognito_id", "username")}
+
+    def __init__(self, latency: float = 0):
+        self.latency = latency
+        self.tables = {"users": [], "recipes": []}
+        self.requests = 0
+        self.clients = set()
+        self._next_id = 1
+
+    def insert(self, table, rows):
+        created = []
+        for row in rows:
+            row = {"id": self._next_id, "created_at": f"2025-01-01T00:00:00.{self._next_id:06d}+00:00", **row}
+            self._next_id += 1
+            if table == "recipes":
+                row["sync_version"] = self._bump_sync_version(row.get("user_id"))
+            self.tables.setdefault(table, []).append(row)
+            created.append(row)
+        return created
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+
+        request = Request(scope, receive)
+        self.requests += 1
+        if scope.get("client"):
+            self.clients.add(tuple(scope["client"]))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        table = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+        if "/rpc/" in request.url.path:
+            response = await self._rpc(table, request)
+            await response(scope, receive, send)
+            return
+
+        rows = self.tables.setdefault(table, [])
+        params = list(request.query_params.multi_items())
+        matching = [row for row in rows if self._matches(row, params)]
+
+        if request.method == "GET":
+            response = JSONResponse(self._shape(matching, params))
+        elif request.method == "POST":
+            body = await request.json()
+            response = self._post(table, body if isinstance(body, list) else [body], request)
+        elif request.method == "DELETE":
+            self.tables[table] = [row for row in rows if row not in matching]
+            if table == "recipes":
+                for row in matching:
+                    self.tables.setdefault("recipe_tombstones", []).append(
+                        {"user_id": row.get("user_id"), "version": self._bump_sync_version(row.get("user_id")), "recipe_id": row["id"]}
+                    )
+            response = JSONResponse(matching)
+        else:
+            response = JSONResponse({"message": "method not supported"}, status_code=405)
+
+        await response(scope, receive, send)
+
+    def _post(self, table, rows, request):
+        conflict = request.query_params.get("on_conflict")
+        if conflict and "resolution=ignore-duplicates" in request.headers.get("prefer", ""):
+            seen = {row.get(conflict) for row in self.tables[table]}
+            fresh = []
+            for row in rows:
+                if row.get(conflict) not in seen:
+                    seen.add(row.get(conflict))
+                    fresh.append(row)
+            rows = fresh
+
+        for column in self.UNIQUE.get(table, ()):
+            values = [row.get(column) for row in self.tables[table] + rows if row.get(column) is not None]
+            if len(values) != len(set(values)):
+                return JSONResponse({
+                    "code": "23505",
+                    "message": f'duplicate key value violates unique constraint "{table}_{column}_key"',
+                    "details": None,
+                    "hint": None
+                }, status_code=409)
+        return JSONResponse(self.insert(table, rows), status_code=201)
+
+    async def _rpc(self, function, request):
+        args = dict(request.query_params) if request.method == "GET" else await request.json()
+        columns = args.pop("select", "*")
+        handler = {
+            "search_recipes": self._search_recipes,
+            "recipe_search_facets": self._search_facets,
+            "recipe_changes": self._recipe_changes
+        }.get(function)
+        if handler is None:
+            return JSONResponse({"message": f"function {function} not found"}, status_code=404)
+        result = handler(**args)
+        return JSONResponse(self._shape(result, [("select", columns)]) if isinstance(result, list) else result)
+
+    # Stand-ins for the triggers and recipe_changes() in migrations/003_recipes_sync.sql.
+    # Nothing here is scoped to a caller, so recipe_changes assumes a single user.
+    def _bump_sync_version(self, user_id):
+        states = self.tables.setdefault("recipe_sync_state", [])
+        state = next((state for state in states if state["user_id"] == user_id), None)
+        if state is None:
+            state = {"user_id": user_id, "version": 0, "pruned_version": 0}
+            states.append(state)
+        state["version"] += 1
+        return state["version"]
+
+    def _recipe_changes(self, since=None):
+        states = self.tables.get("recipe_sync_state") or [{"version": 0, "pruned_version": 0}]
+        version, pruned = states[0]["version"], states[0]["pruned_version"]
+        since = None if since is None else int(since)
+        full = since is None or since == 0 or since < pruned or since > version
+        recipes = [
+            {key: value for key, value in row.items() if key != "sync_version"}
+            for row in sorted(self.tables["recipes"], key=lambda row: (row["created_at"], row["id"]), reverse=True)
+            if full or row["sync_version"] > since
+        ]
+        deleted = [] if full else [
+            tombstone["recipe_id"] for tombstone in self.tables.get("recipe_tombstones", []) if tombstone["version"] > since
+        ]
+        return {"version": version, "full": full, "recipes": recipes, "deleted": deleted}
+
+    # Rough Python equivalents of the functions in migrations/002_recipes_search.sql:
+    # words match by prefix instead of by stem, which is enough for the tests.
+    @staticmethod
+    def _words(value):
+        return re.findall(r"[a-z0-9]+", str(value or "").lower())
+
+    def _rank(self, row, q):
+        if not q:
+            return 0
+        fields = (
+            (3, self._words(row.get("name"))),
+            (2, self._words(" ".join(str(i.get("name", "")) for i in row.get("ingredients") or []))),
+            (1, self._words(" ".join(str(p.get("text", "")) for p in row.get("preparation") or []))),
+        )
+        rank = 0
+        for term in self._words(q):
+            hits = sum(weight for weight, words in fields if any(word.startswith(term.rstrip("s")) for word in words))
+            if not hits:
+                return None
+            rank += hits
+        return rank
+
+    @staticmethod
+    def _minutes(row):
+        value = str((row.get("metadata") or {}).get("total_time", "")).strip()
+        return int(value) if value.isdigit() else None
+
+    def _search_filters(self, row, cuisine=None, recipe_type=None, min_time=None, max_time=None):
+        metadata = row.get("metadata") or {}
+        minutes = self._minutes(row)
+        return {
+            "cuisine": cuisine is None or metadata.get("cuisine") == cuisine,
+            "type": recipe_type is None or metadata.get("type") == recipe_type,
+            "total_time": (min_time is None or (minutes is not None and minutes >= int(min_time)))
+                and (max_time is None or (minutes is not None and minutes <= int(max_time))),
+        }
+
+    def _search_recipes(self, q=None, page_size=20, page_offset=0, **filters):
+        matches = []
+        for row in self.tables["recipes"]:
+            rank = self._rank(row, q)
+            if rank is not None and all(self._search_filters(row, **filters).values()):
+                matches.append((rank, row))
+        matches.sort(key=lambda match: (match[0], match[1]["created_at"], match[1]["id"]), reverse=True)
+        offset = int(page_offset)
+        return [row for _, row in matches[offset:offset + int(page_size)]]
+
+    def _search_facets(self, q=None, **filters):
+        facets = {"total": 0, "cuisine": {}, "type": {}, "total_time": {}}
+        for row in self.tables["recipes"]:
+            if self._rank(row, q) is None:
+                continue
+            passed = self._search_filters(row, **filters)
+            if all(passed.values()):
+                facets["total"] += 1
+            minutes = self._minutes(row)
+            bucket = None if minutes is None else "0-15" if minutes <= 15 else "16-30" if minutes <= 30 else "31-60" if minutes <= 60 else "61+"
+            values = {"cuisine": (row.get("metadata") or {}).get("cuisine"), "type": (row.get("metadata") or {}).get("type"), "total_time": bucket}
+            for facet, value in values.items():
+                others = all(ok for name, ok in passed.items() if name != facet)
+                if value is not None and others:
+                    facets[facet][value] = facets[facet].get(value, 0) + 1
+        return facets
+
+    @staticmethod
+    def _compare(value, op, raw):
+        raw = raw.strip('"')
+        if op == "in":
+            return str(value) in raw.strip("()").split(",")
+        if op in ("eq", "neq"):
+            return (str(value) == raw) == (op == "eq")
+        ops = {"lt": lambda a, b: a < b, "lte": lambda a, b: a <= b,
+               "gt": lambda a, b: a > b, "gte": lambda a, b: a >= b}
+        if isinstance(value, (int, float)):
+            raw = type(value)(raw)
+        return value is not None and ops[op](value, raw)
+
+    def _matches(self, row, params):
+        for column, expression in params:
+            if column in ("select", "order", "limit", "offset"):
+                continue
+            if column in ("or", "and"):
+                matched = self._logical(row, column, expression)
+            else:
+                op, _, raw = expression.partition(".")
+                matched = self._compare(row.get(column), op, raw)
+            if not matched:
+                return False
+        return True
+
+    def _logical(self, row, kind, expression):
+        results = [self._term(row, term) for term in self._split(expression[1:-1])]
+        return any(results) if kind == "or" else all(results)
+
+    def _term(self, row, term):
+        for kind in ("and", "or"):
+            if term.startswith(kind + "("):
+                return self._logical(row, kind, term[len(kind):])
+        column, _, expression = term.partition(".")
+        op, _, raw = expression.partition(".")
+        return self._compare(row.get(column), op, raw)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _split(expression):
+        terms, depth, quoted, current = [], 0, False, ""
+        for char in expression:
+            if char == '"':
+                quoted = not quoted
+            elif not quoted and char in "()":
+                depth += 1 if char == "(" else -1
+            elif not quoted and char == "," and depth == 0:
+                terms.append(current)
+                current = ""
+                continue
+            current += char
+        return tuple(terms + [current] if current else terms)
+
+    @staticmethod
+    def _shape(rows, params):
+        params = dict(params)
+        for term in reversed(params.get("order", "").split(",") if params.get("order") else []):
+            column, _, direction = term.partition(".")
+            rows = sorted(rows, key=lambda row: row.get(column), reverse=direction.startswith("desc"))
+        offset = int(params.get("offset", 0))
+        rows = rows[offset:offset + int(params["limit"])] if "limit" in params else rows[offset:]
+        columns = params.get("select", "*")
+        if columns != "*":
+            names = columns.split(",")
+            rows = [{name: row.get(name) for name in names} for row in rows]
+        return rows
+
+
+@pytest.fixture
+def fake_postgrest():
+    fake = FakePostgREST()
+    override_supabase_with_fake(fake)
+    yield fake
+    restore_supabase()
+
+
+class FakeRedis:
+    """In-memory stand-in for the subset of redis.asyncio.Redis that RedisCache and RedisRateLimiter use."""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+
+    async def get(self, key):
+        self.commands.append(("get", key))
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self.data[key]
+            return None
+        return value
+
+    async def set(self, key, value, px=None):
+        self.commands.append(("set", key))
+        self.data[key] = (value, time.monotonic() + px / 1000 if px else None)
+
+    async def delete(self, key):
+        self.commands.append(("delete", key))
+        self.data.pop(key, None)
+
+    async def eval(self, script, numkeys, *keys_and_args):
+        """
+        Runs the one Lua script the app uses, TOKEN_BUCKET_SCRIPT, through its Python
+        twin gcra(); the script itself is only exercised against a real server (redis_url).
+        """
+        from .rate_limit import TOKEN_BUCKET_SCRIPT, gcra
+
+        if script != TOKEN_BUCKET_SCRIPT:
+            raise NotImplementedError("FakeRedis only runs TOKEN_BUCKET_SCRIPT")
+        self.commands.append(("eval", keys_and_args[0]))
+        key, interval, burst = keys_and_args[0], float(keys_and_args[1]), int(keys_and_args[2])
+        now = time.time() * 1000
+        tat = await self.get(key)
+        allowed, new_tat, retry_after = gcra(float(tat) if tat is not None else None, now, interval, burst)
+        if not allowed:
+            return [0, math.ceil(retry_after)]
+        self.data[key] = (str(new_tat).encode(), time.monotonic() + (new_tat - now) / 1000)
+        return [1, 0]
+
+    async def aclose(self):
+        pass
+
+
+def serve_in_thread(asgi_app):
+    """Serve an ASGI app on a random local port; returns (base_url, stop)."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    config = uvicorn.Config(asgi_app, log_level="warning", lifespan="off", timeout_keep_alive=60)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+
+    return f"http://127.0.0.1:{sock.getsockname()[1]}", stop
+
+
+def _run_uvicorn(factory, sock):
+    uvicorn.Server(uvicorn.Config(factory(), log_level="warning", lifespan="off", timeout_keep_alive=60)).run(sockets=[sock])
+
+
+def serve_in_process(factory):
+    """
+    Serve factory() from a separate process so stand-in latency isn't skewed by the GIL
+    of the process under test; factory must be picklable. Returns (base_url, stop).
+    """
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(2048)
+    process = multiprocessing.get_context("fork").Process(target=_run_uvicorn, args=(factory, sock), daemon=True)
+    process.start()
+    url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    sock.close()
+
+    def stop():
+        process.terminate()
+        process.join()
+
+    return url, stop
+
+
+def seeded_fake_postgrest(latency: float = 0, recipes: int = 0, users: int = 0, user_id: str = "bench-user"):
+    """FakePostgREST pre-filled with recipes for user_id and some users; picklable via functools.partial."""
+    fake = FakePostgREST(latency=latency)
+    fake.insert("recipes", [{
+        "name": f"recipe {i}",
+        "user_id": user_id,
+        "ingredients": [{"name": f"ingredient {j}", "amount": "1 cup"} for j in range(8)],
+        "preparation": [{"text": f"Step {j}: stir, season and simmer until done."} for j in range(6)],
+        "metadata": {"total_time": f"{10 + i % 50} minutes", "type": "entree", "cuisine": "Italian"}
+    } for i in range(recipes)])
+    fake.insert("users", [{"cognito_id": f"user-{i}", "username": f"user{i}"} for i in range(users)])
+    return fake
+
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations")
+
+# The slice of Supabase's schema the migrations build on: the recipes table, and
+# row-level security keyed on the JWT `sub` for the `authenticated` role.
+SUPABASE_SCHEMA = """
+drop table if exists public.recipes, public.recipe_sync_state, public.recipe_tombstones cascade;
+create table public.recipes (
+    id bigint generated by default as identity primary key,
+    created_at timestamptz not null default now(),
+    user_id text not null,
+    name text,
+    ingredients jsonb,
+    preparation jsonb,
+    metadata jsonb
+);
+do $$ begin
+    if not exists (select from pg_roles where rolname = 'authenticated') then
+        create role authenticated nologin;
+    end if;
+end $$;
+grant usage on schema public to authenticated;
+grant select, insert, delete on public.recipes to authenticated;
+alter table public.recipes enable row level security;
+create policy recipes_owner on public.recipes to authenticated
+    using (user_id = (select current_setting('request.jwt.claims', true)::jsonb ->> 'sub'))
+    with check (user_id = (select current_setting('request.jwt.claims', true)::jsonb ->> 'sub'));
+"""
+
+
+def split_sql(text: str):
+    """Split a migration into statements, keeping $$-quoted function bodies intact."""
+    statements, current, quoted = [], [], False
+    for line in text.splitlines():
+        if not quoted and (not line.strip() or line.strip().startswith("--")):
+            continue
+        current.append(line)
+        if line.count("$$") % 2:
+            quoted = not quoted
+        if not quoted and line.rstrip().endswith(";"):
+            statements.append("\n".join(current))
+            current = []
+    return statements
+
+
+def apply_migrations(conn):
+    """
+    Run migrations/*.sql in order the way migrations/README.md says to: each file in
+    one transaction, except *.no_transaction.sql files (CREATE INDEX CONCURRENTLY).
+    conn must be in autocommit mode.
+    """
+    for name in sorted(os.listdir(MIGRATIONS_DIR)):
+        if not name.endswith(".sql"):
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+            statements = split_sql(f.read())
+        if name.endswith(".no_transaction.sql"):
+            for statement in statements:
+                conn.execute(statement)
+            continue
+        with conn.transaction():
+            for statement in statements:
+                conn.execute(statement)
+
+
+def act_as(conn, sub: str):
+    """Make conn behave like a PostgREST request from `sub`, so row-level security applies."""
+    conn.execute("set role authenticated")
+    conn.execute("select set_config('request.jwt.claims', %s, false)", (json.dumps({"sub": sub}),))
+
+
+@pytest.fixture
+def redis_url():
+    """URL of a Redis-compatible server with Lua scripting, from TEST_REDIS_URL; skipped when unset."""
+    url = os.getenv("TEST_REDIS_URL")
+    if not url:
+        pytest.skip("TEST_REDIS_URL is not set")
+    pytest.importorskip("redis")
+    return url
+
+
+@pytest.fixture
+def postgres_db():
+    """Fresh recipes schema plus migrations in the database at TEST_DATABASE_URL; skipped when unset."""
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    psycopg = pytest.importorskip("psycopg")
+
+    with psycopg.connect(url, autocommit=True) as conn:
+        conn.execute(SUPABASE_SCHEMA)
+        apply_migrations(conn)
+        yield conn
+        conn.execute("reset role")
@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException, status
+from loguru import logger
+from .cache import CacheBackend
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class IdempotencyKeys:
+    def __init__(self, backend: CacheBackend, namespace: str, ttl: float = 86400):
+        """
+        Remembers the response to each Idempotency-Key so retries replay it.
+
+        A retry with the same key and payload gets the first response back without
+        running the operation again; a concurrent retry in this worker waits for
+        the original instead of racing it. Reusing a key with a different payload
+        is a client error. Only successful responses are remembered, so a retry
+        after a failure runs the operation again.
+
+        Args:
+            backend: Storage backend (in-process LRU or shared Redis)
+            namespace: Key prefix, one per endpoint
+            ttl: Seconds a response is remembered
+        """
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self._in_flight: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+    async def run(self, key: str, payload: Any, operation: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Run `operation` once per key.
+
+        Returns:
+            (the response, whether it was replayed from an earlier request)
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Idempotency-Key")
+        fingerprint = request_fingerprint(payload)
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            _check(in_flight[0], fingerprint)
+            return await asyncio.shield(in_flight[1]), True
+
+        stored = await self._load(key)
+        if stored is not None:
+            _check(stored["fingerprint"], fingerprint)
+            return stored["response"], True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (fingerprint, future)
+        try:
+            response = await operation()
+        except BaseException as e:
+            del self._in_flight[key]
+            future.set_exception(e)
+            # Waiters re-raise it; nobody else has to retrieve it.
+            future.exception()
+            raise
+
+        future.set_result(response)
+        # Stay in flight until the record is stored, so a retry arriving meanwhile
+        # replays this response instead of finding neither and running again.
+        try:
+            await self._save(key, {"fingerprint": fingerprint, "response": response})
+        finally:
+            del self._in_flight[key]
+        return response, False
+
+    async def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = await self.backend.get(self._key(key))
+            return json.loads(raw) if raw is not None else None
+        except Exception as e:
+            logger.warning(f"Idempotency lookup failed, running the request: {type(e).__name__}: {e}")
+            return None
+
+    async def _save(self, key: str, record: Dict[str, Any]) -> None:
+        try:
+            await self.backend.set(self._key(key), json.dumps(record, separators=(",", ":")).encode(), self.ttl)
+        except Exception as e:
+            logger.warning(f"Idempotency store failed: {type(e).__name__}: {e}")
+
+    def _key(self, key: str) -> str:
+        return f"idem:{self.namespace}:{key}"
+
+
+def _check(expected: str, fingerprint: str) -> None:
+    if expected != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request"
+        )
@@ -0,0 +1,305 @@
+import heapq
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from loguru import logger
+
+# Rows per request when an index is built; Supabase caps PostgREST responses at 1000 by default.
+BUILD_PAGE_SIZE = 1000
+
+_WORD = re.compile(r"[^\W_]+")
+# Bit positions set in each byte value, for walking a bitmap's members.
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+def normalize_ingredient(name: Any) -> Optional[str]:
+    """
+    Canonical form ingredients are matched on: lowercase words with simple
+    plurals folded, so "Cherry Tomatoes," and "cherry tomato" are the same.
+    """
+    if not isinstance(name, str):
+        return None
+    return _normalize(name)
+
+
+# The same few thousand names recur across a user's recipes.
+@lru_cache(maxsize=16384)
+def _normalize(name: str) -> Optional[str]:
+    words = [_singular(word) for word in _WORD.findall(name.lower())]
+    return " ".join(words) or None
+
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("oes", "ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def recipe_ingredients(ingredients: Any) -> Set[str]:
+    """Normalized names from a recipe's `ingredients` JSON ([{"name": ...}, ...] or plain strings)."""
+    names = set()
+    for item in ingredients or []:
+        name = normalize_ingredient(item.get("name") if isinstance(item, dict) else item)
+        if name:
+            names.add(name)
+    return names
+
+
+def _bitmap_from_slots(slots: List[int]) -> int:
+    buffer = bytearray((max(slots) >> 3) + 1)
+    for slot in slots:
+        buffer[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def iter_slots(bitmap: int) -> Iterator[int]:
+    """Positions of the set bits of a non-negative bitmap, lowest first."""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) >> 3, "little")
+    for index, value in enumerate(data):
+        if value:
+            base = index << 3
+            for bit in _BYTE_BITS[value]:
+                yield base + bit
+
+
+@dataclass
+class IngredientMatch:
+    recipe_id: Any
+    coverage: float
+    matched: int
+    required: int
+    missing: List[str]
+
+
+class IngredientIndex:
+    def __init__(self, version: Optional[Any] = None):
+        """
+        Inverted index over one user's recipes: normalized ingredient -> bitmap of recipes.
+
+        Each recipe gets a slot (a bit position); postings and the per-size groups
+        are Python ints used as bitmaps, so scoring a pantry is a handful of
+        AND/OR/XOR operations over the whole collection instead of a scan of
+        every recipe's ingredients. Freed slots are reused, lowest first, to keep
+        the bitmaps short.
+
+        Args:
+            version: Version of the user's recipes the index was built at (see IngredientIndexStore)
+        """
+        self.version = version
+        self.built_at = time.monotonic()
+        self._postings: Dict[str, int] = {}
+        self._by_size: Dict[int, int] = {}
+        self._slots: Dict[Any, int] = {}
+        self._ids: List[Any] = []
+        self._names: List[frozenset] = []
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Index recipe rows ({"id", "ingredients"}); rows already indexed are replaced."""
+        postings: Dict[str, List[int]] = {}
+        sizes: Dict[int, List[int]] = {}
+        for row in rows:
+            self.remove([row["id"]])
+            names = recipe_ingredients(row.get("ingredients"))
+            if not names:
+                continue
+            slot = self._allocate(row["id"], names)
+            for name in names:
+                postings.setdefault(name, []).append(slot)
+            sizes.setdefault(len(names), []).append(slot)
+
+        # Set bits in bulk: one bitmap per ingredient rather than one big-int OR per recipe.
+        for name, slots in postings.items():
+            self._postings[name] = self._postings.get(name, 0) | _bitmap_from_slots(slots)
+        for size, slots in sizes.items():
+            self._by_size[size] = self._by_size.get(size, 0) | _bitmap_from_slots(slots)
+
+    def remove(self, recipe_ids: Iterable[Any]) -> None:
+        for recipe_id in recipe_ids:
+            slot = self._slots.pop(recipe_id, None)
+            if slot is None:
+                continue
+            names = self._names[slot]
+            mask = ~(1 << slot)
+            for name in names:
+                posting = self._postings[name] & mask
+                if posting:
+                    self._postings[name] = posting
+                else:
+                    del self._postings[name]
+            self._by_size[len(names)] &= mask
+            self._ids[slot] = None
+            self._names[slot] = frozenset()
+            heapq.heappush(self._free, slot)
+
+    def _allocate(self, recipe_id: Any, names: Set[str]) -> int:
+        if self._free:
+            slot = heapq.heappop(self._free)
+            self._ids[slot] = recipe_id
+            self._names[slot] = frozenset(names)
+        else:
+            slot = len(self._ids)
+            self._ids.append(recipe_id)
+            self._names.append(frozenset(names))
+        self._slots[recipe_id] = slot
+        return slot
+
+    def match(
+        self,
+        available: Iterable[str],
+        min_coverage: float = 0.0,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[IngredientMatch], int]:
+        """
+        Rank recipes by coverage: the fraction of their ingredients that are available.
+
+        Ties are broken by the number of matched ingredients, then newest (highest
+        id) first. Recipes sharing no ingredient with `available` are left out.
+
+        Returns:
+            (the requested page of matches, total number of matching recipes)
+        """
+        have = {name for name in map(normalize_ingredient, available) if name}
+        postings = [self._postings[name] for name in have if name in self._postings]
+        if not postings:
+            return [], 0
+
+        # Bit-sliced counter: bit i of each recipe's count of available ingredients
+        # lives in planes[i], so adding a posting is a ripple-carry over the planes.
+        planes: List[int] = []
+        for posting in postings:
+            carry = posting
+            for i, plane in enumerate(planes):
+                planes[i] = plane ^ carry
+                carry &= plane
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+        candidates = 0
+        for plane in planes:
+            candidates |= plane
+
+        # Every recipe in one (ingredient count, matched count) group has the same coverage.
+        groups = []
+        highest = (1 << len(planes)) - 1
+        for size, members in self._by_size.items():
+            members &= candidates
+            if not members:
+                continue
+            for count in range(min(size, highest), 0, -1):
+                if count / size < min_coverage:
+                    break
+                group = members
+                for i, plane in enumerate(planes):
+                    group &= plane if count >> i & 1 else ~plane
+                    if not group:
+                        break
+                if group:
+                    groups.append((count / size, count, size, group))
+        groups.sort(key=lambda group: (group[0], group[1]), reverse=True)
+
+        total = 0
+        page: List[IngredientMatch] = []
+        for coverage, count, size, group in groups:
+            members = group.bit_count()
+            total += members
+            if len(page) >= limit or offset >= members:
+                offset -= min(offset, members)
+                continue
+            ids = sorted((self._ids[slot] for slot in iter_slots(group)), reverse=True)
+            for recipe_id in ids[offset:offset + limit - len(page)]:
+                names = self._names[self._slots[recipe_id]]
+                page.append(IngredientMatch(recipe_id, coverage, count, size, sorted(names - have)))
+            offset = 0
+        return page, total
+
+
+class IngredientIndexStore:
+    def __init__(self, maxsize: int = 256, ttl: float = 300, database_versions: bool = False):
+        """
+        Per-worker LRU of users' ingredient indexes.
+
+        An index is only served while its version matches the user's current
+        version, so a write through any worker makes every other worker rebuild.
+        Versions come from the recipe cache (its per-user token), or, with
+        `database_versions`, from the per-user sync version every write bumps
+        in the database (migrations/003): one single-row lookup per query, for
+        deployments with several workers and no shared cache. Writes through
+        this worker patch the index in place when the cache hands out the new
+        version; database versions aren't known to the writer, so those writes
+        drop the index instead. `ttl` bounds how long an index lives either way.
+
+        Args:
+            maxsize: Users whose indexes are kept
+            ttl: Seconds an index may be served before it is rebuilt
+            database_versions: Version indexes by RecipeStore.sync_version() instead of the recipe cache
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.database_versions = database_versions
+        self._indexes: "OrderedDict[str, IngredientIndex]" = OrderedDict()
+
+    async def current_version(self, user_id: str, store, recipe_cache=None) -> Optional[Any]:
+        """The version of the user's recipes an index must have been built at to be served."""
+        if self.database_versions:
+            return await store.sync_version()
+        if recipe_cache is not None:
+            return await recipe_cache.current_version(user_id)
+        return None
+
+    def get(self, user_id: str, version: Optional[Any]) -> Optional[IngredientIndex]:
+        index = self._indexes.get(user_id)
+        if index is None:
+            return None
+        if index.version != version or time.monotonic() - index.built_at >= self.ttl:
+            del self._indexes[user_id]
+            return None
+        self._indexes.move_to_end(user_id)
+        return index
+
+    def put(self, user_id: str, index: IngredientIndex) -> None:
+        self._indexes[user_id] = index
+        self._indexes.move_to_end(user_id)
+        while len(self._indexes) > self.maxsize:
+            self._indexes.popitem(last=False)
+
+    def update(
+        self,
+        user_id: str,
+        version: Optional[bytes],
+        added: Iterable[Dict[str, Any]] = (),
+        removed: Iterable[Any] = ()
+    ) -> None:
+        """Apply a write made through this worker to the user's index, if one is loaded."""
+        index = self._indexes.get(user_id)
+        if index is None:
+            return
+        if self.database_versions or (version is None and index.version is not None):
+            # The new version isn't known here; drop the index rather than guess.
+            del self._indexes[user_id]
+            return
+        index.remove(removed)
+        index.add(added)
+        index.version = version
+
+
+async def build_ingredient_index(store, version: Optional[Any] = None) -> IngredientIndex:
+    """Load a user's recipes (id and ingredients only) from their RecipeStore and index them."""
+    start = time.perf_counter()
+    index = IngredientIndex(version)
+    async for rows in store.pages("id,created_at,ingredients", page_size=BUILD_PAGE_SIZE):
+        index.add(rows)
+    logger.info(f"✅ Built ingredient index over {len(index)} recipes in {(time.perf_counter() - start) * 1000:.1f}ms")
+    return index
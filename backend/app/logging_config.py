@@ -1,35 +1,211 @@
+import atexit
 import os
+import queue
 import sys
+import threading
+from typing import Dict, Optional, TextIO
+import orjson
 from loguru import logger
+from .settings import Settings, get_settings
+
+
+class LevelSampler:
+    def __init__(self, rates: Dict[str, float]):
+        """
+        Loguru filter keeping a fixed fraction of records per level, e.g. {"INFO": 0.1}.
+
+        Sampling is deterministic (every 1/rate-th record) so low rates still let a
+        steady trickle through; levels without a rate are always kept.
+        """
+        self.rates = rates
+        self._credit = {level: 0.0 for level in rates}
+
+    @classmethod
+    def parse(cls, spec: str) -> "LevelSampler":
+        """Build a sampler from "INFO=0.1,DEBUG=0.01"."""
+        rates = {}
+        for part in filter(None, (part.strip() for part in spec.split(","))):
+            level, _, rate = part.partition("=")
+            rates[level.strip().upper()] = float(rate)
+        return cls(rates)
+
+    def __call__(self, record) -> bool:
+        level = record["level"].name
+        rate = self.rates.get(level)
+        if rate is None or rate >= 1:
+            return True
+
+        self._credit[level] += rate
+        if self._credit[level] < 1:
+            return False
+        self._credit[level] -= 1
+        return True
+
+
+class BackgroundJSONSink:
+    def __init__(self, stream: TextIO, max_queue: int = 10000, batch_size: int = 256):
+        """
+        Loguru sink writing one JSON object per line from a background thread.
+
+        The calling thread only snapshots the record onto a bounded queue; encoding
+        and I/O happen on the writer thread. When the queue is full records are
+        dropped and counted instead of blocking the request that logged them.
+        """
+        self.stream = stream
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.written = 0
+        self._reported_drops = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def __call__(self, message) -> None:
+        record = message.record
+        entry = {
+            "time": record["time"],
+            "level": record["level"].name,
+            "message": record["message"],
+            "logger": record["name"],
+            "function": record["function"],
+            "line": record["line"],
+        }
+        if record["extra"]:
+            entry["extra"] = record["extra"]
+        if record["exception"] is not None:
+            entry["exception"] = repr(record["exception"].value)
+
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": self._queue.qsize(), "dropped": self.dropped, "written": self.written}
+
+    def stop(self, timeout: float = 5) -> None:
+        """Flush queued records and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = batch[-1] is None
+            records = [entry for entry in batch if entry is not None]
+            self._write(records)
+            if stopping:
+                return
+
+    def _write(self, records) -> None:
+        if self.dropped > self._reported_drops:
+            records.append({"level": "WARNING", "message": f"Log queue full, dropped {self.dropped - self._reported_drops} records"})
+            self._reported_drops = self.dropped
+
+        if not records:
+            return
+
+        lines = b"\n".join(orjson.dumps(entry, default=str) for entry in records) + b"\n"
+        try:
+            self.stream.write(lines.decode())
+            self.stream.flush()
+            self.written += len(records)
+        except Exception as e:
+            sys.__stderr__.write(f"Log writer failed: {e}\n")
+
+
+sink: Optional[BackgroundJSONSink] = None
+# LOG_FILE as opened for the JSON sink; closed when logging is set up again.
+log_stream: Optional[TextIO] = None
+
+
+def setup_logging(
+    log_format: Optional[str] = None,
+    level: Optional[str] = None,
+    sample: Optional[str] = None,
+    stream: Optional[TextIO] = None,
+    log_file: Optional[str] = None,
+    settings: Optional[Settings] = None
+):
+    """
+    Setup logging; arguments left out come from `settings` (LOG_FORMAT, LOG_LEVEL,
+    LOG_SAMPLE, LOG_FILE, LOG_QUEUE_SIZE), read from the environment when not given.
+    Called from the app lifespan with the app's settings, not on import.
+
+    "text" (default) keeps colorized console output plus logs/app.log. "json" is the
+    high-throughput mode: structured records written by a bounded background
+    writer to stderr, or to LOG_FILE when set. LOG_SAMPLE (e.g. "INFO=0.1") thins
+    out chatty levels in either mode.
+    """
+    global sink, log_stream
+
+    settings = settings or get_settings()
+    log_format = (log_format or settings.log_format).lower()
+    level = (level or settings.log_level).upper()
+    sample = sample if sample is not None else settings.log_sample
+    log_file = log_file or settings.log_file
 
-def setup_logging():
-    """Setup simple logging configuration with one log file."""
-    
     # Remove default handlers first
     logger.remove()
-    
+    if sink is not None:
+        sink.stop()
+        sink = None
+    if log_stream is not None:
+        log_stream.close()
+        log_stream = None
+
+    if log_format == "json":
+        if stream is None and log_file:
+            os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+            stream = log_stream = open(log_file, "a", buffering=1)
+        sink = BackgroundJSONSink(stream or sys.stderr, max_queue=settings.log_queue_size)
+        logger.add(sink, level=level, filter=LevelSampler.parse(sample), format="{message}")
+        return
+
     # Add console handler
     logger.add(
-        sys.stderr,
-        level="INFO",
+        stream or sys.stderr,
+        level=level,
+        filter=LevelSampler.parse(sample),
         format="{time} | {level} | {message}",
-        colorize=True
+        colorize=stream is None
     )
-    
+
+    if stream is not None:
+        return
+
+    log_file = log_file or "logs/app.log"
     # Create logs directory if it doesn't exist
-    os.makedirs("logs", exist_ok=True)
-    
+    os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+
     # Add single file handler for all logs
     logger.add(
-        "logs/app.log",
+        log_file,
+        level=level,
+        filter=LevelSampler.parse(sample),
         rotation="1 day",
         retention="1 days",
         colorize=False,
         format="{time} | {level} | {message}",
         enqueue=True
     )
-    
+
     print("✅ Logging configuration initialized")
 
-# Initialize logging when module is imported
-setup_logging()
+
+def logging_stats() -> Dict[str, int]:
+    """Queue depth and drop counters of the background JSON writer (zeros in text mode)."""
+    return sink.stats() if sink is not None else {"queued": 0, "dropped": 0, "written": 0}
+
+
+@atexit.register
+def _flush():
+    if sink is not None:
+        sink.stop()
@@ -1,37 +1,154 @@
-from typing import List
-from fastapi import FastAPI, HTTPException, status, Header, Request
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from supabase import create_client, Client
-from dotenv import load_dotenv
-from .models.models import User, Recipe
+from fastapi.responses import JSONResponse, Response
+from loguru import logger
 from .routers import users, recipes
-from . import logging_config 
-import os
-
-load_dotenv()
-
-url = os.getenv("PROJ_URL")
-anon_key = os.getenv("ANON_KEY")
-supabase: Client = create_client(supabase_key=anon_key, supabase_url=url)
-
-app = FastAPI()
-app.include_router(users.router)
-app.include_router(recipes.router)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  
-    allow_credentials=True,
-    allow_methods=["*"],  
-    allow_headers=["*"], 
+from .dependencies import (
+    create_authenticator, create_compressor, create_database, create_ingredient_index, create_jwks_fetcher,
+    create_rate_limiter, create_read_coalescer, create_recipe_cache, create_supabase_clients,
+    create_user_idempotency, create_user_writer
 )
+from .admission import AdmissionMiddleware
+from .compression import CompressionMiddleware
+from .pagination import NEXT_CURSOR_HEADER
+from .metrics import MetricsMiddleware, REGISTRY, CONTENT_TYPE
+from .profiling import ProfilingMiddleware
+from .settings import Settings, get_settings
+from .logging_config import setup_logging
+
+WARMUP_TIMEOUT = 10
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings: Settings = app.state.settings
+    setup_logging(settings=settings)
+
+    state = app.state
+    state.supabase = create_supabase_clients(settings)
+    if settings.data_backend == "postgres":
+        state.database = create_database(settings)
+    state.recipe_cache = create_recipe_cache(settings)
+    state.ingredient_index = create_ingredient_index(settings)
+    state.read_coalescer = create_read_coalescer(settings)
+    state.rate_limiter = create_rate_limiter(settings)
+    state.user_idempotency = create_user_idempotency(settings)
+    state.user_writer = create_user_writer(settings, state.supabase)
+    state.jwks_fetcher = create_jwks_fetcher(settings)
+    state.authenticate = create_authenticator(settings, state.jwks_fetcher)
+    if settings.startup_warmup:
+        await warm_up(app)
+
+    yield
+
+    if state.user_writer is not None:
+        await state.user_writer.aclose()
+    await state.supabase.aclose()
+    if settings.data_backend == "postgres":
+        await state.database.aclose()
+    if state.recipe_cache is not None:
+        await state.recipe_cache.backend.aclose()
+    if state.user_idempotency is not None:
+        await state.user_idempotency.backend.aclose()
+    if state.rate_limiter is not None:
+        await state.rate_limiter.aclose()
+    await state.jwks_fetcher.aclose()
+
+
+async def warm_up(app: FastAPI) -> None:
+    """
+    Prefetch the JWKS and open PostgREST (or Postgres) connections before the first request.
+
+    Failures are logged and ignored: the app still serves, paying the same cost
+    lazily on the first requests instead.
+    """
+    state = app.state
+    connections = state.settings.warmup_connections
+    tasks = {
+        "JWKS prefetch": state.jwks_fetcher.prefetch(),
+        "PostgREST warm-up": state.supabase.warm_up(connections),
+    }
+    if state.settings.data_backend == "postgres":
+        tasks["Postgres warm-up"] = state.database.warm_up(connections)
+    results = await asyncio.gather(
+        *(asyncio.wait_for(task, WARMUP_TIMEOUT) for task in tasks.values()),
+        return_exceptions=True
+    )
+    for name, result in zip(tasks, results):
+        if isinstance(result, BaseException):
+            logger.warning(f"{name} failed: {type(result).__name__}: {result}")
+        else:
+            logger.info(f"✅ {name} done")
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Build the app. Nothing is connected here; clients, caches and logging are set
+    up by the lifespan so importing this module stays cheap and side-effect free.
+    """
+    settings = settings or get_settings()
+    if settings.workers > 1 and settings.recipe_cache_backend == "memory":
+        # Each worker would only see its own invalidations and keep serving stale listings.
+        raise ValueError(
+            f"RECIPE_CACHE_BACKEND=memory is per process and can't be used with {settings.workers} workers; "
+            "use redis, or none"
+        )
+    if settings.profiling_enabled and not settings.profile_header_secret:
+        # Otherwise anyone could make the server profile (and write files for) any request.
+        raise ValueError("PROFILING_ENABLED needs PROFILE_HEADER_SECRET set")
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.settings = settings
+    app.include_router(users.router)
+    app.include_router(recipes.router)
+    if settings.admission_max_in_flight > 0:
+        # Inside CORS, so browsers can read a shed request's Retry-After.
+        app.add_middleware(
+            AdmissionMiddleware,
+            max_in_flight=settings.admission_max_in_flight,
+            max_queue=settings.admission_max_queue,
+            queue_timeout=settings.admission_queue_timeout,
+            retry_after=settings.admission_retry_after
+        )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  
+        allow_credentials=True,
+        allow_methods=["*"],  
+        allow_headers=["*"], 
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Retry-After"],
+    )
+    # Built here rather than in the lifespan: the middleware needs it, and routes
+    # use the same one to serve cached entries precompressed.
+    app.state.compressor = create_compressor(settings)
+    if app.state.compressor is not None:
+        app.add_middleware(CompressionMiddleware, compressor=app.state.compressor)
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+    if settings.profiling_enabled:
+        app.add_middleware(
+            ProfilingMiddleware,
+            directory=settings.profile_dir,
+            mode=settings.profile_mode,
+            sample_rate=settings.profile_sample_rate,
+            header_secret=settings.profile_header_secret
+        )
+
+    app.add_exception_handler(HTTPException, http_exception_handler)
+    app.add_api_route("/", read_root, methods=["GET"])
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
+    return app
+
 
-@app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
         headers={
+            **(exc.headers or {}),
             "Access-Control-Allow-Origin": "*",
             "Access-Control-Allow-Credentials": "true",
             "Access-Control-Allow-Methods": "*",
@@ -39,10 +156,15 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         }
     )
 
-@app.get("/")
 async def read_root():
     return {"Hello": "there"}
 
+async def metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+app = create_app()
+
 
 # @app.get("/users/{user_id}/bricks", response_model=List[Bricks])
 # def get_user_bricks(user_id: int):
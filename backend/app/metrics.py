@@ -0,0 +1,230 @@
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Sequence, Tuple
+
+# Prometheus client defaults, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: "Registry" = None):
+        """
+        Minimal Prometheus metric keyed by a tuple of label values.
+
+        Label values are passed positionally in labelnames order so the hot path is a
+        dict lookup under a lock, with no per-call allocation beyond the key tuple.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _labels(self, values: Tuple[str, ...]) -> str:
+        if not values:
+            return ""
+        pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values))
+        return "{" + pairs + "}"
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Exposition lines for the current values, one per label set (and bucket)."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{self._labels(labels)} {value}" for labels, value in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def time(self, *labels: str) -> "_Timer":
+        """Context manager observing the duration of its block."""
+        return _Timer(self, labels)
+
+    def count(self, *labels: str) -> int:
+        state = self._values.get(labels)
+        return sum(state[0]) if state else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+
+        lines = []
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{self._bucket_labels(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {total}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {cumulative}")
+        return lines
+
+    def _bucket_labels(self, labels: Tuple[str, ...], le: str) -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+        return "{" + ",".join(pairs + [f'le="{le}"']) + "}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        """
+        Pure ASGI middleware recording in-flight requests and latency per route.
+
+        Routes are labelled by their template (e.g. /recipes/) rather than the raw
+        path so label cardinality stays bounded; unmatched paths share one label.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                getattr(route, "path", "<unmatched>"),
+                status
+            )
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY = Registry()
+
+REQUESTS_IN_FLIGHT = Gauge("hasha_http_requests_in_flight", "HTTP requests currently being served")
+REQUEST_DURATION = Histogram(
+    "hasha_http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+AUTH_STAGE_DURATION = Histogram(
+    "hasha_auth_stage_duration_seconds", "Time spent in each token validation stage",
+    ["stage"], buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+AUTH_TOKEN_CACHE = Counter("hasha_auth_token_cache_total", "Verified token cache lookups", ["result"])
+JWKS_CACHE = Counter("hasha_jwks_cache_lookups_total", "JWKS public key lookups", ["result"])
+JWKS_FETCH_DURATION = Histogram("hasha_jwks_fetch_duration_seconds", "JWKS fetches from Cognito", ["outcome"])
+SUPABASE_CLIENT_DURATION = Histogram(
+    "hasha_supabase_client_duration_seconds", "Time to build a per-request PostgREST client", ["role"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005)
+)
+DB_REQUEST_DURATION = Histogram(
+    "hasha_db_request_duration_seconds", "PostgREST round-trips until response headers",
+    ["method", "table", "status"]
+)
+SQL_TRANSACTION_DURATION = Histogram(
+    "hasha_sql_transaction_duration_seconds", "Direct Postgres transactions (DATA_BACKEND=postgres)",
+    ["operation", "outcome"]
+)
+USER_WRITE_DURATION = Histogram("hasha_user_write_duration_seconds", "Batched user provisioning writes", ["outcome"])
+USER_WRITE_BATCH_ROWS = Histogram(
+    "hasha_user_write_batch_rows", "Users per batched provisioning write",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250)
+)
+READ_COALESCING = Counter("hasha_read_coalescing_total", "Coalescable reads that fetched vs. shared another's fetch", ["route", "result"])
+ADMISSION = Counter("hasha_admission_total", "Admission control decisions", ["outcome"])
+ADMISSION_QUEUE_WAIT = Histogram("hasha_admission_queue_wait_seconds", "Time requests waited for a slot", ["outcome"])
+RATE_LIMITED = Counter("hasha_rate_limited_total", "Requests refused by the per-user rate limit")
+RESPONSE_BYTES = Counter("hasha_response_body_bytes_total", "Response body bytes sent, by Content-Encoding", ["encoding"])
+COMPRESSION_DURATION = Histogram(
+    "hasha_compression_duration_seconds", "Time spent compressing response bodies", ["encoding"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
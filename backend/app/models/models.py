@@ -1,31 +1,151 @@
 from sqlmodel import Field, SQLModel, Relationship
 from sqlalchemy import Column
 from sqlalchemy.dialects.postgresql import JSONB
+from pydantic import TypeAdapter
 import datetime
 from typing import List, Optional, Dict, Any
 
 
-class User(SQLModel, table=True):
+class UserBase(SQLModel):
+    cognito_id: Optional[str] = Field(default=None, unique=True)
+    username: str = Field(unique=True)
+
+
+class User(UserBase, table=True):
     __tablename__ = "users"
     __table_args__ = {'extend_existing': True}
-    
+
     id: int = Field(primary_key=True)
-    cognito_id: Optional[str] = Field(default=None, unique=True)
-    username: str = Field(unique=True)
     created_at: datetime.datetime
-    
+
     recipe: List["Recipe"] = Relationship(back_populates="user")
-    
-class Recipe(SQLModel, table=True):
+
+
+class UserRead(UserBase):
+    id: int
+    created_at: Optional[datetime.datetime] = None
+
+
+class RecipeBase(SQLModel):
+    name: Optional[str] = Field(default=None, nullable=True)
+    ingredients: Optional[List[Dict[str, Any]]] = Field(default=None, sa_column=Column(JSONB))
+    preparation: Optional[List[Dict[str, Any]]] = Field(default=None, sa_column=Column(JSONB))
+    recipe_metadata: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column("metadata", JSONB), alias="metadata")
+
+
+class Recipe(RecipeBase, table=True):
     __tablename__ = "recipes"
     __table_args__ = {'extend_existing': True}
-    
+
     id: int = Field(primary_key=True)
     user_id: str = Field(foreign_key="users.cognito_id")
-    recipe_name: str = Field(nullable=True)
-    ingredients: List[Dict[str, Any]] = Field(sa_column=Column(JSONB))
-    preparation: List[Dict[str, Any]] = Field(sa_column=Column(JSONB))
-    recipe_metadata: Dict[str, Any] = Field(sa_column=Column(JSONB), alias="metadata")
     created_at: datetime.datetime = Field()
-    
-    user: Optional["User"] = Relationship(back_populates="recipe")
\ No newline at end of file
+
+    user: Optional["User"] = Relationship(back_populates="recipe")
+
+
+class RecipeRead(RecipeBase):
+    # Only the keyset columns are guaranteed; `fields=` projections leave the rest unset.
+    id: int
+    created_at: datetime.datetime
+    user_id: Optional[str] = None
+
+
+class RecipeCreate(SQLModel):
+    name: str
+    preparation: List[Dict[str, Any]]
+    ingredients: List[Dict[str, Any]]
+    total_time: str = Field(alias="totalTime")
+    type: str
+    cuisine: str
+
+    def to_row(self, user_id: str) -> Dict[str, Any]:
+        """Map the client payload onto a recipes table row."""
+        return {
+            "name": self.name,
+            "preparation": self.preparation,
+            "ingredients": self.ingredients,
+            "user_id": user_id,
+            "metadata": {
+                "total_time": self.total_time,
+                "type": self.type,
+                "cuisine": self.cuisine
+            }
+        }
+
+
+class RecipeDelete(SQLModel):
+    id: int
+
+
+class BulkRecipeCreate(SQLModel):
+    # Items are validated one by one so a bad recipe doesn't reject the whole batch.
+    recipes: List[Dict[str, Any]] = Field(min_length=1)
+
+
+class BulkRecipeDelete(SQLModel):
+    ids: List[Any] = Field(min_length=1)
+
+
+class StatusResponse(SQLModel):
+    status: str
+
+
+class BulkItemResult(SQLModel):
+    status: str
+    index: Optional[int] = None
+    id: Optional[Any] = None
+    detail: Optional[str] = None
+
+
+class BulkResponse(SQLModel):
+    status: str
+    results: List[BulkItemResult]
+
+
+class RecipeFacets(SQLModel):
+    # Counts per value; each facet ignores its own filter (see migrations/002_recipes_search.sql).
+    total: int
+    cuisine: Dict[str, int]
+    type: Dict[str, int]
+    total_time: Dict[str, int]
+
+
+class RecipeSearchResponse(SQLModel):
+    results: List[RecipeRead]
+    facets: Optional[RecipeFacets] = None
+    next_offset: Optional[int] = None
+
+
+class RecipeSync(SQLModel):
+    # `recipes` were written and `deleted` ids removed after the requested version;
+    # with `full` the client should replace everything it holds with `recipes`.
+    version: int
+    full: bool
+    recipes: List[RecipeRead]
+    deleted: List[int]
+
+
+class PantryQuery(SQLModel):
+    ingredients: List[str] = Field(min_length=1, max_length=500)
+    min_coverage: float = Field(default=0, ge=0, le=1)
+
+
+class CookableRecipe(SQLModel):
+    recipe: RecipeRead
+    # Fraction of the recipe's ingredients on hand; `missing` are normalized names.
+    coverage: float
+    matched: int
+    required: int
+    missing: List[str]
+
+
+class CookableResponse(SQLModel):
+    results: List[CookableRecipe]
+    total: int
+    next_offset: Optional[int] = None
+
+
+# Compiled once so list responses validate and serialize straight to bytes in pydantic-core.
+RecipeList = TypeAdapter(List[RecipeRead])
+UserList = TypeAdapter(List[UserRead])
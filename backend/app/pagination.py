@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+
+# Columns the API exposes. Listed explicitly rather than selecting "*" so internal
+# columns such as the search document never travel to the client.
+RECIPE_COLUMN_LIST = ["id", "created_at", "user_id", "name", "ingredients", "preparation", "metadata"]
+RECIPE_COLUMNS = set(RECIPE_COLUMN_LIST)
+# Keyset pagination needs the sort key on every row, so these are always selected.
+KEYSET_COLUMNS = ["created_at", "id"]
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    payload = json.dumps([row["created_at"], row["id"]], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    (created_at, id) from a client-supplied cursor.
+
+    Both are parsed rather than passed through: the values end up in PostgREST
+    filter strings, where a crafted cursor could otherwise add clauses of its own.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(created_at, str) or isinstance(row_id, bool) or not isinstance(row_id, int):
+            raise ValueError("cursor values have the wrong types")
+        return datetime.fromisoformat(created_at), row_id
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def select_columns(fields: Optional[str], allowed=RECIPE_COLUMNS) -> str:
+    """
+    Validate a comma-separated `fields=` projection and turn it into a select list.
+
+    Returns every exposed column when no projection is requested.
+    """
+    if not fields:
+        return ",".join(RECIPE_COLUMN_LIST)
+
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+
+    columns = KEYSET_COLUMNS + [field for field in requested if field not in KEYSET_COLUMNS]
+    return ",".join(columns)
+
+
+def keyset_page(query, cursor: Optional[str], limit: Optional[int]):
+    """
+    Apply newest-first keyset pagination over (created_at, id) to a PostgREST query.
+
+    Fetches one extra row so the caller can tell whether another page exists.
+    """
+    query = query.order("created_at", desc=True).order("id", desc=True)
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        created_at = created_at.isoformat()
+        query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})')
+
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    return query
+
+
+def split_page(rows: List[Dict[str, Any]], limit: Optional[int]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim the look-ahead row from a keyset page and return (rows, next_cursor)."""
+    if limit is None or len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1])
@@ -0,0 +1,192 @@
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import anyio
+import jwt
+from loguru import logger
+
+PROFILE_HEADER = b"x-profile"
+
+
+class StackSampler:
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        """
+        Wall-clock sampling profiler for one thread, exported in speedscope's format.
+
+        A background thread snapshots the target thread's stack every `interval`
+        seconds, so overhead is bounded by the sampling rate rather than by how many
+        calls the request makes.
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames: List[Dict] = []
+        self.samples: List[List[int]] = []
+        self.weights: List[float] = []
+        self._frame_index: Dict[Tuple, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is not None:
+                self.samples.append(self._stack(frame))
+                self.weights.append((now - last) * 1000)
+            last = now
+
+    def _stack(self, frame) -> List[int]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_qualname, code.co_filename, code.co_firstlineno)
+            index = self._frame_index.get(key)
+            if index is None:
+                index = self._frame_index[key] = len(self.frames)
+                self.frames.append({"name": key[0], "file": key[1], "line": key[2]})
+            stack.append(index)
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def speedscope(self, name: str) -> Dict:
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": self.frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(self.weights),
+                "samples": self.samples,
+                "weights": self.weights
+            }],
+            "name": name,
+            "activeProfileIndex": 0,
+            "exporter": "hasha"
+        }
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app,
+        directory: str = "profiles",
+        mode: str = "cprofile",
+        sample_rate: float = 0.0,
+        header_secret: Optional[str] = None,
+        interval: float = 0.001
+    ):
+        """
+        Opt-in per-request profiler, only installed when PROFILING_ENABLED is set.
+
+        A request is profiled when it sends an X-Profile header equal to
+        header_secret or when it falls within sample_rate.
+        "cprofile" mode writes a deterministic .pstats file; "sample" mode writes a
+        wall-clock .speedscope.json. File names carry the route, a hash of the
+        caller's user id and the elapsed time.
+
+        Both profilers watch the event loop thread, so other requests interleaved on
+        the loop show up too, and work handed to the threadpool does not. Only one
+        request is profiled at a time.
+
+        Args:
+            app: ASGI app to wrap
+            directory: Where profile files are written
+            mode: "cprofile" or "sample"
+            sample_rate: Fraction of requests profiled without the header
+            header_secret: Required X-Profile value; the header is ignored when unset
+            interval: Seconds between stack samples in "sample" mode
+        """
+        if mode not in ("cprofile", "sample"):
+            raise ValueError(f"Unknown profiling mode: {mode}")
+
+        self.app = app
+        self.directory = directory
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.header_secret = header_secret.encode() if header_secret else None
+        self.interval = interval
+        self._busy = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._busy or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        start = time.perf_counter()
+        if self.mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = StackSampler(threading.get_ident(), self.interval)
+            profiler.start()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if self.mode == "cprofile":
+                profiler.disable()
+            else:
+                profiler.stop()
+            self._busy = False
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            try:
+                path = await anyio.to_thread.run_sync(self._write, profiler, scope, elapsed_ms)
+                logger.info(f"Profile written to {path}")
+            except Exception as e:
+                logger.error(f"❌ Failed to write profile: {e}")
+
+    def _wanted(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER and self.header_secret is not None:
+                return hmac.compare_digest(value, self.header_secret)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _write(self, profiler, scope, elapsed_ms: float) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        route = getattr(scope.get("route"), "path", scope["path"])
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}_{scope['method']}_{slug}_{_user_hash(scope)}_{elapsed_ms:.0f}ms"
+
+        if self.mode == "cprofile":
+            path = os.path.join(self.directory, name + ".pstats")
+            profiler.dump_stats(path)
+        else:
+            path = os.path.join(self.directory, name + ".speedscope.json")
+            with open(path, "w") as f:
+                json.dump(profiler.speedscope(f"{scope['method']} {route}"), f)
+        return path
+
+
+def _user_hash(scope) -> str:
+    """Short hash of the caller's `sub` claim; the token is only decoded, not verified."""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            try:
+                token = value.decode().removeprefix("Bearer ")
+                sub = jwt.decode(token, options={"verify_signature": False}).get("sub")
+            except Exception:
+                break
+            if sub:
+                return hashlib.sha256(sub.encode()).hexdigest()[:12]
+    return "anonymous"
@@ -0,0 +1,120 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+from loguru import logger
+
+
+def gcra(tat: Optional[float], now: float, interval: float, burst: int) -> Tuple[bool, float, float]:
+    """
+    One token-bucket decision in GCRA form, where the bucket is a single timestamp.
+
+    `tat` is the theoretical arrival time: when the bucket would be full again.
+    A request is allowed while tat stays within `burst` intervals of now.
+
+    Returns:
+        (allowed, new tat to store, seconds to wait before retrying when refused)
+    """
+    tat = max(tat or now, now)
+    new_tat = tat + interval
+    allow_at = new_tat - interval * burst
+    if allow_at > now:
+        return False, tat, allow_at - now
+    return True, new_tat, 0.0
+
+
+class RateLimiter(ABC):
+    """
+    Token buckets per key (a Cognito sub): `rate` requests per second sustained,
+    up to `burst` at once after a quiet period.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.interval = 1 / rate
+
+    @abstractmethod
+    async def hit(self, key: str) -> Tuple[bool, float]:
+        """Take a token for `key`. Returns (allowed, seconds until one is available if not)."""
+
+    async def aclose(self) -> None:
+        """Release connections; nothing to do for in-process limiters."""
+
+
+class InMemoryRateLimiter(RateLimiter):
+    def __init__(self, rate: float, burst: int, maxsize: int = 10000):
+        """Per-worker buckets; with N workers a user effectively gets N times the rate."""
+        super().__init__(rate, burst)
+        self.maxsize = maxsize
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+
+    async def hit(self, key: str) -> Tuple[bool, float]:
+        now = time.monotonic()
+        allowed, tat, retry_after = gcra(self._tats.get(key), now, self.interval, self.burst)
+        self._tats[key] = tat
+        self._tats.move_to_end(key)
+        # A bucket idle for burst * interval is full again, so dropping the oldest loses nothing in practice.
+        while len(self._tats) > self.maxsize:
+            self._tats.popitem(last=False)
+        return allowed, retry_after
+
+
+# gcra() run atomically in Redis (or any server speaking its protocol and Lua
+# scripting), against the server's clock so every worker agrees on "now".
+# KEYS[1] = bucket, ARGV = interval ms, burst. Returns {allowed, retry after ms}.
+TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = now_parts[1] * 1000 + now_parts[2] / 1000
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+local allow_at = new_tat - interval * burst
+if allow_at > now then
+    return {0, math.ceil(allow_at - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now))
+return {1, 0}
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    def __init__(self, client, rate: float, burst: int, prefix: str = "ratelimit"):
+        """
+        Buckets shared by every worker through a redis.asyncio-compatible client.
+
+        If Redis is unreachable, requests are allowed (and a warning logged): the
+        limiter protects capacity, it must not take the API down with it.
+        """
+        super().__init__(rate, burst)
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, rate: float, burst: int) -> "RedisRateLimiter":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RedisRateLimiter requires the 'redis' package (pip install redis)")
+        return cls(redis.from_url(url), rate, burst)
+
+    async def hit(self, key: str) -> Tuple[bool, float]:
+        try:
+            allowed, retry_after_ms = await self.client.eval(
+                TOKEN_BUCKET_SCRIPT, 1, f"{self.prefix}:{key}", self.interval * 1000, self.burst
+            )
+        except Exception as e:
+            logger.warning(f"Rate limiter unavailable, allowing request: {type(e).__name__}: {e}")
+            return True, 0.0
+        return bool(allowed), int(retry_after_ms) / 1000
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def retry_after_header(seconds: float) -> str:
+    """Retry-After takes whole seconds; round up so clients never retry too early."""
+    return str(max(1, math.ceil(seconds)))
@@ -0,0 +1,114 @@
+from abc import ABC, abstractmethod
+from functools import cached_property
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+from .pagination import keyset_page
+from .streaming import keyset_pages
+
+Row = Dict[str, Any]
+
+
+class RecipeStore(ABC):
+    """
+    Data access for the recipe routes, scoped to one caller.
+
+    Implementations run every query as the caller so row-level security applies.
+    `columns` arguments are comma-separated select lists from select_columns().
+    """
+
+    @abstractmethod
+    async def list_page(self, columns: str, cursor: Optional[str], limit: Optional[int]) -> List[Row]:
+        """Newest-first keyset page, including the look-ahead row (see split_page)."""
+
+    @abstractmethod
+    def pages(self, columns: str, page_size: int, cursor: Optional[str] = None) -> AsyncIterator[List[Row]]:
+        """Every recipe from `cursor` on, one keyset page at a time."""
+
+    @abstractmethod
+    async def get_many(self, ids: List[Any], columns: str) -> List[Row]:
+        """The caller's recipes with these ids, in no particular order."""
+
+    @abstractmethod
+    async def search(self, filters: Dict[str, Any], columns: str, page_size: int, page_offset: int) -> List[Row]:
+        """One page of search_recipes() matches for the q/cuisine/recipe_type/min_time/max_time filters."""
+
+    @abstractmethod
+    async def search_facets(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+        """recipe_search_facets() counts for the same filters."""
+
+    @abstractmethod
+    async def sync_version(self) -> int:
+        """The caller's current sync version (0 before their first write)."""
+
+    @abstractmethod
+    async def changes(self, since: Optional[int]) -> Dict[str, Any]:
+        """recipe_changes(since): what changed after `since`, or everything."""
+
+    @abstractmethod
+    async def insert(self, rows: Union[Row, List[Row]]) -> List[Row]:
+        """Insert a row or a list of rows and return them as stored."""
+
+    @abstractmethod
+    async def delete(self, ids: List[Any]) -> List[Row]:
+        """Delete the caller's recipes with these ids and return the deleted rows."""
+
+
+class PostgRESTRecipeStore(RecipeStore):
+    def __init__(self, supabase, token: str, user_id: Optional[str] = None):
+        """
+        RecipeStore over Supabase's PostgREST API.
+
+        The caller's client is only created on first use, so a rejected token
+        fails inside the route's own error handling like any other query.
+
+        Args:
+            supabase: SupabaseClients pool
+            token: The caller's JWT
+            user_id: The caller's sub, used where a query also filters on it
+        """
+        self.supabase = supabase
+        self.token = token
+        self.user_id = user_id
+
+    @cached_property
+    def client(self):
+        return self.supabase.for_user(self.token)
+
+    async def list_page(self, columns: str, cursor: Optional[str], limit: Optional[int]) -> List[Row]:
+        result = await keyset_page(self.client.from_("recipes").select(columns), cursor, limit).execute()
+        return result.data or []
+
+    def pages(self, columns: str, page_size: int, cursor: Optional[str] = None) -> AsyncIterator[List[Row]]:
+        return keyset_pages(lambda: self.client.from_("recipes").select(columns), page_size, cursor)
+
+    async def get_many(self, ids: List[Any], columns: str) -> List[Row]:
+        result = await self.client.from_("recipes").select(columns).in_("id", ids).execute()
+        return result.data or []
+
+    async def search(self, filters: Dict[str, Any], columns: str, page_size: int, page_offset: int) -> List[Row]:
+        # Read-only GET call, so it can be cached and retried like any other GET.
+        params = {**filters, "page_size": page_size, "page_offset": page_offset}
+        result = await self.client.rpc("search_recipes", params, get=True).select(columns).execute()
+        return result.data or []
+
+    async def search_facets(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+        result = await self.client.rpc("recipe_search_facets", filters, get=True).execute()
+        return result.data
+
+    async def sync_version(self) -> int:
+        result = await self.client.from_("recipe_sync_state").select("version").eq("user_id", self.user_id).execute()
+        return result.data[0]["version"] if result.data else 0
+
+    async def changes(self, since: Optional[int]) -> Dict[str, Any]:
+        result = await self.client.rpc("recipe_changes", {"since": since} if since is not None else {}, get=True).execute()
+        return result.data
+
+    async def insert(self, rows: Union[Row, List[Row]]) -> List[Row]:
+        result = await self.client.table("recipes").insert(rows).execute()
+        return result.data or []
+
+    async def delete(self, ids: List[Any]) -> List[Row]:
+        query = self.client.table("recipes").delete()
+        if self.user_id is not None:
+            query = query.eq("user_id", self.user_id)
+        result = await query.in_("id", ids).execute()
+        return result.data or []
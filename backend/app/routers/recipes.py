@@ -1,23 +1,119 @@
-from fastapi import APIRouter, HTTPException, status, Request, Depends
-from supabase import create_client, ClientOptions
-from ..dependencies import auth_dependency
-from ..auth.auth import extract_token
-from dotenv import load_dotenv
+import asyncio
+from fastapi import APIRouter, HTTPException, status, Request, Depends, Query
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import ValidationError
+from typing import Any, Dict, Iterator, List, Optional
+from ..models.models import (
+    BulkRecipeCreate, BulkRecipeDelete, BulkResponse, CookableResponse, PantryQuery, RecipeCreate,
+    RecipeDelete, RecipeList, RecipeRead, RecipeSearchResponse, RecipeSync, StatusResponse
+)
+from ..dependencies import (
+    app_settings, auth_dependency, get_compressor, get_ingredient_index, get_read_coalescer, get_recipe_cache, get_recipe_store, rate_limit
+)
+from ..recipe_store import RecipeStore
+from ..cache import CachedResponse, UserResponseCache, cached_json_response, etag_matches, serve_cached
+from ..coalescing import SingleFlight, coalesced
+from ..compression import Compressor
+from ..ingredient_index import IngredientIndexStore, build_ingredient_index
+from ..pagination import select_columns, split_page, NEXT_CURSOR_HEADER
+from ..streaming import stream_rows, wants_ndjson
+from ..settings import Settings
 from loguru import logger
-import os
 
 router = APIRouter(
-    prefix="/recipes"
+    prefix="/recipes",
+    default_response_class=ORJSONResponse,
+    dependencies=[Depends(rate_limit)]
 )
 
-load_dotenv()
-url = os.getenv("PROJ_URL")
-anon_key = os.getenv("ANON_KEY")
 
 
-@router.get("/")
-async def get_user_recipes(user=Depends(auth_dependency), token=Depends(extract_token)):
+def page_limit(default: Optional[int]):
+    """A `limit` query parameter capped at the app's RECIPES_MAX_PAGE_SIZE."""
+    def limit_param(
+        limit: Optional[int] = Query(default, ge=1),
+        settings: Settings = Depends(app_settings)
+    ) -> Optional[int]:
+        if limit is not None and limit > settings.recipes_max_page_size:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"limit must be at most {settings.recipes_max_page_size}"
+            )
+        return limit
+    return limit_param
+
+
+def chunked(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def bulk_summary(results: List[Dict[str, Any]], ok: str) -> Dict[str, Any]:
+    succeeded = sum(1 for result in results if result["status"] == ok)
+    if succeeded == len(results):
+        overall = "success"
+    elif succeeded:
+        overall = "partial"
+    else:
+        overall = "error"
+    return {"status": overall, "results": results}
+
+
+def validation_detail(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+
+
+def sync_etag(since: Optional[int], version: int) -> str:
+    # The delta for a given `since` only changes when the version does.
+    return f'W/"recipes-{"all" if since is None else since}-{version}"'
+
+
+async def recipes_changed(
+    user_id: str,
+    recipe_cache: Optional[UserResponseCache],
+    ingredient_index: Optional[IngredientIndexStore],
+    reads: Optional[SingleFlight] = None,
+    added: List[Dict[str, Any]] = (),
+    removed: List[Any] = ()
+) -> None:
+    """Drop the user's cached and coalesced responses and patch their ingredient index with the rows written."""
+    if reads is not None:
+        reads.forget(user_id)
+    version = await recipe_cache.invalidate(user_id) if recipe_cache is not None else None
+    if ingredient_index is not None:
+        ingredient_index.update(user_id, version, added=added, removed=removed)
+
+
+@router.get("/", response_model=List[RecipeRead])
+async def get_user_recipes(
+    request: Request,
+    limit: Optional[int] = Depends(page_limit(None)),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    stream: bool = False,
+    settings: Settings = Depends(app_settings),
+    user=Depends(auth_dependency),
+    store: RecipeStore = Depends(get_recipe_store),
+    recipe_cache: Optional[UserResponseCache] = Depends(get_recipe_cache),
+    reads: Optional[SingleFlight] = Depends(get_read_coalescer),
+    compressor: Optional[Compressor] = Depends(get_compressor)
+):
+    """
+    List the caller's recipes, newest first.
+
+    Without `limit` every recipe is returned. With `limit`, a page is returned and
+    the cursor for the next one is sent in the X-Next-Cursor header. `fields`
+    projects a comma-separated subset of columns (e.g. id,name,created_at,metadata).
+    With `stream=true` or `Accept: application/x-ndjson` the listing is streamed
+    page by page instead of being built in memory.
+
+    Non-streamed responses are cached per user until they create or delete a
+    recipe, and carry an ETag so clients can revalidate with If-None-Match.
+    Compressed bodies are cached alongside, one per encoding clients ask for.
+    Identical concurrent requests from the same user share one query.
+    """
     logger.info("=== GET /recipes endpoint called ===")
+    columns = select_columns(fields)
     
     try:
         user_id = user.get("sub")
@@ -29,21 +125,31 @@ async def get_user_recipes(user=Depends(auth_dependency), token=Depends(extract_
             )
         
         logger.info(f"user sub is found as {user_id}")
-        client = create_client(
-            supabase_key=anon_key, 
-            supabase_url=url, 
-            options=ClientOptions(headers={"Authorization": f"Bearer {token}"})
-        )
-        logger.info("✅ Supabase client created")
-        
-        response = client.from_("recipes").select("*").execute()
+
+        if stream or wants_ndjson(request):
+            pages = store.pages(columns, page_size=settings.stream_page_size, cursor=cursor)
+            return await stream_rows(request, pages, RecipeList)
         
-        if response.data is None:
-            logger.info(f"No recipes found for user {user_id}")
-            return []
-            
-        logger.info(f"✅ Found {len(response.data)} recipes for user {user_id}")
-        return response.data
+        variant = f"{columns}|{limit}|{cursor}"
+        cached, version = await serve_cached(request, recipe_cache, user_id, variant, compressor)
+        if cached is not None:
+            logger.info(f"✅ Serving cached recipes for user {user_id}")
+            return cached
+
+        async def fetch():
+            rows, next_cursor = split_page(await store.list_page(columns, cursor, limit), limit)
+            recipes = RecipeList.validate_python(rows)
+            body = RecipeList.dump_json(recipes, by_alias=True, exclude_unset=True)
+            entry = CachedResponse.build(body, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None)
+            if compressor is not None:
+                compressor.precompress(entry, request.headers.get("accept-encoding"))
+            if recipe_cache is not None:
+                await recipe_cache.store(user_id, variant, version, entry)
+            logger.info(f"✅ Found {len(recipes)} recipes for user {user_id}")
+            return entry
+
+        entry = await coalesced(reads, user_id, ("recipes", version, variant), fetch, "/recipes/")
+        return cached_json_response(request, entry, compressor=compressor)
         
     except HTTPException:
         raise
@@ -56,11 +162,225 @@ async def get_user_recipes(user=Depends(auth_dependency), token=Depends(extract_
         )
         
 
-@router.post("/create-recipe")
-async def create_recipe(request: Request, user = Depends(auth_dependency), token = Depends(extract_token)):
+@router.get("/search", response_model=RecipeSearchResponse, response_model_exclude_none=True)
+async def search_recipes(
+    request: Request,
+    q: Optional[str] = Query(None, max_length=200),
+    cuisine: Optional[str] = None,
+    recipe_type: Optional[str] = Query(None, alias="type"),
+    min_time: Optional[int] = Query(None, ge=0),
+    max_time: Optional[int] = Query(None, ge=0),
+    limit: int = Depends(page_limit(20)),
+    offset: int = Query(0, ge=0),
+    fields: Optional[str] = None,
+    facets: bool = True,
+    user=Depends(auth_dependency),
+    store: RecipeStore = Depends(get_recipe_store),
+    recipe_cache: Optional[UserResponseCache] = Depends(get_recipe_cache),
+    reads: Optional[SingleFlight] = Depends(get_read_coalescer),
+    compressor: Optional[Compressor] = Depends(get_compressor)
+):
+    """
+    Search the caller's recipes in the database.
+
+    `q` is matched against name, ingredient names and preparation steps (web search
+    syntax: quoted phrases, `or`, `-exclude`); `cuisine`, `type` and
+    `min_time`/`max_time` (minutes) filter on the recipe metadata. Results are
+    ranked by text match, then newest first, and paged with `limit`/`offset`.
+    `facets` adds per-value counts for cuisine, type and total time.
+
+    Responses share the per-user cache, ETags and request coalescing of GET /recipes/.
+    """
+    logger.info("=== GET /recipes/search endpoint called ===")
+    columns = select_columns(fields)
+
+    user_id = user.get("sub")
+    if not user_id:
+        logger.error("❌ No user_id found in token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid user token"
+        )
+
+    filters = {
+        "q": (q or "").strip() or None,
+        "cuisine": cuisine,
+        "recipe_type": recipe_type,
+        "min_time": min_time,
+        "max_time": max_time
+    }
+    filters = {name: value for name, value in filters.items() if value is not None}
+
+    try:
+        variant = f"search|{columns}|{sorted(filters.items())}|{limit}|{offset}|{facets}"
+        cached, version = await serve_cached(request, recipe_cache, user_id, variant, compressor)
+        if cached is not None:
+            logger.info(f"✅ Serving cached search for user {user_id}")
+            return cached
+
+        async def fetch():
+            # One extra row tells whether another page exists.
+            page = store.search(filters, columns, limit + 1, offset)
+            if facets:
+                results, counts = await asyncio.gather(page, store.search_facets(filters))
+            else:
+                results, counts = await page, None
+
+            response = {"results": results[:limit]}
+            if counts is not None:
+                response["facets"] = counts
+            if len(results) > limit:
+                response["next_offset"] = offset + limit
+
+            body = RecipeSearchResponse.model_validate(response).model_dump_json(by_alias=True, exclude_unset=True).encode()
+            entry = CachedResponse.build(body)
+            if compressor is not None:
+                compressor.precompress(entry, request.headers.get("accept-encoding"))
+            if recipe_cache is not None:
+                await recipe_cache.store(user_id, variant, version, entry)
+            logger.info(f"✅ Search returned {len(response['results'])} recipes for user {user_id}")
+            return entry
+
+        entry = await coalesced(reads, user_id, ("recipes", version, variant), fetch, "/recipes/search")
+        return cached_json_response(request, entry, compressor=compressor)
+
+    except Exception as e:
+        logger.error(f"❌ Error searching recipes: {str(e)}")
+        logger.error(f"Error type: {type(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search recipes: {str(e)}"
+        )
+
+
+@router.get("/sync", response_model=RecipeSync)
+async def sync_recipes(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0),
+    user=Depends(auth_dependency),
+    store: RecipeStore = Depends(get_recipe_store)
+):
+    """
+    Changes to the caller's recipes since the version they last synced.
+
+    Returns {"version", "full", "recipes", "deleted"}: recipes written and ids of
+    recipes deleted after `since`. Without `since`, or when it is too old to
+    diff against, every recipe is returned with "full": true. Clients keep
+    `version` and pass it as `since` next time.
+
+    Every write bumps a per-user version in the database (migrations/003), so an
+    unchanged collection costs one single-row lookup: a 304 when the ETag matches,
+    or an empty delta when `since` is already current.
+    """
+    logger.info("=== GET /recipes/sync endpoint called ===")
+
+    user_id = user.get("sub")
+    if not user_id:
+        logger.error("❌ No user_id found in token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid user token"
+        )
+
+    try:
+        version = await store.sync_version()
+
+        etag = sync_etag(since, version)
+        if etag_matches(request, etag):
+            logger.info(f"✅ Recipes unchanged at version {version} for user {user_id}")
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+        if since is not None and since == version:
+            changes = {"version": version, "full": False, "recipes": [], "deleted": []}
+        else:
+            changes = await store.changes(since)
+
+        sync = RecipeSync.model_validate(changes)
+        body = sync.model_dump_json(by_alias=True, exclude_unset=True).encode()
+        logger.info(f"✅ Synced {len(sync.recipes)} recipes and {len(sync.deleted)} deletions for user {user_id} at version {sync.version}")
+        return cached_json_response(request, CachedResponse(body=body, etag=sync_etag(since, sync.version)))
+
+    except Exception as e:
+        logger.error(f"❌ Error syncing recipes: {str(e)}")
+        logger.error(f"Error type: {type(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to sync recipes: {str(e)}"
+        )
+
+
+@router.post("/what-can-i-cook", response_model=CookableResponse, response_model_exclude_none=True)
+async def what_can_i_cook(
+    pantry: PantryQuery,
+    limit: int = Depends(page_limit(20)),
+    offset: int = Query(0, ge=0),
+    fields: Optional[str] = None,
+    user=Depends(auth_dependency),
+    store: RecipeStore = Depends(get_recipe_store),
+    recipe_cache: Optional[UserResponseCache] = Depends(get_recipe_cache),
+    ingredient_index: IngredientIndexStore = Depends(get_ingredient_index)
+):
+    """
+    Rank the caller's recipes by how much of each they can cook with what they have.
+
+    Takes {"ingredients": [...], "min_coverage": 0.5} and returns recipes ordered by
+    coverage (the fraction of their ingredients that are available), with the
+    ingredients still missing. Ingredient names are matched case-insensitively
+    with simple plurals folded. Scoring runs against a per-user inverted index
+    that is built on first use and rebuilt when the user's recipes change
+    (see create_ingredient_index for how workers notice each other's writes).
+    """
+    logger.info("=== POST /recipes/what-can-i-cook endpoint called ===")
+    columns = select_columns(fields)
+
+    user_id = user.get("sub")
+    if not user_id:
+        logger.error("❌ No user_id found in token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid user token"
+        )
+
+    try:
+        version = await ingredient_index.current_version(user_id, store, recipe_cache)
+        index = ingredient_index.get(user_id, version)
+        if index is None:
+            index = await build_ingredient_index(store, version)
+            ingredient_index.put(user_id, index)
+
+        matches, total = index.match(pantry.ingredients, pantry.min_coverage, limit, offset)
+        rows = {}
+        if matches:
+            rows = {row["id"]: row for row in await store.get_many([match.recipe_id for match in matches], columns)}
+
+        # A recipe deleted through another worker may still be indexed here; skip it.
+        response = {
+            "results": [
+                {"recipe": rows[match.recipe_id], "coverage": match.coverage, "matched": match.matched,
+                 "required": match.required, "missing": match.missing}
+                for match in matches if match.recipe_id in rows
+            ],
+            "total": total
+        }
+        if offset + len(matches) < total:
+            response["next_offset"] = offset + len(matches)
+
+        logger.info(f"✅ {total} recipes cookable for user {user_id}")
+        return response
+
+    except Exception as e:
+        logger.error(f"❌ Error matching recipes: {str(e)}")
+        logger.error(f"Error type: {type(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to match recipes: {str(e)}"
+        )
+
+
+@router.post("/create-recipe", response_model=StatusResponse)
+async def create_recipe(recipe: RecipeCreate, user = Depends(auth_dependency), store: RecipeStore = Depends(get_recipe_store), recipe_cache: Optional[UserResponseCache] = Depends(get_recipe_cache), ingredient_index: IngredientIndexStore = Depends(get_ingredient_index), reads: Optional[SingleFlight] = Depends(get_read_coalescer)):
     logger.info("=== POST /create-recipe endpoint called ===")
     
-    body = await request.json()    
     user_id = user.get("sub")
     if not user_id:
         logger.error("❌ No user_id found in token")
@@ -71,22 +391,10 @@ async def create_recipe(request: Request, user = Depends(auth_dependency), token
     
     
     try: 
-        client = create_client(supabase_key=anon_key, supabase_url=url, options=ClientOptions(headers={"Authorization": f"Bearer {token}"}))
-        logger.info("✅ Supabase client created")
+        recipe_data = recipe.to_row(user_id)
         
-        recipe_data = {
-            "name": body["name"],
-            "preparation": body["preparation"],
-            "ingredients": body["ingredients"],
-            "user_id": user_id,
-            "metadata": {
-                "total_time": body["totalTime"],
-                "type": body["type"], 
-                "cuisine": body["cuisine"]
-            }
-        }
-        
-        client.table("recipes").insert(recipe_data).execute()
+        created = await store.insert(recipe_data)
+        await recipes_changed(user_id, recipe_cache, ingredient_index, reads, added=created)
         logger.info(f"✅ Recipe created successfully")
         logger.info(f"✅ Data received successfully")
         return {"status": "success"}
@@ -96,11 +404,10 @@ async def create_recipe(request: Request, user = Depends(auth_dependency), token
         logger.error(f"Error type: {type(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create recipe in database: {str(e)}")
     
-@router.delete("/delete-recipe")
-async def delete_recipe(request: Request, user = Depends(auth_dependency), token = Depends(extract_token)):
+@router.delete("/delete-recipe", response_model=StatusResponse)
+async def delete_recipe(recipe: RecipeDelete, user = Depends(auth_dependency), store: RecipeStore = Depends(get_recipe_store), recipe_cache: Optional[UserResponseCache] = Depends(get_recipe_cache), ingredient_index: IngredientIndexStore = Depends(get_ingredient_index), reads: Optional[SingleFlight] = Depends(get_read_coalescer)):
     logger.info("=== POST /create-recipe endpoint called ===")
     
-    body = await request.json()    
     user_id = user.get("sub")
     if not user_id:
         logger.error("❌ No user_id found in token")
@@ -110,13 +417,109 @@ async def delete_recipe(request: Request, user = Depends(auth_dependency), token
         )
         
     try: 
-        client = create_client(supabase_key=anon_key, supabase_url=url, options=ClientOptions(headers={"Authorization": f"Bearer {token}"}))
-        logger.info("✅ Supabase client created")
-        response = client.table("recipes").delete().eq("id", body["id"]).execute()
+        deleted = await store.delete([recipe.id])
+        await recipes_changed(user_id, recipe_cache, ingredient_index, reads, removed=[row["id"] for row in deleted])
         logger.info(f"✅ Recipe deleted successfully")
         return {"status": "success"}
     
     except Exception as e:
         logger.error(f"❌ Error deleting the recipe: {str(e)}")
         logger.error(f"Error type: {type(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to delete recipe in database: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to delete recipe in database: {str(e)}")
+
+
+@router.post("/bulk-create", response_model=BulkResponse, response_model_exclude_none=True)
+async def bulk_create_recipes(batch: BulkRecipeCreate, settings: Settings = Depends(app_settings), user = Depends(auth_dependency), store: RecipeStore = Depends(get_recipe_store), recipe_cache: Optional[UserResponseCache] = Depends(get_recipe_cache), ingredient_index: IngredientIndexStore = Depends(get_ingredient_index), reads: Optional[SingleFlight] = Depends(get_read_coalescer)):
+    """
+    Create many recipes from {"recipes": [...]} with one token check and one
+    multi-row INSERT per RECIPES_BULK_CHUNK_SIZE recipes.
+
+    Returns a result per input recipe, in order. Invalid recipes are skipped and
+    a failed chunk only fails the recipes in that chunk.
+    """
+    logger.info("=== POST /recipes/bulk-create endpoint called ===")
+
+    items = batch.recipes
+    user_id = user.get("sub")
+    if not user_id:
+        logger.error("❌ No user_id found in token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid user token"
+        )
+
+    results: List[Dict[str, Any]] = [{"index": index} for index in range(len(items))]
+    pending = []
+    for index, item in enumerate(items):
+        try:
+            pending.append((index, RecipeCreate.model_validate(item).to_row(user_id)))
+        except ValidationError as e:
+            results[index].update(status="error", detail=f"Invalid recipe: {validation_detail(e)}")
+
+    created = []
+    for chunk in chunked(pending, settings.recipes_bulk_chunk_size):
+        try:
+            rows = await store.insert([row for _, row in chunk])
+            for position, (index, _) in enumerate(chunk):
+                if position < len(rows):
+                    results[index].update(status="created", id=rows[position].get("id"))
+                else:
+                    # The store answered with fewer rows than it was sent; don't report these as created.
+                    results[index].update(status="error", detail="Failed to create recipe in database: no row returned")
+            created.extend(rows)
+        except Exception as e:
+            logger.error(f"❌ Error saving recipe chunk of {len(chunk)}: {str(e)}")
+            for index, _ in chunk:
+                results[index].update(status="error", detail=f"Failed to create recipe in database: {str(e)}")
+
+    if created:
+        await recipes_changed(user_id, recipe_cache, ingredient_index, reads, added=created)
+
+    logger.info(f"✅ Bulk created {len(created)}/{len(items)} recipes")
+    return bulk_summary(results, "created")
+
+
+@router.delete("/bulk-delete", response_model=BulkResponse, response_model_exclude_none=True)
+async def bulk_delete_recipes(batch: BulkRecipeDelete, settings: Settings = Depends(app_settings), user = Depends(auth_dependency), store: RecipeStore = Depends(get_recipe_store), recipe_cache: Optional[UserResponseCache] = Depends(get_recipe_cache), ingredient_index: IngredientIndexStore = Depends(get_ingredient_index), reads: Optional[SingleFlight] = Depends(get_read_coalescer)):
+    """
+    Delete many recipes from {"ids": [...]} with one `id=in.(...)` DELETE per
+    RECIPES_BULK_CHUNK_SIZE ids.
+
+    Ids that match none of the caller's recipes are reported as not_found.
+    """
+    logger.info("=== DELETE /recipes/bulk-delete endpoint called ===")
+
+    items = batch.ids
+    user_id = user.get("sub")
+    if not user_id:
+        logger.error("❌ No user_id found in token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid user token"
+        )
+
+    results: Dict[int, Dict[str, Any]] = {}
+    invalid = []
+    for item in items:
+        if isinstance(item, bool) or not isinstance(item, int):
+            invalid.append({"id": item, "status": "error", "detail": "Recipe ids must be integers"})
+        elif item not in results:
+            results[item] = {"id": item, "status": "not_found"}
+    ids = list(results)
+
+    deleted = []
+    for chunk in chunked(ids, settings.recipes_bulk_chunk_size):
+        try:
+            for row in await store.delete(chunk):
+                results[row["id"]]["status"] = "deleted"
+                deleted.append(row["id"])
+        except Exception as e:
+            logger.error(f"❌ Error deleting recipe chunk of {len(chunk)}: {str(e)}")
+            for recipe_id in chunk:
+                results[recipe_id].update(status="error", detail=f"Failed to delete recipe in database: {str(e)}")
+
+    if deleted:
+        await recipes_changed(user_id, recipe_cache, ingredient_index, reads, removed=deleted)
+
+    logger.info(f"✅ Bulk deleted {len(deleted)}/{len(ids)} recipes")
+    return bulk_summary(list(results.values()) + invalid, "deleted")
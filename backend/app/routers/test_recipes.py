@@ -1,9 +1,20 @@
 from ..test_main import client
 from unittest.mock import patch, MagicMock
 from ..main import app
-from ..dependencies import auth_dependency
+from ..dependencies import app_settings, auth_dependency, get_rate_limiter
+from ..rate_limit import InMemoryRateLimiter
+from ..metrics import COMPRESSION_DURATION
 from ..auth.auth import extract_token
+import asyncio
+import base64
+import json
+import httpx
 import pytest
+from dataclasses import replace
+from fastapi import Request
+from ..pagination import encode_cursor
+from ..recipe_store import PostgRESTRecipeStore
+from ..settings import get_settings
 from ..fixtures import *
 
 def test_create_recipe(mock_supabase_insert_recipe_success, mock_auth_dependency, mock_extract_token):
@@ -53,8 +64,8 @@ def test_create_recipe_missing_data(mock_supabase_insert_recipe_success, mock_au
     
     response = client.post("/recipes/create-recipe", json=recipe_data)
     
-    assert response.status_code == 500
-    assert "Failed to create recipe in database" in response.json()["detail"]
+    assert response.status_code == 422
+    assert {error["loc"][-1] for error in response.json()["detail"]} == {"totalTime", "type", "cuisine"}
     app.dependency_overrides.clear()
 
 
@@ -97,4 +108,438 @@ def test_create_recipe_bad_token(mock_supabase_auth_error, mock_auth_dependency,
     
     assert response.status_code == 500
     assert "Invalid JWT token" in response.json()["detail"]
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides.clear()
+
+def test_recipes_round_trip(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test create, list and delete through the async PostgREST client against a fake server"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+
+    recipe_data = {
+        "name": "Test Recipe",
+        "preparation": [{"text": "Step 1"}],
+        "ingredients": [{"name": "ingredient 1"}],
+        "totalTime": "30 minutes",
+        "type": "entree",
+        "cuisine": "Italian"
+    }
+    assert client.post("/recipes/create-recipe", json=recipe_data).status_code == 200
+
+    response = client.get("/recipes/")
+    assert response.status_code == 200
+    assert [recipe["name"] for recipe in response.json()] == ["Test Recipe"]
+
+    recipe_id = response.json()[0]["id"]
+    assert client.request("DELETE", "/recipes/delete-recipe", json={"id": recipe_id}).status_code == 200
+    assert client.get("/recipes/").json() == []
+    app.dependency_overrides.clear()
+
+
+def test_get_recipes_keyset_pagination(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test paging newest-first with a cursor visits every recipe exactly once"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    fake_postgrest.insert("recipes", [{"name": f"recipe {i}", "user_id": "test-user-123"} for i in range(7)])
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/recipes/", params=params)
+        assert response.status_code == 200
+        assert len(response.json()) <= 3
+        seen += [recipe["name"] for recipe in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == [f"recipe {i}" for i in reversed(range(7))]
+
+    app.dependency_overrides[app_settings] = lambda: replace(get_settings(), recipes_max_page_size=5)
+    assert client.get("/recipes/", params={"limit": 5}).status_code == 200
+    assert client.get("/recipes/", params={"limit": 6}).status_code == 422
+    assert client.get("/recipes/search", params={"limit": 6}).status_code == 422
+    app.dependency_overrides.clear()
+
+
+def test_get_recipes_rejects_tampered_cursor(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test a cursor whose created_at carries extra PostgREST filter syntax is refused, not forwarded"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    injected = '2024-01-01T00:00:00+00:00",user_id.neq.nobody,created_at.gt."1970-01-01'
+    requests = fake_postgrest.requests
+
+    for values in ([injected, 1], ["2024-01-01T00:00:00+00:00", "1),(id.gt.0"], [None, 1]):
+        cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+        response = client.get("/recipes/", params={"limit": 2, "cursor": cursor})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+    assert fake_postgrest.requests == requests
+
+    valid = encode_cursor({"created_at": "2024-01-01T00:00:00.123456+00:00", "id": 5})
+    assert client.get("/recipes/", params={"limit": 2, "cursor": valid}).status_code == 200
+    app.dependency_overrides.clear()
+
+
+def test_get_recipes_field_projection(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test fields= limits the columns returned and rejects unknown ones"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    fake_postgrest.insert("recipes", [{"name": "Soup", "user_id": "test-user-123", "ingredients": [{"name": "water"}]}])
+
+    response = client.get("/recipes/", params={"fields": "id,name"})
+    assert response.status_code == 200
+    assert set(response.json()[0]) == {"id", "name", "created_at"}
+
+    response = client.get("/recipes/", params={"fields": "id,password"})
+    assert response.status_code == 400
+    assert client.get("/recipes/", params={"cursor": "not-a-cursor"}).status_code == 400
+    app.dependency_overrides.clear()
+
+
+def test_get_recipes_streaming(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test streamed JSON array and NDJSON listings match the buffered listing"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    fake_postgrest.insert("recipes", [{"name": f"recipe {i}", "user_id": "test-user-123"} for i in range(5)])
+
+    app.dependency_overrides[app_settings] = lambda: replace(get_settings(), stream_page_size=2)
+    expected = client.get("/recipes/").json()
+    streamed = client.get("/recipes/", params={"stream": "true"})
+    ndjson = client.get("/recipes/", headers={"Accept": "application/x-ndjson"})
+
+    assert streamed.headers["content-type"] == "application/json"
+    assert streamed.json() == expected
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in ndjson.text.splitlines()] == expected
+    assert fake_postgrest.requests >= 6
+    app.dependency_overrides.clear()
+
+
+def test_get_recipes_cached_with_etag(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test repeat listings are served from cache, revalidate to 304 and are invalidated by writes"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    fake_postgrest.insert("recipes", [{"name": "Soup", "user_id": "test-user-123"}])
+
+    first = client.get("/recipes/")
+    requests = fake_postgrest.requests
+    second = client.get("/recipes/")
+    assert fake_postgrest.requests == requests
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.headers["Cache-Control"] == "private, no-cache"
+
+    not_modified = client.get("/recipes/", headers={"If-None-Match": first.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    recipe_id = first.json()[0]["id"]
+    assert client.request("DELETE", "/recipes/delete-recipe", json={"id": recipe_id}).status_code == 200
+    refreshed = client.get("/recipes/", headers={"If-None-Match": first.headers["ETag"]})
+    assert refreshed.status_code == 200
+    assert refreshed.json() == []
+    assert fake_postgrest.requests > requests
+    app.dependency_overrides.clear()
+
+
+def bulk_recipes(count):
+    return [{
+        "name": f"recipe {i}",
+        "preparation": [{"text": "Step 1"}],
+        "ingredients": [{"name": "ingredient 1"}],
+        "totalTime": "30 minutes",
+        "type": "entree",
+        "cuisine": "Italian"
+    } for i in range(count)]
+
+
+def test_bulk_create_and_delete_recipes(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test bulk endpoints chunk writes and report a result per item"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+
+    recipes = bulk_recipes(5)
+    recipes.insert(2, {"name": "incomplete"})
+
+    app.dependency_overrides[app_settings] = lambda: replace(get_settings(), recipes_bulk_chunk_size=2)
+    requests = fake_postgrest.requests
+    response = client.post("/recipes/bulk-create", json={"recipes": recipes})
+    assert fake_postgrest.requests - requests == 3
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["status"] == "partial"
+    assert [result["status"] for result in body["results"]] == ["created", "created", "error", "created", "created", "created"]
+    assert len(fake_postgrest.tables["recipes"]) == 5
+
+    ids = [result["id"] for result in body["results"] if result["status"] == "created"]
+    requests = fake_postgrest.requests
+    response = client.request("DELETE", "/recipes/bulk-delete", json={"ids": ids + [ids[0], 999, "x"]})
+    assert fake_postgrest.requests - requests == 3
+
+    statuses = {result["id"]: result["status"] for result in response.json()["results"]}
+    assert statuses == {**{recipe_id: "deleted" for recipe_id in ids}, 999: "not_found", "x": "error"}
+    assert fake_postgrest.tables["recipes"] == []
+    assert client.get("/recipes/").json() == []
+    assert client.post("/recipes/bulk-create", json={"recipes": []}).status_code == 422
+    app.dependency_overrides.clear()
+
+
+def test_bulk_create_failed_chunk_leaves_others(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test a chunk whose INSERT fails reports only its own recipes as errors"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    app.dependency_overrides[app_settings] = lambda: replace(get_settings(), recipes_bulk_chunk_size=2)
+    insert = PostgRESTRecipeStore.insert
+    chunks = []
+
+    async def second_chunk_fails(self, rows):
+        chunks.append(len(rows))
+        if len(chunks) == 2:
+            raise RuntimeError("connection reset")
+        return await insert(self, rows)
+
+    with patch.object(PostgRESTRecipeStore, "insert", second_chunk_fails):
+        response = client.post("/recipes/bulk-create", json={"recipes": bulk_recipes(5)})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert chunks == [2, 2, 1]
+    assert body["status"] == "partial"
+    assert [(result["index"], result["status"]) for result in body["results"]] == [
+        (0, "created"), (1, "created"), (2, "error"), (3, "error"), (4, "created")
+    ]
+    assert "connection reset" in body["results"][2]["detail"]
+    assert sorted(recipe["name"] for recipe in fake_postgrest.tables["recipes"]) == ["recipe 0", "recipe 1", "recipe 4"]
+    assert {recipe["name"] for recipe in client.get("/recipes/").json()} == {"recipe 0", "recipe 1", "recipe 4"}
+    app.dependency_overrides.clear()
+
+
+def test_bulk_create_short_return_reports_errors(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test recipes the store returns no row for are reported as errors instead of failing the request"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    app.dependency_overrides[app_settings] = lambda: replace(get_settings(), recipes_bulk_chunk_size=3)
+    insert = PostgRESTRecipeStore.insert
+
+    async def drops_last_row(self, rows):
+        return (await insert(self, rows))[:-1]
+
+    with patch.object(PostgRESTRecipeStore, "insert", drops_last_row):
+        response = client.post("/recipes/bulk-create", json={"recipes": bulk_recipes(4)})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["status"] == "partial"
+    assert [result["status"] for result in body["results"]] == ["created", "created", "error", "error"]
+    assert all(result.get("id") is not None for result in body["results"][:2])
+    assert body["results"][2]["detail"] == "Failed to create recipe in database: no row returned"
+    app.dependency_overrides.clear()
+
+
+SEARCH_RECIPES = [
+    {"name": "Tomato soup", "ingredients": [{"name": "tomatoes"}], "preparation": [{"text": "Simmer"}],
+     "metadata": {"cuisine": "Italian", "type": "soup", "total_time": "30"}},
+    {"name": "Chicken curry", "ingredients": [{"name": "chicken"}, {"name": "tomato paste"}], "preparation": [{"text": "Fry"}],
+     "metadata": {"cuisine": "Indian", "type": "entree", "total_time": "45"}},
+    {"name": "Green salad", "ingredients": [{"name": "lettuce"}], "preparation": [{"text": "Toss with tomato"}],
+     "metadata": {"cuisine": "American", "type": "side", "total_time": "10 mins"}},
+]
+
+
+def test_search_recipes(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test search ranks text matches, applies metadata filters and returns facet counts"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    fake_postgrest.insert("recipes", [{**recipe, "user_id": "test-user-123"} for recipe in SEARCH_RECIPES])
+
+    response = client.get("/recipes/search", params={"q": "tomato"})
+    body = response.json()
+    assert response.status_code == 200
+    assert [recipe["name"] for recipe in body["results"]] == ["Tomato soup", "Chicken curry", "Green salad"]
+    assert body["facets"] == {
+        "total": 3,
+        "cuisine": {"Italian": 1, "Indian": 1, "American": 1},
+        "type": {"soup": 1, "entree": 1, "side": 1},
+        "total_time": {"16-30": 1, "31-60": 1}
+    }
+
+    response = client.get("/recipes/search", params={"q": "tomato", "cuisine": "Indian", "fields": "name"})
+    body = response.json()
+    assert [set(recipe) for recipe in body["results"]] == [{"id", "created_at", "name"}]
+    assert body["facets"]["total"] == 1
+    # A facet ignores its own filter, so the other cuisines are still counted.
+    assert body["facets"]["cuisine"] == {"Italian": 1, "Indian": 1, "American": 1}
+    assert body["facets"]["type"] == {"entree": 1}
+
+    response = client.get("/recipes/search", params={"type": "soup", "max_time": 40, "facets": "false"})
+    assert response.json() == {"results": [{**response.json()["results"][0], "name": "Tomato soup"}]}
+
+    page = client.get("/recipes/search", params={"limit": 2, "facets": "false"}).json()
+    assert page["next_offset"] == 2
+    rest = client.get("/recipes/search", params={"limit": 2, "offset": 2, "facets": "false"}).json()
+    assert "next_offset" not in rest
+    assert len(page["results"]) + len(rest["results"]) == 3
+    app.dependency_overrides.clear()
+
+
+def test_search_recipes_cache_invalidated_by_writes(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test search responses are cached per user and dropped when their recipes change"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    fake_postgrest.insert("recipes", [{**recipe, "user_id": "test-user-123"} for recipe in SEARCH_RECIPES])
+
+    first = client.get("/recipes/search", params={"q": "soup"})
+    requests = fake_postgrest.requests
+    assert client.get("/recipes/search", params={"q": "soup"}, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+    assert fake_postgrest.requests == requests
+
+    recipe_id = first.json()["results"][0]["id"]
+    assert client.request("DELETE", "/recipes/delete-recipe", json={"id": recipe_id}).status_code == 200
+    assert client.get("/recipes/search", params={"q": "soup"}).json()["results"] == []
+    assert client.get("/recipes/search", params={"limit": 0}).status_code == 422
+    app.dependency_overrides.clear()
+
+
+def test_what_can_i_cook(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test pantry matching ranks by coverage and follows creates and deletes without rebuilding"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    fake_postgrest.insert("recipes", [{**recipe, "user_id": "test-user-123"} for recipe in SEARCH_RECIPES])
+    pantry = {"ingredients": ["Tomatoes", "tomato paste", "lettuce"]}
+
+    body = client.post("/recipes/what-can-i-cook", json=pantry).json()
+    assert [(result["recipe"]["name"], result["coverage"]) for result in body["results"]] == [
+        ("Green salad", 1.0), ("Tomato soup", 1.0), ("Chicken curry", 0.5)
+    ]
+    assert body["total"] == 3
+    assert body["results"][2]["missing"] == ["chicken"]
+
+    requests = fake_postgrest.requests
+    recipe_data = {
+        "name": "Salsa",
+        "preparation": [{"text": "Chop"}],
+        "ingredients": [{"name": "tomato"}, {"name": "chili"}, {"name": "onion"}],
+        "totalTime": "10",
+        "type": "side",
+        "cuisine": "Mexican"
+    }
+    assert client.post("/recipes/create-recipe", json=recipe_data).status_code == 200
+    soup_id = body["results"][1]["recipe"]["id"]
+    assert client.request("DELETE", "/recipes/delete-recipe", json={"id": soup_id}).status_code == 200
+
+    pantry = {"ingredients": pantry["ingredients"] + ["chili", "onions"], "min_coverage": 0.5}
+    body = client.post("/recipes/what-can-i-cook", params={"limit": 1, "fields": "name"}, json=pantry).json()
+    recipe = body["results"][0]["recipe"]
+    assert recipe["name"] == "Salsa" and recipe.keys() == {"id", "created_at", "name"}
+    assert body["total"] == 3 and body["next_offset"] == 1
+    # The insert, the delete and one fetch of the page's rows: the index was patched, not rebuilt.
+    assert fake_postgrest.requests == requests + 3
+
+    assert client.post("/recipes/what-can-i-cook", json={"ingredients": []}).status_code == 422
+    app.dependency_overrides.clear()
+
+
+def test_sync_recipes(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test sync returns only changes since a version, with tombstones, and 304s when nothing changed"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    fake_postgrest.insert("recipes", [{**recipe, "user_id": "test-user-123"} for recipe in SEARCH_RECIPES])
+
+    full = client.get("/recipes/sync")
+    assert full.status_code == 200
+    assert full.json()["full"] is True and full.json()["version"] == 3
+    assert [recipe["name"] for recipe in full.json()["recipes"]] == ["Green salad", "Chicken curry", "Tomato soup"]
+
+    # Unchanged: one version lookup, answered with a 304 or an empty delta.
+    requests = fake_postgrest.requests
+    assert client.get("/recipes/sync", headers={"If-None-Match": full.headers["ETag"]}).status_code == 304
+    assert client.get("/recipes/sync", params={"since": 3}).json() == {"version": 3, "full": False, "recipes": [], "deleted": []}
+    assert fake_postgrest.requests == requests + 2
+
+    soup_id = full.json()["recipes"][2]["id"]
+    assert client.request("DELETE", "/recipes/delete-recipe", json={"id": soup_id}).status_code == 200
+    recipe_data = {
+        "name": "Salsa",
+        "preparation": [{"text": "Chop"}],
+        "ingredients": [{"name": "tomato"}],
+        "totalTime": "10",
+        "type": "side",
+        "cuisine": "Mexican"
+    }
+    assert client.post("/recipes/create-recipe", json=recipe_data).status_code == 200
+
+    delta = client.get("/recipes/sync", params={"since": 3}, headers={"If-None-Match": full.headers["ETag"]}).json()
+    assert delta["version"] == 5 and delta["full"] is False
+    assert [recipe["name"] for recipe in delta["recipes"]] == ["Salsa"]
+    assert delta["deleted"] == [soup_id]
+    assert "sync_version" not in delta["recipes"][0]
+
+    # A cursor from the future (e.g. another database) falls back to a full sync.
+    assert client.get("/recipes/sync", params={"since": 99}).json()["full"] is True
+    app.dependency_overrides.clear()
+
+
+def test_concurrent_identical_reads_are_coalesced(fake_postgrest, mock_extract_token):
+    """Test a burst of identical GETs makes one upstream query per user, never sharing across users"""
+    def auth_from_header(request: Request):
+        return {"sub": request.headers["X-Test-User"]}
+
+    app.dependency_overrides[auth_dependency] = auth_from_header
+    app.dependency_overrides[extract_token] = mock_extract_token
+    fake_postgrest.insert("recipes", [{**recipe, "user_id": "test-user-123"} for recipe in SEARCH_RECIPES])
+    fake_postgrest.latency = 0.05
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as http:
+            requests = [
+                http.get("/recipes/", params={"fields": "name"}, headers={"X-Test-User": user})
+                for user in ["alice"] * 4 + ["bob"] * 2
+            ]
+            return await asyncio.gather(*requests)
+
+    responses = asyncio.run(burst())
+    assert [response.status_code for response in responses] == [200] * 6
+    assert len({response.content for response in responses[:4]}) == 1
+    assert fake_postgrest.requests == 2
+    app.dependency_overrides.clear()
+
+
+def test_rate_limit_per_user(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test a user over their token bucket gets 429 with Retry-After"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    app.dependency_overrides[get_rate_limiter] = lambda: limiter
+    limiter = InMemoryRateLimiter(rate=0.5, burst=2)
+
+    assert [client.get("/recipes/").status_code for _ in range(2)] == [200, 200]
+    limited = client.get("/recipes/")
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "2"
+    assert limited.headers["Access-Control-Allow-Origin"] == "*"
+    app.dependency_overrides.clear()
+
+
+def test_cached_listing_served_precompressed(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test large listings go out gzipped and cache hits reuse the stored compressed body"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    fake_postgrest.insert("recipes", [
+        {"name": f"Soup {i}", "user_id": "test-user-123", "ingredients": [{"name": "tomato", "amount": "1 cup"}] * 10}
+        for i in range(20)
+    ])
+
+    first = client.get("/recipes/", headers={"Accept-Encoding": "gzip"})
+    compressions = COMPRESSION_DURATION.count("gzip")
+    second = client.get("/recipes/", headers={"Accept-Encoding": "gzip"})
+    plain = client.get("/recipes/", headers={"Accept-Encoding": "identity"})
+
+    assert first.headers["Content-Encoding"] == second.headers["Content-Encoding"] == "gzip"
+    assert first.headers["Vary"] == "Accept-Encoding"
+    assert COMPRESSION_DURATION.count("gzip") == compressions
+    assert second.json() == first.json() == plain.json()
+    assert len(second.json()) == 20
+    assert "Content-Encoding" not in plain.headers
+    assert plain.headers["ETag"] == second.headers["ETag"]
+    app.dependency_overrides.clear()
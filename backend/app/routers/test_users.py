@@ -1,8 +1,13 @@
 from ..test_main import client
 from unittest.mock import patch, MagicMock
 from ..main import app
-from ..dependencies import auth_dependency
+from ..dependencies import auth_dependency, get_supabase, get_user_idempotency, get_user_writer
+from ..settings import Settings
+from ..cache import InMemoryLRUCache
+from ..idempotency import IdempotencyKeys
+from ..user_provisioning import UserWriteBatcher, upsert_users
 from ..auth.auth import extract_token
+import json
 import pytest
 from ..fixtures import *
 
@@ -26,7 +31,7 @@ def test_read_user(mock_supabase_get_users_success, mock_auth_dependency, mock_e
     app.dependency_overrides.clear()
     
 
-def test_create_user(mock_supabase_insert_user_success, mock_valid_backend_secret):
+def test_create_user(mock_supabase_upsert_user_success, mock_valid_backend_secret):
     """Test a successful creation of user in supabase table"""
     app.dependency_overrides[extract_token] = mock_valid_backend_secret
     
@@ -45,7 +50,9 @@ def test_create_user(mock_supabase_insert_user_success, mock_valid_backend_secre
         "username": user_data["email"]
     }
     
-    mock_supabase_insert_user_success.table.return_value.insert.assert_called_with(expected_data)
+    mock_supabase_upsert_user_success.table.return_value.upsert.assert_called_with(
+        [expected_data], on_conflict="cognito_id", ignore_duplicates=True
+    )
     app.dependency_overrides.clear()
     
 
@@ -62,4 +69,66 @@ def test_create_user_bad_token(mock_invalid_backend_secret):
     response = client.post("/users/create-user", json=user_data)
     assert response.status_code == 401
     assert response.json()["detail"] == "Unauthorized"
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides.clear()
+
+def test_read_users_ndjson_stream(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test the users listing streams one JSON document per line when NDJSON is requested, shaped like the buffered listing"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    fake_postgrest.insert("users", [{"cognito_id": f"user-{i}", "username": f"user{i}", "internal_note": "x"} for i in range(3)])
+
+    response = client.get("/users/", headers={"Accept": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    # Streamed newest first; the buffered listing has no order.
+    assert sorted(lines, key=lambda user: user["id"]) == sorted(client.get("/users/").json(), key=lambda user: user["id"])
+    assert [set(line) for line in lines] == [{"id", "cognito_id", "username", "created_at"}] * 3
+    assert client.get("/users/", params={"stream": "true"}).json() == lines
+    app.dependency_overrides.clear()
+
+
+def test_create_user_is_retry_safe(fake_postgrest, mock_valid_backend_secret):
+    """Test repeated sign-ups upsert one row and Idempotency-Key replays the first response"""
+    app.dependency_overrides[extract_token] = mock_valid_backend_secret
+    keys = IdempotencyKeys(InMemoryLRUCache(), "create-user")
+    app.dependency_overrides[get_user_idempotency] = lambda: keys
+    user_data = {"id": "cognito-sub-1", "email": "cook@example.com"}
+
+    first = client.post("/users/create-user", json=user_data)
+    retry = client.post("/users/create-user", json=user_data)
+    assert first.json() == retry.json() == {"status": "success"}
+    assert fake_postgrest.tables["users"][0]["username"] == "cook" and len(fake_postgrest.tables["users"]) == 1
+
+    headers = {"Idempotency-Key": "post-confirmation:cognito-sub-1"}
+    assert "Idempotent-Replayed" not in client.post("/users/create-user", json=user_data, headers=headers).headers
+    requests = fake_postgrest.requests
+    replayed = client.post("/users/create-user", json=user_data, headers=headers)
+    assert replayed.status_code == 200 and replayed.headers["Idempotent-Replayed"] == "true"
+    assert fake_postgrest.requests == requests
+
+    other = {"id": "cognito-sub-2", "email": "baker@example.com"}
+    assert client.post("/users/create-user", json=other, headers=headers).status_code == 422
+    app.dependency_overrides.clear()
+
+
+def test_create_user_batched_write(fake_postgrest, mock_valid_backend_secret):
+    """Test provisioning through the batched writer acknowledges once the row is written"""
+    app.dependency_overrides[extract_token] = mock_valid_backend_secret
+    pool = app.dependency_overrides[get_supabase]()
+    writer = UserWriteBatcher(lambda rows: upsert_users(pool, rows), max_delay=0.001)
+    app.dependency_overrides[get_user_writer] = lambda: writer
+
+    response = client.post("/users/create-user", json={"id": "cognito-sub-1", "email": "cook@example.com"})
+    assert response.status_code == 200
+    assert [user["cognito_id"] for user in fake_postgrest.tables["users"]] == ["cognito-sub-1"]
+
+    # Same username, different sub: the conflict is reported, not swallowed.
+    response = client.post("/users/create-user", json={"id": "cognito-sub-2", "email": "cook@example.org"})
+    assert response.status_code == 500
+    app.dependency_overrides.clear()
+
+
+def test_user_writer_not_built_when_batching_is_off():
+    """Test create-user needs no batcher (nor its PostgREST clients) unless USER_WRITE_BATCHING is on"""
+    assert get_user_writer(request=None, settings=Settings(user_write_batching=False), supabase=None) is None
@@ -1,38 +1,50 @@
-from fastapi import APIRouter, HTTPException, status, Request, Depends
-from typing import List
-from supabase import create_client, ClientOptions
-from ..models.models import User
-from ..dependencies import auth_dependency
+from fastapi import APIRouter, HTTPException, status, Request, Response, Depends
+from typing import List, Optional
+from ..models.models import UserList, UserRead
+from ..dependencies import (
+    app_settings, auth_dependency, get_read_coalescer, get_supabase, get_user_idempotency, get_user_writer,
+    rate_limit
+)
+from ..coalescing import SingleFlight, coalesced
+from ..idempotency import IDEMPOTENCY_KEY_HEADER, REPLAYED_HEADER, IdempotencyKeys
+from ..settings import Settings
+from ..supabase_clients import SupabaseClients
 from ..auth.auth import extract_token
-from dotenv import load_dotenv
+from ..streaming import keyset_pages, stream_rows, wants_ndjson
+from ..user_provisioning import UserWriteBatcher, upsert_users, user_row
 from loguru import logger
-import os
-
-load_dotenv()
 
 router = APIRouter(
     prefix="/users"
 )
 
-url = os.getenv("PROJ_URL")
-anon_key = os.getenv("ANON_KEY")
-service_role = os.getenv("SERVICE_ROLE")   
-backend_secret = os.getenv("BACKEND_SECRET")
-
-service_client = create_client(supabase_url=url, supabase_key=service_role)
-
-@router.get("/", response_model=List[User])
-def list_users(user = Depends(auth_dependency), token = Depends(extract_token)):
+@router.get("/", response_model=List[UserRead], response_model_exclude_unset=True, dependencies=[Depends(rate_limit)])
+async def list_users(
+    request: Request,
+    stream: bool = False,
+    settings: Settings = Depends(app_settings),
+    user = Depends(auth_dependency),
+    token = Depends(extract_token),
+    supabase: SupabaseClients = Depends(get_supabase),
+    reads: Optional[SingleFlight] = Depends(get_read_coalescer)
+):
     try:
         logger.info("=== GET /users ENDPOINT CALLED ===")
 
-        client = create_client(supabase_key=anon_key, supabase_url=url, options=ClientOptions(headers={"Authorization": f"Bearer {token}"}))
-        logger.info("✅ Supabase client created")
-        
-        response = client.from_("users").select("*").execute()
-        logger.info(f"Response data: {response.data}")
-        
-        return response.data
+        if stream or wants_ndjson(request):
+            client = supabase.for_user(token)
+            logger.info("✅ Supabase client created")
+            pages = keyset_pages(lambda: client.from_("users").select("*"), settings.stream_page_size)
+            return await stream_rows(request, pages, UserList)
+
+        async def fetch():
+            response = await supabase.for_user(token).from_("users").select("*").execute()
+            logger.opt(lazy=True).debug("Response data: {}", lambda: response.data)
+            return UserList.dump_json(UserList.validate_python(response.data or []), exclude_unset=True)
+
+        # Identical concurrent listings by the same user share one query and one body.
+        body = await coalesced(reads, user.get("sub"), "users", fetch, "/users/")
+        return Response(content=body, media_type="application/json")
     
     except Exception as e:
         logger.error(f"❌ {type(e)}: {str(e)}")
@@ -41,27 +53,57 @@ def list_users(user = Depends(auth_dependency), token = Depends(extract_token)):
             detail=f"An unexpected error occurred: {str(e)}"
         )
         
-@router.post("/create-user")
-async def create_new_user(request: Request, token = Depends(extract_token)):
-    logger.info("=== CREATE USER ENDPOINT CALLED ===")
-    
-    if token != backend_secret: 
+def require_backend_secret(token = Depends(extract_token), settings: Settings = Depends(app_settings)) -> None:
+    """Only the Cognito post-confirmation Lambda, holding BACKEND_SECRET, may provision users."""
+    if token != settings.backend_secret:
         logger.error("❌ Authorization failed")
         raise HTTPException(status_code=401, detail="Unauthorized")
-    
+
+
+# The secret is checked first, so unauthorized calls never set up PostgREST clients or batching.
+@router.post("/create-user", dependencies=[Depends(require_backend_secret)])
+async def create_new_user(
+    request: Request,
+    response: Response,
+    supabase: SupabaseClients = Depends(get_supabase),
+    idempotency: Optional[IdempotencyKeys] = Depends(get_user_idempotency),
+    writer: Optional[UserWriteBatcher] = Depends(get_user_writer)
+):
+    """
+    Provision the users row for a confirmed Cognito sign-up (post-confirmation trigger).
+
+    Safe to retry: the row is upserted on cognito_id, so a user that already
+    exists is left as is and still reported as success. An Idempotency-Key
+    header additionally replays the first response for the same key. With
+    USER_WRITE_BATCHING on, concurrent sign-ups share multi-row writes and each
+    call returns once its row is committed.
+    """
+    logger.info("=== CREATE USER ENDPOINT CALLED ===")
     logger.info("✅ Authorization successful")
     body = await request.json()
-    
-    try:
-        logger.info("Attempting to insert user into Supabase...")
-        result = service_client.table("users").insert({
-            "cognito_id": body["id"],
-            "username": body.get("email", "unknown").split('@')[0]  
-        }).execute()
 
+    async def provision():
+        if writer is not None:
+            await writer.submit(row)
+        else:
+            await upsert_users(supabase, [row])
         return {"status": "success"}
-        
+
+    key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+    try:
+        logger.info("Attempting to upsert user into Supabase...")
+        row = user_row(body)
+        if key is None or idempotency is None:
+            return await provision()
+
+        result, replayed = await idempotency.run(key, row, provision)
+        if replayed:
+            response.headers[REPLAYED_HEADER] = "true"
+        return result
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error creating user: {str(e)}")
         logger.error(f"Error type: {type(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to create user: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to create user: {str(e)}")
@@ -0,0 +1,27 @@
+import os
+from uvicorn_worker import UvicornWorker as BaseUvicornWorker
+
+
+class UvicornWorker(BaseUvicornWorker):
+    """
+    Gunicorn worker running the app on uvloop with the httptools parser.
+
+    Keep-alive, backlog and max-requests come from gunicorn's settings; in-flight
+    requests get gunicorn's graceful_timeout to finish before the worker exits, so
+    the lifespan shutdown (closing PostgREST and JWKS clients) still runs.
+    """
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = self.cfg.graceful_timeout
+
+
+def default_workers() -> int:
+    """WEB_CONCURRENCY when set, otherwise one worker per CPU available to this process."""
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(1, int(os.environ["WEB_CONCURRENCY"]))
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return os.cpu_count() or 1
@@ -0,0 +1,179 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+from dotenv import load_dotenv
+
+
+def _flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Everything the app reads from its environment, loaded once.
+
+    Creating a Settings has no side effects; clients, caches and logging are built
+    from it in the app lifespan (or on first use when the lifespan didn't run).
+    """
+    # Supabase / PostgREST
+    proj_url: Optional[str] = None
+    anon_key: Optional[str] = None
+    service_role: Optional[str] = None
+    supabase_max_connections: int = 20
+    backend_secret: Optional[str] = None
+
+    # Recipe data: "postgrest" (Supabase HTTP API) or "postgres" (direct, pooled SQLAlchemy)
+    data_backend: str = "postgrest"
+    database_url: Optional[str] = None
+    database_pool_size: int = 10
+    database_max_overflow: int = 10
+    database_role: str = "authenticated"
+
+    # Cognito
+    region: Optional[str] = None
+    cognito_user_pool_id: Optional[str] = None
+    cognito_app_client_id: Optional[str] = None
+    cognito_jwks_url: Optional[str] = None
+    jwks_cache_ttl: float = 3600
+    jwks_min_refresh_interval: float = 30
+    auth_token_cache_size: int = 1024
+
+    # Recipe routes and response cache
+    recipes_max_page_size: int = 500
+    recipes_bulk_chunk_size: int = 100
+    stream_page_size: int = 500
+    # Response cache: "none", "redis", or "memory" (single process only: invalidations stay in the worker)
+    recipe_cache_backend: str = "none"
+    recipe_cache_ttl: float = 300
+    recipe_cache_size: int = 1024
+    redis_url: str = "redis://localhost:6379/0"
+    # Per-worker what-can-i-cook indexes; with several workers and no redis cache they
+    # are versioned by the database's per-user sync version (migrations/003)
+    ingredient_index_size: int = 256
+    ingredient_index_ttl: float = 300
+    read_coalescing: bool = True
+    read_coalesce_window: float = 0.05
+
+    # User provisioning (POST /users/create-user)
+    idempotency_backend: str = "memory"
+    idempotency_ttl: float = 86400
+    idempotency_cache_size: int = 10000
+    user_write_batching: bool = False
+    user_write_batch_size: int = 50
+    user_write_max_delay: float = 0.02
+
+    # Load shedding: per-worker concurrency cap, and per-user token buckets
+    admission_max_in_flight: int = 64
+    admission_max_queue: int = 128
+    admission_queue_timeout: float = 0.5
+    admission_retry_after: float = 1
+    rate_limit_backend: str = "memory"
+    rate_limit_per_second: float = 20
+    rate_limit_burst: int = 40
+
+    # Response compression: encodings offered, preferred first ("" disables); bodies under min size go as-is
+    compression_encodings: str = "zstd,br,gzip"
+    compression_min_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_level: int = 4
+    compression_zstd_level: int = 3
+
+    # Worker processes serving the app (gunicorn.conf.py exports its count as WEB_CONCURRENCY)
+    workers: int = 1
+
+    # Startup: prefetch the JWKS and open PostgREST connections before serving
+    startup_warmup: bool = False
+    warmup_connections: int = 4
+
+    # Logging
+    log_format: str = "text"
+    log_level: str = "INFO"
+    log_sample: str = ""
+    log_file: Optional[str] = None
+    log_queue_size: int = 10000
+
+    # Metrics and profiling
+    metrics_enabled: bool = True
+    profiling_enabled: bool = False
+    profile_dir: str = "profiles"
+    profile_mode: str = "cprofile"
+    profile_sample_rate: float = 0.0
+    # X-Profile value that triggers a profile; required when profiling is enabled
+    profile_header_secret: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            proj_url=os.getenv("PROJ_URL"),
+            anon_key=os.getenv("ANON_KEY"),
+            service_role=os.getenv("SERVICE_ROLE"),
+            supabase_max_connections=int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20")),
+            backend_secret=os.getenv("BACKEND_SECRET"),
+            data_backend=os.getenv("DATA_BACKEND", "postgrest").lower(),
+            database_url=os.getenv("DATABASE_URL"),
+            database_pool_size=int(os.getenv("DATABASE_POOL_SIZE", "10")),
+            database_max_overflow=int(os.getenv("DATABASE_MAX_OVERFLOW", "10")),
+            database_role=os.getenv("DATABASE_ROLE", "authenticated"),
+            region=os.getenv("REGION"),
+            cognito_user_pool_id=os.getenv("COGNITO_USER_POOL_ID"),
+            cognito_app_client_id=os.getenv("COGNITO_APP_CLIENT_ID"),
+            cognito_jwks_url=os.getenv("COGNITO_JWKS_URL"),
+            jwks_cache_ttl=float(os.getenv("JWKS_CACHE_TTL", "3600")),
+            jwks_min_refresh_interval=float(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "30")),
+            auth_token_cache_size=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024")),
+            recipes_max_page_size=int(os.getenv("RECIPES_MAX_PAGE_SIZE", "500")),
+            recipes_bulk_chunk_size=int(os.getenv("RECIPES_BULK_CHUNK_SIZE", "100")),
+            stream_page_size=int(os.getenv("STREAM_PAGE_SIZE", "500")),
+            recipe_cache_backend=os.getenv("RECIPE_CACHE_BACKEND", "none").lower(),
+            recipe_cache_ttl=float(os.getenv("RECIPE_CACHE_TTL", "300")),
+            recipe_cache_size=int(os.getenv("RECIPE_CACHE_SIZE", "1024")),
+            redis_url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            ingredient_index_size=int(os.getenv("INGREDIENT_INDEX_SIZE", "256")),
+            ingredient_index_ttl=float(os.getenv("INGREDIENT_INDEX_TTL", "300")),
+            read_coalescing=_flag("READ_COALESCING", True),
+            read_coalesce_window=float(os.getenv("READ_COALESCE_WINDOW", "0.05")),
+            idempotency_backend=os.getenv("IDEMPOTENCY_BACKEND", "memory").lower(),
+            idempotency_ttl=float(os.getenv("IDEMPOTENCY_TTL", "86400")),
+            idempotency_cache_size=int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000")),
+            user_write_batching=_flag("USER_WRITE_BATCHING", False),
+            user_write_batch_size=int(os.getenv("USER_WRITE_BATCH_SIZE", "50")),
+            user_write_max_delay=float(os.getenv("USER_WRITE_MAX_DELAY", "0.02")),
+            admission_max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64")),
+            admission_max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "128")),
+            admission_queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "0.5")),
+            admission_retry_after=float(os.getenv("ADMISSION_RETRY_AFTER", "1")),
+            rate_limit_backend=os.getenv("RATE_LIMIT_BACKEND", "memory").lower(),
+            rate_limit_per_second=float(os.getenv("RATE_LIMIT_PER_SECOND", "20")),
+            rate_limit_burst=int(os.getenv("RATE_LIMIT_BURST", "40")),
+            compression_encodings=os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").lower(),
+            compression_min_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+            compression_gzip_level=int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+            compression_brotli_level=int(os.getenv("COMPRESSION_BROTLI_LEVEL", "4")),
+            compression_zstd_level=int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3")),
+            workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+            startup_warmup=_flag("STARTUP_WARMUP", False),
+            warmup_connections=int(os.getenv("WARMUP_CONNECTIONS", "4")),
+            log_format=os.getenv("LOG_FORMAT", "text").lower(),
+            log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
+            log_sample=os.getenv("LOG_SAMPLE", ""),
+            log_file=os.getenv("LOG_FILE"),
+            log_queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+            metrics_enabled=_flag("METRICS_ENABLED", True),
+            profiling_enabled=_flag("PROFILING_ENABLED", False),
+            profile_dir=os.getenv("PROFILE_DIR", "profiles"),
+            profile_mode=os.getenv("PROFILE_MODE", "cprofile"),
+            profile_sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+            profile_header_secret=os.getenv("PROFILE_HEADER_SECRET")
+        )
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Process-wide settings: .env is read once, on first call."""
+    load_dotenv()
+    return Settings.from_env()
@@ -0,0 +1,81 @@
+import orjson
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from loguru import logger
+from .pagination import keyset_page, split_page
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def keyset_pages(
+    build_query: Callable[[], Any],
+    page_size: int,
+    cursor: Optional[str] = None
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yield successive keyset pages of a PostgREST query until the result is exhausted.
+
+    build_query must return a fresh select builder each time it is called.
+    """
+    while True:
+        result = await keyset_page(build_query(), cursor, page_size).execute()
+        rows, cursor = split_page(result.data or [], page_size)
+        yield rows
+        if not cursor:
+            return
+
+
+async def stream_rows(
+    request: Request,
+    pages: AsyncIterator[List[Dict[str, Any]]],
+    adapter: Optional[TypeAdapter] = None
+) -> StreamingResponse:
+    """
+    Stream pages of rows as one chunked JSON array, or NDJSON when the client asks for it.
+
+    The first page is fetched before the response starts so upstream errors can still
+    turn into a normal error status; only one page is held in memory at a time. When
+    a list TypeAdapter is given each page is validated and shaped through it, so
+    streamed rows match the buffered response.
+    """
+    first_page = await pages.__anext__()
+    ndjson = wants_ndjson(request)
+
+    async def body():
+        count = 0
+        if not ndjson:
+            yield b"["
+        try:
+            page = first_page
+            while True:
+                if page:
+                    yield _encode_page(page, ndjson, leading_comma=count > 0, adapter=adapter)
+                    count += len(page)
+                try:
+                    page = await pages.__anext__()
+                except StopAsyncIteration:
+                    break
+        except Exception as e:
+            # Headers are already sent; end the body early so the client sees a truncated document.
+            logger.error(f"❌ Stream aborted after {count} rows: {str(e)}")
+            return
+        if not ndjson:
+            yield b"]"
+        logger.info(f"✅ Streamed {count} rows")
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE if ndjson else "application/json")
+
+
+def _encode_page(rows: List[Dict[str, Any]], ndjson: bool, leading_comma: bool, adapter: Optional[TypeAdapter] = None) -> bytes:
+    if adapter is not None:
+        rows = adapter.dump_python(adapter.validate_python(rows), mode="json", by_alias=True, exclude_unset=True)
+    encoded = [orjson.dumps(row) for row in rows]
+    if ndjson:
+        return b"\n".join(encoded) + b"\n"
+    return (b"," if leading_comma else b"") + b",".join(encoded)
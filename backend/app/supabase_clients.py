@@ -0,0 +1,94 @@
+import asyncio
+import httpx
+import time
+from typing import Optional
+from postgrest import AsyncPostgrestClient
+from loguru import logger
+from .metrics import DB_REQUEST_DURATION, SUPABASE_CLIENT_DURATION
+
+
+class SupabaseClients:
+    def __init__(
+        self,
+        url: str,
+        anon_key: str,
+        service_role: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        max_connections: int = 20
+    ):
+        """
+        Shared, connection-pooled access to Supabase's PostgREST API.
+
+        One httpx.AsyncClient (and so one pool of keep-alive connections) is created
+        for the life of the app; per-request views only carry their own headers, and
+        every query is awaited so a slow round-trip never blocks the event loop.
+
+        Args:
+            url: Supabase project URL
+            anon_key: Supabase anon key, used with the caller's JWT for RLS
+            service_role: Supabase service role key for privileged writes
+            http_client: Optional pre-built client, mainly for tests and benchmarks
+            max_connections: Upper bound on pooled connections to Supabase; httpcore's pool
+                bookkeeping gets slower as it grows, so keep this modest
+        """
+        self.rest_url = f"{url.rstrip('/')}/rest/v1"
+        self.anon_key = anon_key
+        self.service_role = service_role
+        self.http_client = http_client or httpx.AsyncClient(
+            timeout=120,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        self.http_client.event_hooks["request"].append(_start_timer)
+        self.http_client.event_hooks["response"].append(_observe_db_request)
+
+    def for_user(self, token: str) -> AsyncPostgrestClient:
+        """PostgREST view that acts as the caller, so row-level security applies."""
+        with SUPABASE_CLIENT_DURATION.time("user"):
+            return self._view(self.anon_key, token)
+
+    def service(self) -> AsyncPostgrestClient:
+        """PostgREST view authenticated with the service role key (bypasses RLS)."""
+        if not self.service_role:
+            raise RuntimeError("SERVICE_ROLE is not configured")
+        with SUPABASE_CLIENT_DURATION.time("service"):
+            return self._view(self.service_role, self.service_role)
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """
+        Open up to `connections` keep-alive connections to PostgREST so the first
+        requests after startup skip DNS, TCP and TLS setup.
+        """
+        async def ping():
+            await self.http_client.head(f"{self.rest_url}/", headers={"apikey": self.anon_key})
+
+        await asyncio.gather(*(ping() for _ in range(connections)))
+
+    async def aclose(self) -> None:
+        await self.http_client.aclose()
+        logger.info("Supabase connection pool closed")
+
+    def _view(self, api_key: str, token: str) -> AsyncPostgrestClient:
+        return AsyncPostgrestClient(
+            self.rest_url,
+            headers={"apikey": api_key, "Authorization": f"Bearer {token}"},
+            http_client=self.http_client
+        )
+
+
+async def _start_timer(request: httpx.Request) -> None:
+    request.extensions["hasha_started_at"] = time.perf_counter()
+
+
+async def _observe_db_request(response: httpx.Response) -> None:
+    started_at = response.request.extensions.get("hasha_started_at")
+    if started_at is None:
+        return
+    # /rest/v1/<table>[/...] -> <table>
+    table = response.request.url.path.split("/rest/v1/", 1)[-1].split("/", 1)[0]
+    DB_REQUEST_DURATION.observe(
+        time.perf_counter() - started_at,
+        response.request.method,
+        table,
+        str(response.status_code)
+    )
@@ -0,0 +1,65 @@
+import asyncio
+import httpx
+from .admission import AdmissionMiddleware
+
+
+class SlowApp:
+    """Holds every request until `release` is set."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.served = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["path"] != "/":
+            await self.release.wait()
+        self.served += 1
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_sheds_load_beyond_the_cap_and_queue():
+    """Test requests over the in-flight cap queue, and are shed with 503 when the queue is full or their deadline passes"""
+    inner = SlowApp()
+    middleware = AdmissionMiddleware(inner, max_in_flight=2, max_queue=2, queue_timeout=0.05, retry_after=2)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as http:
+            running = [asyncio.ensure_future(http.get("/recipes/")) for _ in range(2)]
+            queued = [asyncio.ensure_future(http.get("/recipes/")) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            rejected = await http.get("/recipes/")
+            health = await http.get("/")
+            # The queued pair waits past its deadline while the first two hold their slots.
+            timed_out = await asyncio.gather(*queued)
+
+            later = asyncio.ensure_future(http.get("/recipes/"))
+            await asyncio.sleep(0.01)
+            inner.release.set()
+            return rejected, health, timed_out, await asyncio.gather(*running), await later
+
+    rejected, health, timed_out, running, later = asyncio.run(scenario())
+    assert rejected.status_code == 503 and rejected.headers["Retry-After"] == "2"
+    assert health.status_code == 200
+    assert [response.status_code for response in timed_out] == [503, 503]
+    assert [response.status_code for response in running] == [200, 200]
+    assert later.status_code == 200
+    assert middleware.in_flight == 0
+
+
+def test_released_slots_go_to_the_queue_in_order():
+    inner = SlowApp()
+    middleware = AdmissionMiddleware(inner, max_in_flight=1, max_queue=5, queue_timeout=5)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as http:
+            requests = [asyncio.ensure_future(http.get("/recipes/")) for _ in range(4)]
+            await asyncio.sleep(0.01)
+            assert middleware.in_flight == 1 and len(middleware._waiters) == 3
+            inner.release.set()
+            return await asyncio.gather(*requests)
+
+    assert [response.status_code for response in asyncio.run(scenario())] == [200] * 4
+    assert middleware.in_flight == 0 and inner.served == 4
@@ -0,0 +1,106 @@
+import asyncio
+import gzip
+import pytest
+from .cache import CachedResponse, InMemoryLRUCache, RedisCache, UserResponseCache, make_etag
+from .dependencies import create_recipe_cache
+from .fixtures import FakeRedis
+from .settings import Settings
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    return InMemoryLRUCache(maxsize=8) if request.param == "memory" else RedisCache(FakeRedis())
+
+
+def test_lookup_store_and_invalidate(backend):
+    """Test entries round-trip per user and invalidation only drops that user's entries"""
+    cache = UserResponseCache(backend, "recipes", ttl=60)
+    entry = CachedResponse.build(b'[{"id":1,"name":"Soup"}]', {"X-Next-Cursor": "abc"})
+
+    async def scenario():
+        for user in ("alice", "bob"):
+            cached, version = await cache.lookup(user, "*")
+            assert cached is None
+            await cache.store(user, "*", version, entry)
+
+        cached, _ = await cache.lookup("alice", "*")
+        assert cached == entry
+
+        await cache.invalidate("alice")
+        assert (await cache.lookup("alice", "*"))[0] is None
+        assert (await cache.lookup("bob", "*"))[0] == entry
+
+    asyncio.run(scenario())
+    assert cache.hits == 2
+
+
+def test_compressed_bodies_are_stored_with_the_entry(backend):
+    """Test precompressed bodies round-trip next to the plain one"""
+    cache = UserResponseCache(backend, "recipes", ttl=60)
+    entry = CachedResponse.build(b'[{"id":1}]', {"X-Next-Cursor": "abc"})
+    entry.encoded = {"gzip": gzip.compress(entry.body), "br": b"\x0b\x04\x80\n"}
+
+    async def scenario():
+        _, version = await cache.lookup("alice", "*")
+        await cache.store("alice", "*", version, entry)
+        return (await cache.lookup("alice", "*"))[0]
+
+    cached = asyncio.run(scenario())
+    assert cached == entry
+    assert CachedResponse.decode(CachedResponse.build(b"[]").encode()).encoded == {}
+
+
+def test_store_after_concurrent_invalidation_is_ignored(backend):
+    """Test a listing fetched before a write can't repopulate the cache after it"""
+    cache = UserResponseCache(backend, "recipes", ttl=60)
+
+    async def scenario():
+        _, version = await cache.lookup("alice", "*")
+        await cache.invalidate("alice")
+        await cache.store("alice", "*", version, CachedResponse.build(b'["stale"]'))
+        return await cache.lookup("alice", "*")
+
+    cached, _ = asyncio.run(scenario())
+    assert cached is None
+
+
+def test_current_version_follows_invalidation(backend):
+    """Test the version other per-user state is checked against changes on every write"""
+    cache = UserResponseCache(backend, "recipes", ttl=60)
+
+    async def scenario():
+        first = await cache.current_version("alice")
+        assert await cache.current_version("alice") == first
+        rotated = await cache.invalidate("alice")
+        return first, rotated, await cache.current_version("alice")
+
+    first, rotated, current = asyncio.run(scenario())
+    assert first is not None and rotated != first
+    assert current == rotated
+
+
+def test_in_memory_cache_expires_and_evicts():
+    """Test the LRU backend honours TTLs and its size bound"""
+    lru = InMemoryLRUCache(maxsize=2)
+
+    async def scenario():
+        await lru.set("expired", b"x", ttl=0)
+        await lru.set("a", b"1", ttl=60)
+        await lru.set("b", b"2", ttl=60)
+        await lru.get("a")
+        await lru.set("c", b"3", ttl=60)
+        return [await lru.get(key) for key in ("expired", "a", "b", "c")]
+
+    assert asyncio.run(scenario()) == [None, b"1", None, b"3"]
+
+
+def test_etag_is_weak_and_content_addressed():
+    assert make_etag(b"[]") == make_etag(b"[]")
+    assert make_etag(b"[]") != make_etag(b"[1]")
+    assert make_etag(b"[]").startswith('W/"')
+
+
+def test_response_cache_is_off_unless_configured():
+    """Test the default runs uncached, since the in-memory backend is only correct in a single process"""
+    assert create_recipe_cache(Settings()) is None
+    assert isinstance(create_recipe_cache(Settings(recipe_cache_backend="memory")).backend, InMemoryLRUCache)
@@ -0,0 +1,88 @@
+import asyncio
+from .coalescing import SingleFlight, coalesced
+
+
+class Fetcher:
+    def __init__(self, delay: float = 0.01, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream failed")
+        return f"body-{call}"
+
+
+def test_identical_concurrent_reads_share_one_fetch():
+    flight = SingleFlight(window=0)
+    fetch = Fetcher()
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("alice", "recipes", fetch) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["body-1"] * 5
+    assert fetch.calls == 1
+
+
+def test_reads_are_never_shared_across_users_or_keys():
+    flight = SingleFlight()
+    fetch = Fetcher()
+
+    async def scenario():
+        return await asyncio.gather(
+            flight.do("alice", "recipes", fetch), flight.do("bob", "recipes", fetch), flight.do("alice", "users", fetch)
+        )
+
+    assert sorted(asyncio.run(scenario())) == ["body-1", "body-2", "body-3"]
+    assert asyncio.run(coalesced(flight, None, "recipes", fetch)) == "body-4"
+
+
+def test_window_shares_finished_results_until_it_expires():
+    """Test a result is reused inside the window, not after it, and not after forget()"""
+    flight = SingleFlight(window=0.05)
+    fetch = Fetcher(delay=0)
+
+    async def scenario():
+        first = await flight.do("alice", "recipes", fetch)
+        within = await flight.do("alice", "recipes", fetch)
+        await asyncio.sleep(0.06)
+        after = await flight.do("alice", "recipes", fetch)
+        flight.forget("alice")
+        forgotten = await flight.do("alice", "recipes", fetch)
+        return first, within, after, forgotten
+
+    assert asyncio.run(scenario()) == ("body-1", "body-1", "body-2", "body-3")
+
+
+def test_failures_reach_waiters_but_are_not_kept():
+    flight = SingleFlight(window=1)
+    fetch = Fetcher(fail=True)
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do("alice", "recipes", fetch) for _ in range(3)), return_exceptions=True)
+        fetch.fail = False
+        return results, await flight.do("alice", "recipes", fetch)
+
+    results, retried = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == "body-2"
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_fetch():
+    flight = SingleFlight(window=0)
+    fetch = Fetcher(delay=0.02)
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do("alice", "recipes", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("alice", "recipes", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == "body-1"
+    assert fetch.calls == 1
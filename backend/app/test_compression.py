@@ -0,0 +1,96 @@
+import asyncio
+import gzip
+import zlib
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from .compression import CODECS, CompressionMiddleware, Compressor
+
+BODY = b'{"ingredients":[' + b",".join(b'{"name":"tomato","amount":"1 cup"}' for _ in range(100)) + b"]}"
+
+
+def test_negotiate_honours_weights_and_server_preference(monkeypatch):
+    compressor = Compressor(["gzip"])
+    assert compressor.negotiate("gzip, deflate, br") == "gzip"
+    assert compressor.negotiate("br;q=1.0, gzip;q=0.5") == "gzip"
+    assert compressor.negotiate("gzip;q=0") is None
+    assert compressor.negotiate("*") == "gzip"
+    assert compressor.negotiate("identity") is None
+    assert compressor.negotiate(None) is None
+
+    # Stand gzip in for zstd so preference order can be checked without zstandard installed.
+    monkeypatch.setitem(CODECS, "zstd", CODECS["gzip"])
+    compressor = Compressor(["zstd", "gzip"])
+    assert compressor.negotiate("gzip, zstd") == "zstd"
+    assert compressor.negotiate("gzip, zstd;q=0.5") == "gzip"
+
+    with pytest.raises(ValueError):
+        Compressor(["lzma"])
+
+
+def build_app(compressor: Compressor) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/big")
+    async def big():
+        return Response(BODY, media_type="application/json", headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    async def small():
+        return JSONResponse({"ok": True})
+
+    @app.get("/encoded")
+    async def encoded():
+        return Response(gzip.compress(BODY), media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/stream")
+    async def stream():
+        async def rows():
+            for i in range(3):
+                yield b'{"id":%d}\n' % i
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    app.add_middleware(CompressionMiddleware, compressor=compressor)
+    return app
+
+
+def test_middleware_compresses_negotiated_responses():
+    """Test large and streamed bodies are compressed, small or already-encoded ones are left alone"""
+    app = build_app(Compressor(["gzip"], minimum_size=512))
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as http:
+            gzipped = {"Accept-Encoding": "gzip"}
+            return (
+                await http.get("/big", headers=gzipped),
+                await http.get("/big", headers={"Accept-Encoding": "identity"}),
+                await http.get("/small", headers=gzipped),
+                await http.get("/encoded", headers=gzipped),
+                await http.get("/stream", headers=gzipped),
+            )
+
+    big, plain, small, encoded, stream = asyncio.run(scenario())
+    assert big.headers["Content-Encoding"] == "gzip"
+    assert big.headers["Vary"] == "Accept-Encoding"
+    assert big.headers["ETag"] == 'W/"abc"'
+    assert int(big.headers["Content-Length"]) < len(BODY) / 5
+    assert big.content == BODY
+
+    assert "Content-Encoding" not in plain.headers and plain.headers["ETag"] == '"abc"'
+    assert plain.headers["Vary"] == "Accept-Encoding"
+    assert "Content-Encoding" not in small.headers and small.json() == {"ok": True}
+    assert encoded.content == BODY
+
+    assert stream.headers["Content-Encoding"] == "gzip" and "Content-Length" not in stream.headers
+    assert stream.text.splitlines() == ['{"id":0}', '{"id":1}', '{"id":2}']
+
+
+def test_streamed_chunks_are_flushed():
+    """Test each streamed chunk decompresses on its own, so clients see rows as they are produced"""
+    write, finish = Compressor(["gzip"]).stream("gzip")
+    decompressor = zlib.decompressobj(31)
+    assert decompressor.decompress(write(b'{"id":0}\n')) == b'{"id":0}\n'
+    assert decompressor.decompress(write(b'{"id":1}\n') + finish()) == b'{"id":1}\n'
+    assert decompressor.eof
@@ -0,0 +1,108 @@
+import asyncio
+import os
+from dataclasses import replace
+import pytest
+from .test_main import client
+from .main import app
+from .dependencies import app_settings, auth_dependency
+from .auth.auth import extract_token
+from .settings import get_settings
+from .fixtures import *
+
+
+@pytest.fixture
+def database(postgres_db):
+    """PostgresDatabase over the postgres_db schema; a fresh connection per query so it works from any event loop."""
+    pytest.importorskip("greenlet")
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+    from .database import PostgresDatabase, async_database_url
+
+    engine = create_async_engine(async_database_url(os.environ["TEST_DATABASE_URL"]), poolclass=NullPool)
+    yield PostgresDatabase(engine=engine)
+    asyncio.run(engine.dispose())
+
+
+def recipe_row(user_id, name, ingredients=(), **metadata):
+    return {
+        "user_id": user_id,
+        "name": name,
+        "ingredients": [{"name": ingredient} for ingredient in ingredients],
+        "preparation": [{"text": "Cook"}],
+        "metadata": metadata
+    }
+
+
+def test_sql_store_applies_row_level_security(database):
+    """Test every query runs as the caller: other users' recipes are invisible and can't be written"""
+    alice, bob = database.for_user("alice"), database.for_user("bob")
+
+    async def scenario():
+        created = await alice.insert([recipe_row("alice", name) for name in ("Soup", "Stew", "Pie")])
+        await bob.insert(recipe_row("bob", "Tart"))
+        with pytest.raises(Exception):
+            await bob.insert(recipe_row("alice", "Forged"))
+
+        first = await alice.list_page("id,created_at,name", None, 2)
+        pages = [page async for page in alice.pages("id,created_at,name", page_size=2)]
+        fetched = await bob.get_many([row["id"] for row in created], "id,name")
+        not_deleted = await bob.delete([created[0]["id"]])
+        deleted = await alice.delete([created[0]["id"]])
+        return created, first, pages, fetched, not_deleted, deleted, await alice.sync_version(), await alice.changes(None)
+
+    created, first, pages, fetched, not_deleted, deleted, version, changes = asyncio.run(scenario())
+    assert isinstance(created[0]["created_at"], str)
+    assert [row["name"] for row in first] == ["Pie", "Stew", "Soup"]
+    assert [[row["name"] for row in page] for page in pages] == [["Pie", "Stew"], ["Soup"]]
+    assert fetched == [] and not_deleted == []
+    assert deleted == [{"id": created[0]["id"]}]
+    assert version == 4
+    assert [recipe["name"] for recipe in changes["recipes"]] == ["Pie", "Stew"]
+
+
+def test_sql_store_search_matches_the_rpc(database):
+    store = database.for_user("alice")
+
+    async def scenario():
+        await store.insert([
+            recipe_row("alice", "Tomato soup", ["tomatoes"], cuisine="Italian", type="soup"),
+            recipe_row("alice", "Green curry", ["chicken"], cuisine="Thai", type="entree"),
+        ])
+        return await asyncio.gather(store.search({"q": "soup"}, "id,name", 10, 0), store.search_facets({"q": "soup"}))
+
+    results, facets = asyncio.run(scenario())
+    assert [row["name"] for row in results] == ["Tomato soup"]
+    assert facets["cuisine"] == {"Italian": 1}
+
+
+def test_recipe_routes_on_postgres_backend(database, mock_auth_dependency, mock_extract_token):
+    """Test the recipe routes read and write through the SQL store when DATA_BACKEND=postgres"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    app.dependency_overrides[app_settings] = lambda: replace(get_settings(), data_backend="postgres")
+    app.state.database = database
+    override_recipe_cache()
+    try:
+        recipe_data = {
+            "name": "Tomato soup",
+            "preparation": [{"text": "Simmer"}],
+            "ingredients": [{"name": "tomatoes"}],
+            "totalTime": "30",
+            "type": "soup",
+            "cuisine": "Italian"
+        }
+        assert client.post("/recipes/create-recipe", json=recipe_data).status_code == 200
+
+        recipes = client.get("/recipes/").json()
+        assert [recipe["name"] for recipe in recipes] == ["Tomato soup"]
+        assert client.get("/recipes/search", params={"q": "tomato"}).json()["results"][0]["id"] == recipes[0]["id"]
+        cookable = client.post("/recipes/what-can-i-cook", json={"ingredients": ["tomato"]}).json()
+        assert cookable["total"] == 1 and cookable["results"][0]["coverage"] == 1.0
+        assert client.get("/recipes/sync").json()["version"] == 1
+
+        assert client.request("DELETE", "/recipes/delete-recipe", json={"id": recipes[0]["id"]}).status_code == 200
+        assert client.get("/recipes/").json() == []
+    finally:
+        del app.state.database
+        restore_supabase()
+        app.dependency_overrides.clear()
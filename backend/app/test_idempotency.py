@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from .cache import InMemoryLRUCache, RedisCache
+from .fixtures import FakeRedis
+from .idempotency import IdempotencyKeys
+
+
+@pytest.fixture(params=["memory", "redis"])
+def keys(request):
+    backend = InMemoryLRUCache() if request.param == "memory" else RedisCache(FakeRedis())
+    return IdempotencyKeys(backend, "create-user", ttl=60)
+
+
+def test_same_key_runs_once_and_replays(keys):
+    """Test concurrent and later retries with one key share the first run's response"""
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"status": "success"}
+
+    async def scenario():
+        first = await asyncio.gather(*(keys.run("k", {"id": "a"}, operation) for _ in range(3)))
+        return first, await keys.run("k", {"id": "a"}, operation)
+
+    first, later = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [replayed for _, replayed in first] == [False, True, True]
+    assert later == ({"status": "success"}, True)
+
+
+def test_key_reused_with_other_payload_is_rejected(keys):
+    async def operation():
+        return {"status": "success"}
+
+    async def scenario():
+        await keys.run("k", {"id": "a"}, operation)
+        await keys.run("k", {"id": "b"}, operation)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+    assert error.value.status_code == 422
+
+
+def test_failures_are_not_remembered(keys):
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("PostgREST unavailable")
+        return {"status": "success"}
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await keys.run("k", {"id": "a"}, flaky)
+        return await keys.run("k", {"id": "a"}, flaky)
+
+    assert asyncio.run(scenario()) == ({"status": "success"}, False)
+    assert len(attempts) == 2
+
+
+def test_retry_while_saving_replays(keys):
+    """Test a retry that arrives while the response is being stored doesn't run the operation again"""
+    calls = []
+    set_response = keys.backend.set
+
+    async def operation():
+        calls.append(1)
+        return {"status": "success"}
+
+    async def slow_set(key, value, ttl):
+        await asyncio.sleep(0.01)
+        await set_response(key, value, ttl)
+
+    async def scenario():
+        first = asyncio.ensure_future(keys.run("k", {"id": "a"}, operation))
+        await asyncio.sleep(0)
+        retry = await keys.run("k", {"id": "a"}, operation)
+        return await first, retry
+
+    keys.backend.set = slow_set
+    first, retry = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert first == ({"status": "success"}, False)
+    assert retry == ({"status": "success"}, True)
+    assert keys._in_flight == {}
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from .ingredient_index import IngredientIndex, IngredientIndexStore, iter_slots, normalize_ingredient
+
+
+def recipe(recipe_id, *names):
+    return {"id": recipe_id, "ingredients": [{"name": name, "amount": "1"} for name in names]}
+
+
+def test_normalize_ingredient():
+    """Test case, punctuation and simple plurals don't affect matching"""
+    assert normalize_ingredient("  Cherry Tomatoes, ") == "cherry tomato"
+    assert normalize_ingredient("berries") == "berry"
+    assert normalize_ingredient("Peaches") == "peach"
+    assert normalize_ingredient("couscous") == "couscous"
+    assert normalize_ingredient("") is None
+    assert normalize_ingredient(None) is None
+
+
+def test_iter_slots():
+    assert list(iter_slots(0)) == []
+    assert list(iter_slots(0b1010_0000_0001 | 1 << 70)) == [0, 9, 11, 70]
+
+
+def test_match_ranks_by_coverage():
+    """Test recipes are ranked by the fraction of their ingredients on hand"""
+    index = IngredientIndex()
+    index.add([
+        recipe(1, "tomato", "basil", "pasta", "garlic"),
+        recipe(2, "tomato", "basil"),
+        recipe(3, "chicken", "rice"),
+        recipe(4, "Tomatoes", "bread"),
+        recipe(5, "garlic", "bread"),
+    ])
+
+    matches, total = index.match(["tomatoes", "Basil", "garlic", "salt"])
+
+    assert total == 4
+    assert [(m.recipe_id, m.coverage, m.matched, m.required) for m in matches] == [
+        (2, 1.0, 2, 2),
+        (1, 0.75, 3, 4),
+        (5, 0.5, 1, 2),
+        (4, 0.5, 1, 2),
+    ]
+    assert matches[1].missing == ["pasta"]
+
+    matches, total = index.match(["tomato", "basil", "garlic"], min_coverage=0.75)
+    assert [m.recipe_id for m in matches] == [2, 1]
+    assert total == 2
+
+    assert index.match(["saffron"]) == ([], 0)
+
+
+def test_match_pages():
+    index = IngredientIndex()
+    index.add([recipe(i, "flour", f"extra {i}" if i % 2 else "flour") for i in range(1, 31)])
+
+    everything, total = index.match(["flour"], limit=30)
+    pages = [index.match(["flour"], limit=7, offset=offset)[0] for offset in range(0, 30, 7)]
+
+    assert total == 30
+    assert [m.recipe_id for page in pages for m in page] == [m.recipe_id for m in everything]
+    # Single-ingredient recipes (even ids) cover fully and come first, newest first.
+    assert [m.recipe_id for m in everything[:3]] == [30, 28, 26]
+
+
+def test_incremental_updates_match_a_rebuild():
+    """Test adding, replacing and removing recipes gives the same results as indexing from scratch"""
+    rows = [recipe(i, "egg", "milk" if i % 3 else "cheese", f"herb {i % 4}") for i in range(1, 41)]
+    index = IngredientIndex()
+    index.add(rows)
+
+    index.remove([3, 7, 8, 99])
+    index.add([recipe(7, "egg", "herb 1"), recipe(41, "milk")])
+    expected = IngredientIndex()
+    expected.add([row for row in rows if row["id"] not in (3, 7, 8)] + [recipe(7, "egg", "herb 1"), recipe(41, "milk")])
+
+    for pantry in (["egg"], ["egg", "milk"], ["herb 1", "cheese", "egg"]):
+        assert index.match(pantry, limit=100) == expected.match(pantry, limit=100)
+    assert len(index) == 39
+    # Freed slots are reused so the bitmaps don't keep growing.
+    assert len(index._ids) == 40
+
+
+def test_store_checks_version_and_ttl():
+    """Test an index is only served for the version it was built or last updated at"""
+    store = IngredientIndexStore(maxsize=2, ttl=60)
+    index = IngredientIndex(version=b"v1")
+    index.add([recipe(1, "egg")])
+    store.put("alice", index)
+
+    assert store.get("alice", b"v1") is index
+    store.update("alice", b"v2", added=[recipe(2, "egg", "milk")], removed=[1])
+    assert store.get("alice", b"v1") is None
+
+    store.put("alice", index)
+    assert store.get("alice", b"v2") is index
+    assert [m.recipe_id for m in index.match(["egg"])[0]] == [2]
+
+    index.built_at = time.monotonic() - 61
+    assert store.get("alice", b"v2") is None
+
+    for user in ("alice", "bob", "carol"):
+        store.put(user, IngredientIndex())
+    assert store.get("alice", None) is None
+    assert store.get("carol", None) is not None
+
+
+def test_store_with_database_versions():
+    """Test database versions come from the RecipeStore and local writes drop the index"""
+    class Recipes:
+        version = 3
+
+        async def sync_version(self):
+            return self.version
+
+    store = IngredientIndexStore(database_versions=True)
+    recipes = Recipes()
+    version = asyncio.run(store.current_version("alice", recipes))
+    assert version == 3
+
+    store.put("alice", IngredientIndex(version))
+    assert store.get("alice", asyncio.run(store.current_version("alice", recipes))) is not None
+    recipes.version = 4
+    assert store.get("alice", asyncio.run(store.current_version("alice", recipes))) is None
+
+    store.put("alice", IngredientIndex(4))
+    store.update("alice", b"cache-token", added=[recipe(2, "egg")])
+    assert store.get("alice", 4) is None
@@ -0,0 +1,81 @@
+import io
+import json
+import threading
+from loguru import logger
+from . import logging_config
+from .logging_config import BackgroundJSONSink, LevelSampler
+
+
+class BlockingStream(io.StringIO):
+    """Stream whose writes stall until released, to simulate a slow log destination."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.release.wait(5)
+        return super().write(text)
+
+
+def test_level_sampler_keeps_configured_fraction():
+    """Test sampling thins only the configured level, at the configured rate"""
+    sampler = LevelSampler.parse("INFO=0.25")
+    record = lambda level: {"level": type("Level", (), {"name": level})}
+
+    assert sum(sampler(record("INFO")) for _ in range(100)) == 25
+    assert all(sampler(record("ERROR")) for _ in range(10))
+
+
+def test_background_sink_writes_structured_json():
+    """Test records are written as JSON lines with level, message and bound extras"""
+    stream = io.StringIO()
+    sink = BackgroundJSONSink(stream)
+    handler = logger.add(sink, format="{message}")
+
+    logger.bind(request_id="abc").info("hello {}", "world")
+    logger.remove(handler)
+    sink.stop()
+
+    record = json.loads(stream.getvalue().splitlines()[-1])
+    assert record["level"] == "INFO"
+    assert record["message"] == "hello world"
+    assert record["extra"] == {"request_id": "abc"}
+    assert sink.stats()["written"] == 1
+
+
+def test_background_sink_drops_instead_of_blocking():
+    """Test a full queue drops and counts records rather than blocking the caller"""
+    stream = BlockingStream()
+    sink = BackgroundJSONSink(stream, max_queue=2, batch_size=1)
+    handler = logger.add(sink, format="{message}")
+
+    for i in range(20):
+        logger.warning("message {}", i)
+    logger.remove(handler)
+
+    assert sink.dropped > 0
+    stream.release.set()
+    sink.stop()
+
+    lines = [json.loads(line)["message"] for line in stream.getvalue().splitlines()]
+    written = [line for line in lines if line.startswith("message")]
+    assert f"Log queue full, dropped {sink.dropped} records" in lines
+    assert len(written) + sink.dropped == 20
+
+
+def test_reconfiguring_closes_the_previous_log_file(tmp_path):
+    """Test setting up logging again (as each gunicorn worker does) closes the LOG_FILE it opened before"""
+    log_file = str(tmp_path / "app.jsonl")
+    try:
+        logging_config.setup_logging("json", "INFO", "", log_file=log_file)
+        first = logging_config.log_stream
+        logger.info("first")
+        logging_config.setup_logging("json", "INFO", "", log_file=log_file)
+        assert first.closed and not logging_config.log_stream.closed
+        logger.info("second")
+    finally:
+        logging_config.setup_logging("text", "INFO", "", stream=io.StringIO())
+
+    assert logging_config.log_stream is None
+    assert [json.loads(line)["message"] for line in open(log_file)] == ["first", "second"]
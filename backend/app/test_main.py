@@ -1,5 +1,7 @@
 from fastapi.testclient import TestClient
-from .main import app
+from .main import app, create_app
+from .settings import Settings
+from .fixtures import *
 from .models.models import User, Recipe
 
 client = TestClient(app)
@@ -7,4 +9,101 @@ client = TestClient(app)
 def test_read_main(): 
     response = client.get("/")
     assert response.status_code == 200
-    assert response.json() == {"Hello": "there"}
\ No newline at end of file
+    assert response.json() == {"Hello": "there"}
+
+def warm_settings(jwks_url, proj_url):
+    return Settings(
+        proj_url=proj_url,
+        anon_key="anon-key",
+        region=TEST_REGION,
+        cognito_user_pool_id=TEST_USER_POOL_ID,
+        cognito_app_client_id=TEST_AUDIENCE,
+        cognito_jwks_url=jwks_url,
+        recipe_cache_backend="none",
+        log_format="json",
+        startup_warmup=True,
+        warmup_connections=2
+    )
+
+
+def test_startup_warmup_prefetches_jwks(stub_jwks_server, fake_postgrest):
+    url, stop = serve_in_thread(fake_postgrest)
+    try:
+        warm_app = create_app(warm_settings(stub_jwks_server.url, url))
+        with TestClient(warm_app) as warm_client:
+            assert stub_jwks_server.fetch_count == 1
+
+            token = make_id_token("key-1", sub="warm-user")
+            response = warm_client.get("/recipes/", headers={"Authorization": f"Bearer {token}"})
+
+            assert response.status_code == 200
+            assert stub_jwks_server.fetch_count == 1
+    finally:
+        stop()
+
+
+def test_startup_warmup_failure_does_not_block_startup(stub_jwks_server):
+    stub_jwks_server.fail = True
+    warm_app = create_app(warm_settings(stub_jwks_server.url, "http://127.0.0.1:9"))
+
+    with TestClient(warm_app) as warm_client:
+        assert warm_client.get("/").status_code == 200
+    assert stub_jwks_server.fetch_count == 1
+
+
+def worker_apps(settings, fake, recipe_cache=None):
+    """Two apps built from the same settings, standing in for two gunicorn workers over one database."""
+    from .auth.auth import extract_token
+    from .dependencies import auth_dependency, get_recipe_cache, get_supabase
+    from .supabase_clients import SupabaseClients
+
+    clients = []
+    for _ in range(2):
+        worker = create_app(settings)
+        pool = SupabaseClients(
+            url="http://fake-postgrest", anon_key="anon-key",
+            http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake))
+        )
+        worker.dependency_overrides[get_supabase] = (lambda pool: lambda: pool)(pool)
+        worker.dependency_overrides[auth_dependency] = lambda: {"sub": "test-user-123"}
+        worker.dependency_overrides[extract_token] = lambda: "mock-jwt-token"
+        if recipe_cache is not None:
+            worker.dependency_overrides[get_recipe_cache] = lambda: recipe_cache
+        clients.append(TestClient(worker))
+    return clients
+
+
+def test_memory_cache_refused_with_several_workers():
+    with pytest.raises(ValueError):
+        create_app(Settings(workers=2, recipe_cache_backend="memory"))
+    create_app(Settings(workers=1, recipe_cache_backend="memory"))
+
+
+@pytest.mark.parametrize("shared_cache", [False, True])
+def test_workers_see_each_others_writes(shared_cache):
+    """Test a write through one worker is visible to listings and pantry matching on another"""
+    from .cache import RedisCache, UserResponseCache
+
+    fake = FakePostgREST()
+    fake.insert("recipes", [{"name": "Soup", "user_id": "test-user-123", "ingredients": [{"name": "tomato"}]}])
+    # No coalescing window: a read shared for 50ms after it finished is stale by design.
+    settings = Settings(workers=2, recipe_cache_backend="redis" if shared_cache else "none", read_coalesce_window=0)
+    cache = UserResponseCache(RedisCache(FakeRedis()), "recipes") if shared_cache else None
+    writer, reader = worker_apps(settings, fake, cache)
+    pantry = {"ingredients": ["tomato", "lettuce"]}
+
+    assert [recipe["name"] for recipe in reader.get("/recipes/").json()] == ["Soup"]
+    assert reader.post("/recipes/what-can-i-cook", json=pantry).json()["total"] == 1
+    # The index is kept between queries: only its version and the matched rows are fetched.
+    requests = fake.requests
+    assert reader.post("/recipes/what-can-i-cook", json=pantry).json()["total"] == 1
+    assert fake.requests - requests == (1 if shared_cache else 2)
+
+    created = writer.post("/recipes/create-recipe", json={
+        "name": "Salad", "preparation": [{"text": "Toss"}], "ingredients": [{"name": "lettuce", "amount": "1 head"}],
+        "totalTime": "5 minutes", "type": "side", "cuisine": "French"
+    })
+    assert created.status_code == 200
+
+    assert [recipe["name"] for recipe in reader.get("/recipes/").json()] == ["Salad", "Soup"]
+    assert reader.post("/recipes/what-can-i-cook", json=pantry).json()["total"] == 2
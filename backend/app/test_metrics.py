@@ -0,0 +1,48 @@
+from .test_main import client
+from .main import app
+from .dependencies import auth_dependency
+from .auth.auth import extract_token
+from .metrics import Counter, Histogram, Registry, REQUEST_DURATION, DB_REQUEST_DURATION
+from .fixtures import *
+
+
+def test_registry_renders_prometheus_text():
+    """Test counters and cumulative histogram buckets render in exposition format"""
+    registry = Registry()
+    requests = Counter("requests_total", "Requests", ["route"], registry=registry)
+    latency = Histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0), registry=registry)
+
+    requests.inc('/a"b')
+    latency.observe(0.05, "/a")
+    latency.observe(0.1, "/a")
+    latency.observe(5, "/a")
+
+    text = registry.render()
+    assert '# TYPE requests_total counter' in text
+    assert 'requests_total{route="/a\\"b"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+
+
+def test_metrics_endpoint_reports_routes_and_db_calls(fake_postgrest, mock_auth_dependency, mock_extract_token):
+    """Test requests are recorded by route template and PostgREST calls by table"""
+    app.dependency_overrides[auth_dependency] = mock_auth_dependency
+    app.dependency_overrides[extract_token] = mock_extract_token
+    routes_before = REQUEST_DURATION.count("GET", "/recipes/", "200")
+    db_before = DB_REQUEST_DURATION.count("GET", "recipes", "200")
+
+    assert client.get("/recipes/").status_code == 200
+    client.get("/no-such-page")
+
+    assert REQUEST_DURATION.count("GET", "/recipes/", "200") == routes_before + 1
+    assert REQUEST_DURATION.count("GET", "<unmatched>", "404") >= 1
+    assert DB_REQUEST_DURATION.count("GET", "recipes", "200") == db_before + 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'hasha_http_request_duration_seconds_count{method="GET",route="/recipes/",status="200"}' in response.text
+    assert "hasha_http_requests_in_flight" in response.text
+    app.dependency_overrides.clear()
@@ -0,0 +1,52 @@
+import json
+import os
+import pstats
+import pytest
+from fastapi.testclient import TestClient
+from .main import app, create_app
+from .profiling import ProfilingMiddleware
+from .settings import Settings
+from .fixtures import make_id_token
+
+
+def test_header_triggers_pstats_profile(tmp_path):
+    """Test only requests with the secret header are profiled, named by route and user"""
+    profiled = TestClient(ProfilingMiddleware(app, directory=str(tmp_path), header_secret="s3cret"))
+
+    profiled.get("/")
+    profiled.get("/", headers={"X-Profile": "wrong"})
+    assert os.listdir(tmp_path) == []
+
+    token = make_id_token(sub="user-42")
+    profiled.get("/", headers={"X-Profile": "s3cret", "Authorization": f"Bearer {token}"})
+
+    [name] = os.listdir(tmp_path)
+    assert "_GET_root_" in name and name.endswith("ms.pstats")
+    assert "user-42" not in name and "anonymous" not in name
+    assert pstats.Stats(str(tmp_path / name)).total_calls > 0
+
+
+def test_header_ignored_without_secret(tmp_path):
+    """Test X-Profile can't trigger profiling when no secret is configured, and the app refuses to start that way"""
+    profiled = TestClient(ProfilingMiddleware(app, directory=str(tmp_path)))
+
+    assert profiled.get("/", headers={"X-Profile": "1"}).status_code == 200
+    assert os.listdir(tmp_path) == []
+
+    with pytest.raises(ValueError):
+        create_app(Settings(profiling_enabled=True))
+    create_app(Settings(profiling_enabled=True, profile_header_secret="s3cret"))
+
+
+def test_sampled_speedscope_profile(tmp_path):
+    """Test sampling mode writes a speedscope document"""
+    profiled = TestClient(ProfilingMiddleware(app, directory=str(tmp_path), mode="sample", sample_rate=1.0))
+
+    profiled.get("/metrics")
+
+    [name] = os.listdir(tmp_path)
+    assert "_GET_metrics_anonymous_" in name and name.endswith(".speedscope.json")
+    document = json.loads((tmp_path / name).read_text())
+    profile = document["profiles"][0]
+    assert profile["type"] == "sampled"
+    assert len(profile["samples"]) == len(profile["weights"])
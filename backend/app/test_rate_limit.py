@@ -0,0 +1,82 @@
+import asyncio
+import uuid
+import pytest
+from .fixtures import FakeRedis, redis_url
+from .rate_limit import TOKEN_BUCKET_SCRIPT, InMemoryRateLimiter, RedisRateLimiter, gcra, retry_after_header
+
+
+def test_gcra_allows_a_burst_then_the_sustained_rate():
+    """Test `burst` requests pass at once, then one per interval"""
+    tat, decisions = None, []
+    for _ in range(4):
+        allowed, new_tat, retry_after = gcra(tat, 100.0, 0.5, 3)
+        decisions.append((allowed, retry_after))
+        tat = new_tat
+    assert decisions == [(True, 0.0), (True, 0.0), (True, 0.0), (False, 0.5)]
+
+    assert gcra(tat, 100.5, 0.5, 3)[0] is True
+    # A long pause refills the bucket, but never beyond `burst`.
+    tat = gcra(tat, 1000.0, 0.5, 3)[1]
+    assert [gcra(tat + 0.5 * i, 1000.0, 0.5, 3)[0] for i in range(3)] == [True, True, False]
+
+
+@pytest.fixture(params=["memory", "redis"])
+def limiter(request):
+    if request.param == "memory":
+        return InMemoryRateLimiter(rate=1, burst=2)
+    return RedisRateLimiter(FakeRedis(), rate=1, burst=2)
+
+
+def test_buckets_are_per_user(limiter):
+    async def scenario():
+        alice = [await limiter.hit("alice") for _ in range(3)]
+        bob = await limiter.hit("bob")
+        return alice, bob
+
+    alice, bob = asyncio.run(scenario())
+    assert [allowed for allowed, _ in alice] == [True, True, False]
+    assert 0 < alice[2][1] <= 1
+    assert bob == (True, 0.0)
+
+
+def test_token_bucket_script_on_redis(redis_url):
+    """Test TOKEN_BUCKET_SCRIPT itself on a real server: burst, refusal, per-user keys, expiry and refill"""
+    import redis.asyncio as redis
+
+    prefix = f"ratelimit-test-{uuid.uuid4().hex}"
+
+    async def scenario():
+        client = redis.from_url(redis_url)
+        limiter = RedisRateLimiter(client, rate=10, burst=2, prefix=prefix)
+        try:
+            # Called directly so a script error fails the test instead of failing open.
+            first = await client.eval(TOKEN_BUCKET_SCRIPT, 1, f"{prefix}:alice", limiter.interval * 1000, limiter.burst)
+            second, third = await limiter.hit("alice"), await limiter.hit("alice")
+            bob = await limiter.hit("bob")
+            ttl = await client.pttl(f"{prefix}:alice")
+            await asyncio.sleep(0.15)
+            refilled = await limiter.hit("alice")
+        finally:
+            await client.delete(f"{prefix}:alice", f"{prefix}:bob")
+            await limiter.aclose()
+        return first, second, third, bob, ttl, refilled
+
+    first, second, third, bob, ttl, refilled = asyncio.run(scenario())
+    assert list(first) == [1, 0]
+    assert second == (True, 0.0)
+    assert third[0] is False and 0 < third[1] <= 0.1
+    assert bob == (True, 0.0)
+    assert 0 < ttl <= 200
+    assert refilled == (True, 0.0)
+
+
+def test_redis_outage_fails_open():
+    class Down:
+        async def eval(self, *args):
+            raise ConnectionError("redis down")
+
+    assert asyncio.run(RedisRateLimiter(Down(), rate=1, burst=1).hit("alice")) == (True, 0.0)
+
+
+def test_retry_after_header_rounds_up():
+    assert [retry_after_header(seconds) for seconds in (0.0, 0.2, 1.0, 1.01)] == ["1", "1", "1", "2"]
@@ -0,0 +1,74 @@
+import json
+from .fixtures import *
+
+ROWS = [
+    ("cook-a", "Spicy tomato soup", [{"name": "tomatoes"}, {"name": "chili"}], [{"text": "Simmer gently"}],
+     {"cuisine": "Italian", "type": "soup", "total_time": "30"}),
+    ("cook-a", "Chicken curry", [{"name": "chicken"}, {"name": "tomato paste"}], [{"text": "Fry the onions"}],
+     {"cuisine": "Indian", "type": "entree", "total_time": "45"}),
+    ("cook-a", "Green salad", [{"name": "lettuce"}], [{"text": "Toss"}],
+     {"cuisine": "American", "type": "side", "total_time": "10 mins"}),
+    ("cook-b", "Tomato tart", [{"name": "tomatoes"}], [{"text": "Bake"}],
+     {"cuisine": "French", "type": "entree", "total_time": "60"}),
+]
+
+
+def seed(conn):
+    with conn.cursor() as cursor:
+        cursor.executemany(
+            "insert into public.recipes (user_id, name, ingredients, preparation, metadata) values (%s, %s, %s, %s, %s)",
+            [(user, name, json.dumps(ingredients), json.dumps(preparation), json.dumps(metadata))
+             for user, name, ingredients, preparation, metadata in ROWS]
+        )
+
+
+def test_search_recipes_function(postgres_db):
+    seed(postgres_db)
+    act_as(postgres_db, "cook-a")
+
+    names = [row[0] for row in postgres_db.execute("select name from public.search_recipes(q => 'tomatoes')")]
+    # Name matches (weight A) outrank ingredient matches (B); cook-b's tart is hidden by RLS.
+    assert names == ["Spicy tomato soup", "Chicken curry"]
+
+    names = [row[0] for row in postgres_db.execute("select name from public.search_recipes(min_time => 20, max_time => 40)")]
+    assert names == ["Spicy tomato soup"]
+
+    names = [row[0] for row in postgres_db.execute("select name from public.search_recipes(recipe_type => 'side')")]
+    assert names == ["Green salad"]
+
+
+def test_recipe_search_facets_function(postgres_db):
+    seed(postgres_db)
+    act_as(postgres_db, "cook-a")
+
+    facets = postgres_db.execute("select public.recipe_search_facets(q => 'tomato', cuisine => 'Indian')").fetchone()[0]
+
+    assert facets == {
+        "total": 1,
+        "cuisine": {"Italian": 1, "Indian": 1},
+        "type": {"entree": 1},
+        "total_time": {"31-60": 1}
+    }
+
+
+def explain_search(conn, q=None, cuisine=None, recipe_type=None, min_time=None, max_time=None):
+    """Plan of the query search_recipes builds and EXECUTEs for these filters."""
+    conditions = conn.execute(
+        "select public.recipe_search_conditions(%s::text, %s::text, %s::text, %s::integer, %s::integer)", (q, cuisine, recipe_type, min_time, max_time)
+    ).fetchone()[0]
+    for number, placeholder in enumerate(["%(q)s::text", "%(c)s::text", "%(t)s::text", "%(lo)s::integer", "%(hi)s::integer"], 1):
+        conditions = conditions.replace(f"${number}", placeholder)
+    params = dict(q=q, c=cuisine, t=recipe_type, lo=min_time, hi=max_time)
+    rows = conn.execute(f"explain select r.* from public.recipes r where {conditions}", params)
+    return "\n".join(row[0] for row in rows)
+
+
+def test_search_uses_indexes(postgres_db):
+    seed(postgres_db)
+    postgres_db.execute("analyze public.recipes")
+    postgres_db.execute("set enable_seqscan = off")
+
+    assert "recipes_search_document_idx" in explain_search(postgres_db, q="tomato")
+    assert "recipes_metadata_idx" in explain_search(postgres_db, cuisine="Indian")
+    assert "recipes_user_total_minutes_idx" in explain_search(postgres_db, max_time=20)
+    postgres_db.execute("reset enable_seqscan")
@@ -0,0 +1,12 @@
+import os
+from .server import default_workers
+
+
+def test_default_workers_uses_web_concurrency(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert default_workers() == 3
+
+
+def test_default_workers_follows_cpu_count(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert default_workers() == len(os.sched_getaffinity(0))
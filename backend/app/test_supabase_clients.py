@@ -0,0 +1,53 @@
+import asyncio
+import httpx
+import pytest
+from .supabase_clients import SupabaseClients
+
+
+@pytest.fixture
+def captured():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=[])
+
+    pool = SupabaseClients(
+        url="http://supabase.local",
+        anon_key="anon-key",
+        service_role="service-key",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    yield pool, requests
+    asyncio.run(pool.aclose())
+
+
+def test_user_view_applies_caller_jwt(captured):
+    """Test per-request views send the caller's token for RLS over the shared client"""
+    pool, requests = captured
+
+    asyncio.run(pool.for_user("token-a").from_("recipes").select("*").execute())
+    asyncio.run(pool.for_user("token-b").from_("recipes").select("*").execute())
+
+    assert [r.headers["Authorization"] for r in requests] == ["Bearer token-a", "Bearer token-b"]
+    assert all(r.headers["apikey"] == "anon-key" for r in requests)
+    assert str(requests[0].url).startswith("http://supabase.local/rest/v1/recipes")
+    assert pool.for_user("token-a").session is pool.for_user("token-b").session
+
+
+def test_service_view_uses_service_role(captured):
+    """Test the service view authenticates with the service role key"""
+    pool, requests = captured
+
+    asyncio.run(pool.service().table("users").insert({"cognito_id": "abc"}).execute())
+
+    assert requests[0].headers["apikey"] == "service-key"
+    assert requests[0].headers["Authorization"] == "Bearer service-key"
+
+
+def test_service_view_requires_service_role():
+    """Test a missing service role key fails loudly instead of falling back to anon"""
+    pool = SupabaseClients(url="http://supabase.local", anon_key="anon-key")
+    with pytest.raises(RuntimeError):
+        pool.service()
+    asyncio.run(pool.aclose())
@@ -0,0 +1,56 @@
+from .fixtures import *
+
+
+def insert(conn, *names):
+    for name in names:
+        conn.execute("insert into public.recipes (user_id, name) values ((select current_setting('request.jwt.claims')::jsonb ->> 'sub'), %s)", (name,))
+
+
+def changes(conn, since=None):
+    return conn.execute("select public.recipe_changes(%s::bigint)", (since,)).fetchone()[0]
+
+
+def test_writes_bump_the_owners_version(postgres_db):
+    act_as(postgres_db, "cook-a")
+    insert(postgres_db, "Soup", "Stew", "Pie")
+    postgres_db.execute("delete from public.recipes where name = 'Stew'")
+    act_as(postgres_db, "cook-b")
+    insert(postgres_db, "Tart")
+
+    assert changes(postgres_db)["version"] == 1
+    act_as(postgres_db, "cook-a")
+    full = changes(postgres_db)
+    assert full["version"] == 4 and full["full"] is True
+    assert [recipe["name"] for recipe in full["recipes"]] == ["Pie", "Soup"]
+    assert "sync_version" not in full["recipes"][0]
+
+    delta = changes(postgres_db, 2)
+    assert [recipe["name"] for recipe in delta["recipes"]] == ["Pie"]
+    assert len(delta["deleted"]) == 1 and delta["full"] is False
+    assert changes(postgres_db, 4) == {"version": 4, "full": False, "recipes": [], "deleted": []}
+
+
+def test_clients_cannot_forge_versions(postgres_db):
+    """Test versions and tombstones are only written by the triggers"""
+    psycopg = pytest.importorskip("psycopg")
+    act_as(postgres_db, "cook-a")
+
+    with pytest.raises(psycopg.errors.InsufficientPrivilege):
+        postgres_db.execute("select public.bump_recipe_sync_version('cook-b')")
+    with pytest.raises(psycopg.errors.InsufficientPrivilege):
+        postgres_db.execute("insert into public.recipe_tombstones (user_id, version, recipe_id) values ('cook-a', 99, 1)")
+
+
+def test_pruned_history_forces_full_sync(postgres_db):
+    act_as(postgres_db, "cook-a")
+    insert(postgres_db, "Soup", "Stew")
+    postgres_db.execute("delete from public.recipes where name = 'Soup'")
+
+    postgres_db.execute("reset role")
+    postgres_db.execute("update public.recipe_tombstones set deleted_at = now() - interval '60 days'")
+    assert postgres_db.execute("select public.prune_recipe_tombstones()").fetchone()[0] == 1
+
+    act_as(postgres_db, "cook-a")
+    # Version 3 was the pruned delete: clients at 2 missed it, clients at 3 saw it.
+    assert changes(postgres_db, 2)["full"] is True
+    assert changes(postgres_db, 3)["full"] is False
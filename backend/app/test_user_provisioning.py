@@ -0,0 +1,75 @@
+import asyncio
+from .user_provisioning import UserWriteBatcher, user_row
+
+
+class RecordingWriter:
+    def __init__(self, delay: float = 0, reject=()):
+        self.delay = delay
+        self.reject = set(reject)
+        self.batches = []
+
+    async def __call__(self, rows):
+        await asyncio.sleep(self.delay)
+        if any(row["username"] in self.reject for row in rows):
+            raise RuntimeError("duplicate username")
+        self.batches.append([row["cognito_id"] for row in rows])
+
+
+def rows(*subs):
+    return [user_row({"id": sub, "email": f"{sub}@example.com"}) for sub in subs]
+
+
+def test_user_row_defaults_username():
+    assert user_row({"id": "abc", "email": "cook@example.com"}) == {"cognito_id": "abc", "username": "cook"}
+    assert user_row({"id": "abc"})["username"] == "unknown"
+
+
+def test_concurrent_submits_share_one_write():
+    """Test a burst goes out as one multi-row write and duplicates of a sub are written once"""
+    write = RecordingWriter()
+    writer = UserWriteBatcher(write, max_batch=10, max_delay=0.01)
+
+    async def scenario():
+        await asyncio.gather(*(writer.submit(row) for row in rows("a", "b", "c", "a")))
+
+    asyncio.run(scenario())
+    assert write.batches == [["a", "b", "c"]]
+
+
+def test_full_batch_is_written_without_waiting():
+    write = RecordingWriter()
+    writer = UserWriteBatcher(write, max_batch=2, max_delay=60)
+
+    async def scenario():
+        await asyncio.wait_for(asyncio.gather(*(writer.submit(row) for row in rows("a", "b", "c", "d"))), 1)
+
+    asyncio.run(scenario())
+    assert write.batches == [["a", "b"], ["c", "d"]]
+
+
+def test_failed_batch_only_fails_the_bad_row():
+    """Test a batch that fails is retried row by row so the other callers still succeed"""
+    write = RecordingWriter(reject={"b"})
+    writer = UserWriteBatcher(write, max_batch=10, max_delay=0.01)
+
+    async def scenario():
+        return await asyncio.gather(*(writer.submit(row) for row in rows("a", "b", "c")), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], RuntimeError)
+    assert sorted(write.batches) == [["a"], ["c"]]
+
+
+def test_aclose_writes_queued_rows():
+    write = RecordingWriter(delay=0.01)
+    writer = UserWriteBatcher(write, max_batch=10, max_delay=60)
+
+    async def scenario():
+        submitted = asyncio.ensure_future(writer.submit(rows("a")[0]))
+        await asyncio.sleep(0)
+        await writer.aclose()
+        await submitted
+
+    asyncio.run(scenario())
+    assert write.batches == [["a"]]
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+from .metrics import USER_WRITE_BATCH_ROWS, USER_WRITE_DURATION
+
+Row = Dict[str, Any]
+
+
+def user_row(body: Dict[str, Any]) -> Row:
+    """users row for a post-confirmation payload ({"id": <Cognito sub>, "email": ...})."""
+    return {
+        "cognito_id": body["id"],
+        "username": (body.get("email") or "unknown").split("@")[0]
+    }
+
+
+async def upsert_users(supabase, rows: List[Row]) -> List[Row]:
+    """
+    Insert users, skipping any whose cognito_id already exists.
+
+    Existing rows are left untouched, so a retried or duplicated sign-up is a
+    no-op rather than a duplicate-key error. Returns only the newly inserted rows.
+    """
+    result = await supabase.service().table("users").upsert(
+        rows, on_conflict="cognito_id", ignore_duplicates=True
+    ).execute()
+    return result.data or []
+
+
+class UserWriteBatcher:
+    def __init__(
+        self,
+        write: Callable[[List[Row]], Awaitable[Any]],
+        max_batch: int = 50,
+        max_delay: float = 0.02
+    ):
+        """
+        Coalesces concurrent user provisioning into multi-row upserts.
+
+        Rows queue until `max_batch` are waiting or `max_delay` seconds have passed
+        since the first, then go out in one write; each submit() returns only once
+        the write holding its row has committed. If a batch fails, its rows are
+        retried one by one so a single bad row only fails its own caller.
+
+        Args:
+            write: Writes a list of rows (e.g. upsert_users bound to a client pool)
+            max_batch: Most rows per write
+            max_delay: Longest a row waits for others to join its batch
+        """
+        self.write = write
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: List[Tuple[Row, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes = set()
+
+    async def submit(self, row: Row) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._flush)
+        await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._write(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch: List[Tuple[Row, asyncio.Future]]) -> None:
+        # One row per cognito_id: a retry racing its original shares the same write.
+        rows = list({row["cognito_id"]: row for row, _ in batch}.values())
+        start = time.perf_counter()
+        try:
+            await self.write(rows)
+        except Exception as e:
+            USER_WRITE_DURATION.observe(time.perf_counter() - start, "error")
+            if len(rows) == 1:
+                _settle(batch, e)
+                return
+            logger.warning(f"Batched write of {len(rows)} users failed ({type(e).__name__}: {e}), retrying rows one by one")
+            await asyncio.gather(*(self._write([item]) for item in batch))
+            return
+
+        USER_WRITE_DURATION.observe(time.perf_counter() - start, "ok")
+        USER_WRITE_BATCH_ROWS.observe(len(rows))
+        _settle(batch)
+
+    async def aclose(self) -> None:
+        """Write whatever is still queued and wait for in-flight writes."""
+        self._flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+def _settle(batch: List[Tuple[Row, asyncio.Future]], error: Optional[BaseException] = None) -> None:
+    for _, future in batch:
+        if future.done():
+            continue
+        if error is None:
+            future.set_result(None)
+        else:
+            future.set_exception(error)
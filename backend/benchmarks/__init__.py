@@ -0,0 +1,6 @@
+import os
+
+# The app reads these when it builds its clients; benchmarks run against local stand-ins,
+# so any placeholder values will do when no .env is present.
+for name, value in {"PROJ_URL": "http://localhost", "ANON_KEY": "anon", "SERVICE_ROLE": "service"}.items():
+    os.environ.setdefault(name, value)
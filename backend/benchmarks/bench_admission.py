@@ -0,0 +1,115 @@
+"""
+Benchmark: tail latency of GET /recipes/ under overload, with and without admission control.
+
+Serves the app twice from its own process (ADMISSION_MAX_IN_FLIGHT=0, then the
+given cap), talking to a fake PostgREST in a third process with --latency seconds
+per request over a --connections pool, and offers --rate requests/s open-loop
+(arrivals don't wait for responses) for --seconds. Pick a rate above the
+worker's capacity (run a low rate first to find it). Reports p50/p99/max
+latency of answered requests, how many were shed with 503, and goodput.
+Run from backend/:
+    python -m benchmarks.bench_admission --rate 40 --seconds 5
+"""
+import argparse
+import asyncio
+import functools
+import statistics
+import time
+import httpx
+from loguru import logger
+from app.auth.auth import extract_token
+from app.dependencies import auth_dependency, get_rate_limiter, get_read_coalescer, get_recipe_cache, get_supabase
+from app.fixtures import seeded_fake_postgrest, serve_in_process
+from app.main import create_app
+from app.settings import Settings
+from app.supabase_clients import SupabaseClients
+
+
+def build_app(args, admission: bool, fake_url: str):
+    settings = Settings(
+        metrics_enabled=False,
+        admission_max_in_flight=args.max_in_flight if admission else 0,
+        admission_max_queue=args.max_queue,
+        admission_queue_timeout=args.queue_timeout
+    )
+    app = create_app(settings)
+    pool = SupabaseClients(url=fake_url, anon_key="anon", max_connections=args.connections)
+    app.dependency_overrides.update({
+        get_supabase: lambda: pool,
+        get_recipe_cache: lambda: None,
+        get_read_coalescer: lambda: None,
+        get_rate_limiter: lambda: None,
+        auth_dependency: lambda: {"sub": "bench-user"},
+        extract_token: lambda: "bench-token",
+    })
+    return app
+
+
+async def overload(url, args):
+    latencies, statuses = [], []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as http:
+        async def get():
+            start = time.perf_counter()
+            response = await http.get("/recipes/", params={"limit": 20})
+            statuses.append(response.status_code)
+            if response.status_code == 200:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        requests = []
+        start = time.perf_counter()
+        for i in range(int(args.rate * args.seconds)):
+            # Open loop: the i-th arrival is due at i / rate regardless of how the server is doing.
+            delay = start + i / args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            requests.append(asyncio.ensure_future(get()))
+        await asyncio.gather(*requests)
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "max": latencies[-1],
+        "shed": statuses.count(503),
+        "goodput": len(latencies) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rate", type=float, default=40)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=8)
+    parser.add_argument("--queue-timeout", type=float, default=0.1)
+    args = parser.parse_args()
+
+    logger.remove()
+    fake_url, stop_fake = serve_in_process(functools.partial(seeded_fake_postgrest, latency=args.latency, recipes=200))
+    results = {}
+    try:
+        for label, admission in (("off", False), ("on", True)):
+            url, stop = serve_in_process(functools.partial(build_app, args, admission, fake_url))
+            try:
+                results[label] = asyncio.run(overload(url, args))
+            finally:
+                stop()
+    finally:
+        stop_fake()
+
+    print(
+        f"{args.rate:.0f} req/s offered for {args.seconds:.0f}s; PostgREST {args.latency * 1000:.0f}ms x "
+        f"{args.connections} connections; admission cap {args.max_in_flight}, queue {args.max_queue}, "
+        f"deadline {args.queue_timeout * 1000:.0f}ms"
+    )
+    print(f"{'admission':<10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'shed':>6} {'goodput/s':>10}")
+    for label, r in results.items():
+        print(f"{label:<10} {r['p50']:>8.1f} {r['p99']:>8.1f} {r['max']:>8.1f} {r['shed']:>6} {r['goodput']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
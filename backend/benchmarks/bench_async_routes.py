@@ -0,0 +1,75 @@
+"""
+Concurrency benchmark: GET /recipes/ and GET /users/ against a fake PostgREST with latency.
+
+With a fully async data path throughput should scale with concurrency until the
+connection pool is saturated; a blocking client caps it near 1 / latency. Run from backend/:
+    python -m benchmarks.bench_async_routes --latency 0.05 --requests 256
+"""
+import argparse
+import asyncio
+import functools
+import time
+import warnings
+
+import httpx
+from loguru import logger
+from app.main import app
+from app.dependencies import auth_dependency, get_supabase, get_recipe_cache
+from app.auth.auth import extract_token
+from app.fixtures import seeded_fake_postgrest, serve_in_process
+from app.supabase_clients import SupabaseClients
+
+
+async def run_level(client, path, concurrency, total):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.get(path, headers={"Authorization": "Bearer bench"})
+            assert response.status_code == 200, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def run(args, url):
+    pool = SupabaseClients(url=url, anon_key="anon", service_role="service")
+    app.dependency_overrides[get_supabase] = lambda: pool
+    if not args.cached:
+        app.dependency_overrides[get_recipe_cache] = lambda: None
+    app.dependency_overrides[auth_dependency] = lambda: {"sub": "bench-user"}
+    app.dependency_overrides[extract_token] = lambda: "bench-token"
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("/recipes/", "/users/"):
+            for concurrency in args.concurrency:
+                throughput = await run_level(client, path, concurrency, args.requests)
+                print(f"{path:<10} concurrency={concurrency:4d} {throughput:8.1f} req/s")
+
+    await pool.aclose()
+    app.dependency_overrides.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.05, help="injected PostgREST latency in seconds")
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--rows", type=int, default=3, help="rows returned per query")
+    parser.add_argument("--cached", action="store_true", help="keep the per-user recipe cache enabled")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    args = parser.parse_args()
+
+    logger.remove()
+    warnings.filterwarnings("ignore", message="Pydantic serializer warnings")
+    url, stop = serve_in_process(functools.partial(seeded_fake_postgrest, latency=args.latency, recipes=args.rows, users=args.rows))
+    try:
+        print(f"blocking-client ceiling at {args.latency * 1000:.0f}ms latency: {1 / args.latency:.1f} req/s")
+        asyncio.run(run(args, url))
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    main()
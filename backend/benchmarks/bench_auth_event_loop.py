@@ -0,0 +1,110 @@
+"""
+Load test: GET / latency while many auth-bearing requests are in flight.
+
+Compares the sync auth dependency (CognitoJWKSFetcher) with the async one
+(AsyncCognitoJWKSFetcher) against a local stub JWKS endpoint. Run from backend/:
+    python -m benchmarks.bench_auth_event_loop --requests 500 --jwks-delay 0.05
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+from fastapi import Depends, FastAPI
+from loguru import logger
+from app.auth.auth import create_cognito_auth_dependency, create_async_cognito_auth_dependency
+from app.auth.get_jwks import CognitoJWKSFetcher, AsyncCognitoJWKSFetcher
+from app.fixtures import StubJWKSServer, make_jwk, make_id_token, TEST_AUDIENCE, TEST_REGION, TEST_USER_POOL_ID
+
+
+def build_app(mode: str, jwks_url: str, cache_ttl: float):
+    settings = dict(audience=TEST_AUDIENCE, region=TEST_REGION, user_pool_id=TEST_USER_POOL_ID)
+    fetcher_settings = dict(region=TEST_REGION, pool_id=TEST_USER_POOL_ID, jwks_url=jwks_url,
+                            cache_ttl=cache_ttl, min_refresh_interval=0)
+
+    if mode == "sync":
+        fetcher = CognitoJWKSFetcher(**fetcher_settings)
+        auth = create_cognito_auth_dependency(jwks_fetcher=fetcher, **settings)
+    else:
+        fetcher = AsyncCognitoJWKSFetcher(**fetcher_settings)
+        auth = create_async_cognito_auth_dependency(jwks_fetcher=fetcher, **settings)
+
+    app = FastAPI()
+
+    @app.get("/")
+    async def read_root():
+        return {"Hello": "there"}
+
+    @app.get("/protected")
+    async def protected(user=Depends(auth)):
+        return {"sub": user["sub"]}
+
+    return app, fetcher
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def measure(app, tokens, probe_interval):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        probes = []
+        done = asyncio.Event()
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/")
+                probes.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(probe_interval)
+
+        async def authed(token):
+            response = await client.get("/protected", headers={"Authorization": f"Bearer {token}"})
+            assert response.status_code == 200, response.text
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(authed(token) for token in tokens))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+
+    return probes, len(tokens) / elapsed
+
+
+async def run_mode(mode, args, jwks_url):
+    app, fetcher = build_app(mode, jwks_url, args.cache_ttl)
+    tokens = [make_id_token(sub=f"user-{i}") for i in range(args.requests)]
+    try:
+        probes, throughput = await measure(app, tokens, args.probe_interval)
+    finally:
+        if mode == "async":
+            await fetcher.aclose()
+
+    print(f"{mode:>5}: GET / p50={statistics.median(probes):7.2f}ms "
+          f"p99={percentile(probes, 99):7.2f}ms max={max(probes):7.2f}ms "
+          f"| auth throughput={throughput:7.0f} req/s ({len(probes)} probes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500, help="auth-bearing requests kept in flight")
+    parser.add_argument("--jwks-delay", type=float, default=0.05, help="stub JWKS latency in seconds")
+    parser.add_argument("--cache-ttl", type=float, default=0.01, help="JWKS TTL; small values force refetches")
+    parser.add_argument("--probe-interval", type=float, default=0.002)
+    args = parser.parse_args()
+
+    logger.remove()
+    server = StubJWKSServer(keys=[make_jwk("key-1")], delay=args.jwks_delay)
+    try:
+        for mode in ("sync", "async"):
+            asyncio.run(run_mode(mode, args, server.url))
+        print(f"JWKS fetches served by stub: {server.fetch_count}")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
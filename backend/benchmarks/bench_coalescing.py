@@ -0,0 +1,76 @@
+"""
+Benchmark: bursts of identical GET /recipes/ with and without request coalescing.
+
+Drives the real app in-process (httpx ASGITransport) against a fake PostgREST
+with --latency seconds per request. Each round fires --burst identical
+concurrent requests from one user, the way several open tabs or duplicate
+frontend fetches do, with the response cache off so every round misses.
+Reports median round time, per-request p50 and upstream PostgREST requests.
+Run from backend/:
+    python -m benchmarks.bench_coalescing --burst 20 --recipes 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+from loguru import logger
+from app.main import app
+from app.auth.auth import extract_token
+from app.coalescing import SingleFlight
+from app.dependencies import auth_dependency, get_read_coalescer, get_recipe_cache, get_supabase
+from app.fixtures import seeded_fake_postgrest
+from app.supabase_clients import SupabaseClients
+
+
+async def rounds(args):
+    round_ms, request_ms = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as http:
+        async def get():
+            start = time.perf_counter()
+            response = await http.get("/recipes/", params={"limit": 50})
+            response.raise_for_status()
+            request_ms.append((time.perf_counter() - start) * 1000)
+
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            await asyncio.gather(*(get() for _ in range(args.burst)))
+            round_ms.append((time.perf_counter() - start) * 1000)
+    return statistics.median(round_ms), statistics.median(request_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--recipes", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    logger.remove()
+    fake = seeded_fake_postgrest(latency=args.latency, recipes=args.recipes)
+    pool = SupabaseClients(
+        url="http://fake", anon_key="anon",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake))
+    )
+    app.dependency_overrides[get_supabase] = lambda: pool
+    app.dependency_overrides[get_recipe_cache] = lambda: None
+    app.dependency_overrides[auth_dependency] = lambda: {"sub": "bench-user"}
+    app.dependency_overrides[extract_token] = lambda: "bench-token"
+
+    flight = SingleFlight(window=0)
+    results = {}
+    for label, coalescer in (("off", None), ("on", flight)):
+        app.dependency_overrides[get_read_coalescer] = lambda: coalescer
+        before = fake.requests
+        results[label] = asyncio.run(rounds(args)) + ((fake.requests - before) / args.rounds,)
+
+    print(f"{args.burst} identical concurrent GET /recipes/?limit=50 per round, {args.latency * 1000:.0f}ms PostgREST latency")
+    print(f"{'coalescing':<11} {'round ms':>9} {'p50 ms':>8} {'upstream/round':>15}")
+    for label, (round_ms, p50, upstream) in results.items():
+        print(f"{label:<11} {round_ms:>9.1f} {p50:>8.1f} {upstream:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
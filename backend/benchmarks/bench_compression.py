@@ -0,0 +1,101 @@
+"""
+Benchmark: bytes on the wire and CPU per request for GET /recipes/ with response compression.
+
+Drives the app in-process (httpx ASGITransport) against a fake PostgREST served
+from a separate process, so its CPU isn't counted. Lists --limit recipes
+--requests times per encoding, with the response cache off ("miss": every
+response is fetched, serialized and compressed again) and on ("hit": served
+with the compressed body stored next to the cached entry). CPU is process time
+(app and client, including the client's decompression) per request; the
+difference from the identity row with the same cache state is what compression
+costs. Also compresses one body at a few levels per available codec.
+Run from backend/:
+    python -m benchmarks.bench_compression --limit 100 --requests 200
+"""
+import argparse
+import asyncio
+import functools
+import time
+import httpx
+from loguru import logger
+from app.auth.auth import extract_token
+from app.cache import InMemoryLRUCache, UserResponseCache
+from app.compression import Compressor
+from app.dependencies import auth_dependency, get_rate_limiter, get_read_coalescer, get_recipe_cache, get_supabase
+from app.fixtures import seeded_fake_postgrest, serve_in_process
+from app.main import create_app
+from app.settings import Settings
+from app.supabase_clients import SupabaseClients
+
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 11), "zstd": (1, 3, 19)}
+
+
+async def measure(pool, args, encoding, cached):
+    app = create_app(Settings(metrics_enabled=False, admission_max_in_flight=0, compression_encodings=encoding or "gzip"))
+    cache = UserResponseCache(InMemoryLRUCache(), "recipes")
+    app.dependency_overrides.update({
+        get_supabase: lambda: pool,
+        get_recipe_cache: lambda: cache if cached else None,
+        get_read_coalescer: lambda: None,
+        get_rate_limiter: lambda: None,
+        auth_dependency: lambda: {"sub": "bench-user"},
+        extract_token: lambda: "bench-token",
+    })
+    headers = {"Accept-Encoding": encoding or "identity"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as http:
+        first = await http.get("/recipes/", params={"limit": args.limit}, headers=headers)
+        first.raise_for_status()
+        wire, cpu = 0, time.process_time()
+        for _ in range(args.requests):
+            response = await http.get("/recipes/", params={"limit": args.limit}, headers=headers)
+            wire += response.num_bytes_downloaded
+        cpu = time.process_time() - cpu
+    return first.content, wire / args.requests, cpu * 1000 / args.requests
+
+
+async def measure_all(url, args, variants):
+    pool = SupabaseClients(url=url, anon_key="anon")
+    try:
+        return {label: await measure(pool, args, encoding, cached) for label, encoding, cached in variants}
+    finally:
+        await pool.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    logger.remove()
+    encodings = list(Compressor().codecs)
+    url, stop = serve_in_process(functools.partial(seeded_fake_postgrest, recipes=args.limit))
+    variants = [
+        (f"{encoding or 'identity'} {'hit' if cached else 'miss'}", encoding, cached)
+        for encoding in [None] + list(reversed(encodings)) for cached in (False, True)
+    ]
+    try:
+        results = asyncio.run(measure_all(url, args, variants))
+    finally:
+        stop()
+
+    sample = results["identity hit"][0]
+    size = len(sample)
+    print(f"GET /recipes/?limit={args.limit}: {size} byte JSON body, {args.requests} requests per variant")
+    print(f"{'variant':<20} {'wire bytes':>11} {'ratio':>6} {'CPU ms/req':>11}")
+    for label, (_, wire, cpu) in results.items():
+        print(f"{label:<20} {wire:>11.0f} {size / wire:>6.1f} {cpu:>11.3f}")
+
+    print()
+    print(f"{'codec':<10} {'level':>5} {'bytes':>8} {'ms':>8}")
+    for encoding in encodings:
+        for level in LEVELS[encoding]:
+            compressor = Compressor([encoding], levels={encoding: level})
+            start = time.perf_counter()
+            compressed = compressor.compress(encoding, sample)
+            print(f"{encoding:<10} {level:>5} {len(compressed):>8} {(time.perf_counter() - start) * 1000:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: recipe queries through PostgREST vs. directly against Postgres (DATA_BACKEND).
+
+Seeds one user's recipes into a local Postgres with the schema and migrations the
+tests use, then times the RecipeStore calls behind the recipe routes, run as that
+user under row-level security, on the direct SQL backend at --pool-size pooled
+connections and --concurrency requests in flight. When --supabase-url is given,
+the same calls also go through PostgREST (e.g. `supabase start`, pointed at the
+same database) with --token, a JWT whose sub is cook-0. Reports median ms per
+call and calls/s. Needs psycopg, greenlet and a database you don't mind wiping.
+Run from backend/:
+    python -m benchmarks.bench_data_backends --database-url postgresql://postgres@localhost/postgres
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+import psycopg
+from app.database import PostgresDatabase
+from app.fixtures import SUPABASE_SCHEMA, apply_migrations
+from app.pagination import select_columns
+from app.recipe_store import PostgRESTRecipeStore
+from app.supabase_clients import SupabaseClients
+from benchmarks.bench_search import seed
+
+USER = "cook-0"
+
+
+def operations(store, ids):
+    columns = select_columns(None)
+    return {
+        "first page (20)": lambda: store.list_page(columns, None, 20),
+        "index build page (1000)": lambda: store.list_page("id,created_at,ingredients", None, 1000),
+        "get 20 by id": lambda: store.get_many(random.sample(ids, 20), columns),
+        "search + facets": lambda: asyncio.gather(store.search({"q": "tomato"}, columns, 21, 0), store.search_facets({"q": "tomato"})),
+        "sync version": store.sync_version,
+        "insert + delete": lambda: insert_and_delete(store),
+    }
+
+
+async def insert_and_delete(store):
+    rows = await store.insert({"user_id": USER, "name": "Bench", "ingredients": [], "preparation": [], "metadata": {}})
+    await store.delete([rows[0]["id"]])
+
+
+async def measure(call, repeat, concurrency):
+    samples = []
+
+    async def worker():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await call()
+            samples.append((time.perf_counter() - start) * 1000)
+
+    await call()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return statistics.median(samples), len(samples) / (time.perf_counter() - start)
+
+
+async def run(args, ids):
+    stores = {}
+    database = PostgresDatabase(args.database_url, pool_size=args.pool_size, max_overflow=0)
+    await database.warm_up(args.pool_size)
+    stores["postgres"] = database.for_user(USER)
+    if args.supabase_url:
+        supabase = SupabaseClients(args.supabase_url, args.anon_key, max_connections=args.pool_size)
+        stores["postgrest"] = PostgRESTRecipeStore(supabase, args.token, USER)
+
+    results = {}
+    for backend, store in stores.items():
+        for label, call in operations(store, ids).items():
+            results[label, backend] = await measure(call, args.repeat, args.concurrency)
+
+    await database.aclose()
+    if args.supabase_url:
+        await supabase.aclose()
+    return list(stores), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), required=not os.getenv("DATABASE_URL"))
+    parser.add_argument("--supabase-url", help="Supabase/PostgREST URL serving the same database; skipped when unset")
+    parser.add_argument("--anon-key", default=os.getenv("ANON_KEY"))
+    parser.add_argument("--token", help="JWT for the PostgREST runs, with sub cook-0")
+    parser.add_argument("--recipes", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=50, help="calls per concurrent worker")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with psycopg.connect(args.database_url, autocommit=True) as conn:
+        conn.execute(SUPABASE_SCHEMA)
+        seed(conn, args.recipes, 1, random.Random(args.seed))
+        apply_migrations(conn)
+        conn.execute("analyze public.recipes")
+        ids = [row[0] for row in conn.execute("select id from public.recipes")]
+
+    backends, results = asyncio.run(run(args, ids))
+
+    print(f"{args.recipes} recipes for one user, {args.concurrency} concurrent callers, median ms (calls/s)")
+    print(f"{'call':<24}" + "".join(f"{backend:>20}" for backend in backends))
+    for label in dict.fromkeys(label for label, _ in results):
+        cells = "".join(f"{results[label, backend][0]:>9.2f} ({results[label, backend][1]:>7.0f})" for backend in backends)
+        print(f"{label:<24}{cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: "what can I cook" matching with the bitmap inverted index vs. scanning every recipe.
+
+Generates --recipes recipes over a Zipf-distributed vocabulary of --vocabulary
+ingredients, then times ranking a pantry three ways: normalizing every recipe's
+ingredients JSON per query (what a naive endpoint does), intersecting
+pre-normalized per-recipe sets, and IngredientIndex.match. Also reports index
+build time, incremental add/remove cost and bitmap memory. Run from backend/:
+    python -m benchmarks.bench_ingredient_index --recipes 50000
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from app.ingredient_index import IngredientIndex, normalize_ingredient, recipe_ingredients
+
+
+def make_recipes(total, vocabulary, rng):
+    names = [f"ingredient {i}" for i in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    recipes = []
+    for recipe_id in range(1, total + 1):
+        chosen = set(rng.choices(names, weights, k=rng.randint(5, 15)))
+        recipes.append({"id": recipe_id, "ingredients": [{"name": name.title(), "amount": "1 cup"} for name in chosen]})
+    return names, recipes
+
+
+def rank(scored, limit=20):
+    scored.sort(key=lambda item: (item[0], item[1], item[2]), reverse=True)
+    return [recipe_id for _, _, recipe_id in scored[:limit]]
+
+
+def scan_json(recipes, pantry):
+    have = {normalize_ingredient(name) for name in pantry}
+    scored = []
+    for recipe in recipes:
+        names = recipe_ingredients(recipe["ingredients"])
+        matched = len(names & have)
+        if matched:
+            scored.append((matched / len(names), matched, recipe["id"]))
+    return rank(scored)
+
+
+def scan_sets(sets, pantry):
+    have = {normalize_ingredient(name) for name in pantry}
+    scored = []
+    for recipe_id, names in sets:
+        matched = len(names & have)
+        if matched:
+            scored.append((matched / len(names), matched, recipe_id))
+    return rank(scored)
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=50_000)
+    parser.add_argument("--vocabulary", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names, recipes = make_recipes(args.recipes, args.vocabulary, rng)
+
+    start = time.perf_counter()
+    index = IngredientIndex()
+    index.add(recipes)
+    build_ms = (time.perf_counter() - start) * 1000
+    sets = [(recipe["id"], recipe_ingredients(recipe["ingredients"])) for recipe in recipes]
+    memory = sum(sys.getsizeof(bitmap) for bitmap in index._postings.values())
+    print(f"{args.recipes} recipes, {len(index._postings)} distinct ingredients")
+    print(f"index build {build_ms:.0f}ms, postings {memory / 1e6:.1f}MB")
+
+    pantries = {
+        "5 staples": names[:5],
+        "20 common": names[:40:2],
+        "60 mixed": rng.sample(names[:300], 60),
+        "200 mixed": rng.sample(names, 200),
+    }
+
+    print("\nmedian ms to rank a pantry (top 20)")
+    print(f"{'pantry':<12} {'matches':>8} {'scan JSON':>10} {'scan sets':>10} {'bitmaps':>9}")
+    for label, pantry in pantries.items():
+        matches, total = index.match(pantry)
+        assert [m.recipe_id for m in matches] == scan_sets(sets, pantry)
+        print(
+            f"{label:<12} {total:>8} "
+            f"{timed(lambda: scan_json(recipes, pantry), args.repeat):>10.1f} "
+            f"{timed(lambda: scan_sets(sets, pantry), args.repeat):>10.1f} "
+            f"{timed(lambda: index.match(pantry), args.repeat):>9.2f}"
+        )
+
+    new = [{"id": args.recipes + i, "ingredients": recipes[i]["ingredients"]} for i in range(1, 101)]
+    add_ms = timed(lambda: [index.add([row]) for row in new], 1) / len(new)
+    remove_ms = timed(lambda: [index.remove([row["id"]]) for row in new], 1) / len(new)
+    print(f"\nincremental: add {add_ms:.3f}ms, remove {remove_ms:.3f}ms per recipe")
+
+
+if __name__ == "__main__":
+    main()
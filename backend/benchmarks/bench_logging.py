@@ -0,0 +1,95 @@
+"""
+Benchmark: per-request overhead of the logging pipeline on GET /recipes/.
+
+Runs the same in-process requests with logging off, the synchronous text handler,
+the background JSON writer, and the JSON writer with INFO sampled down. Output goes
+to a null stream; --write-latency makes each write stall like a congested pipe or
+log collector, which the synchronous handler pays for inside the request. Run from backend/:
+    python -m benchmarks.bench_logging --requests 2000 --write-latency 0.0002
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from loguru import logger
+from app import logging_config
+from app.main import app
+from app.dependencies import auth_dependency, get_recipe_cache
+from app.auth.auth import extract_token
+from app.fixtures import override_supabase_with_fake, restore_supabase, seeded_fake_postgrest
+
+
+class NullStream:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def write(self, text):
+        if self.latency:
+            time.sleep(self.latency)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+async def run(client, total):
+    start = time.perf_counter()
+    for _ in range(total):
+        response = await client.get("/recipes/", params={"limit": 5, "fields": "id,name"}, headers={"Authorization": "Bearer bench"})
+        assert response.status_code == 200, response.text
+    return (time.perf_counter() - start) / total * 1e6
+
+
+async def bench(args):
+    pool = override_supabase_with_fake(seeded_fake_postgrest(recipes=100))
+    app.dependency_overrides[get_recipe_cache] = lambda: None
+    app.dependency_overrides[auth_dependency] = lambda: {"sub": "bench-user"}
+    app.dependency_overrides[extract_token] = lambda: "bench-token"
+    stream = NullStream(args.write_latency)
+
+    modes = (
+        ("off", None),
+        ("text, synchronous", dict(log_format="text", sample="")),
+        ("json, background writer", dict(log_format="json", sample="")),
+        ("json, INFO sampled 1/10", dict(log_format="json", sample="INFO=0.1")),
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await run(client, 50)
+        # Interleave rounds and keep the best so drift on a busy machine doesn't favour one mode.
+        best, dropped = {}, {}
+        for _ in range(args.rounds):
+            for label, config in modes:
+                if config is None:
+                    logger.remove()
+                else:
+                    logging_config.setup_logging(stream=stream, **config)
+                best[label] = min(best.get(label, float("inf")), await run(client, args.requests))
+                dropped[label] = dropped.get(label, 0) + logging_config.logging_stats()["dropped"]
+
+    baseline = best["off"]
+    for label, per_request in best.items():
+        print(f"{label:<26} {per_request:8.1f} us/request  {per_request - baseline:+8.1f} us  dropped={dropped[label]}")
+
+    logger.remove()
+    if logging_config.sink is not None:
+        logging_config.sink.stop()
+    await pool.aclose()
+    restore_supabase()
+    app.dependency_overrides.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--write-latency", type=float, default=0, help="seconds each log write stalls")
+    args = parser.parse_args()
+
+    logger.remove()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: GET /recipes/ response size and latency at 10k recipes per user.
+
+Compares the unpaginated full listing with keyset pages and a list-view projection,
+against a fake PostgREST in a separate process. Run from backend/:
+    python -m benchmarks.bench_recipe_pagination --recipes 10000
+"""
+import argparse
+import asyncio
+import functools
+import statistics
+import time
+import httpx
+from loguru import logger
+from app.main import app
+from app.dependencies import auth_dependency, get_supabase, get_recipe_cache
+from app.auth.auth import extract_token
+from app.fixtures import seeded_fake_postgrest, serve_in_process
+from app.pagination import encode_cursor
+from app.supabase_clients import SupabaseClients
+
+
+async def measure(client, params, runs):
+    timings, size = [], 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        response = await client.get("/recipes/", params=params)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.text
+        size = len(response.content)
+    return statistics.median(timings), size
+
+
+async def run(args, url):
+    pool = SupabaseClients(url=url, anon_key="anon")
+    app.dependency_overrides[get_supabase] = lambda: pool
+    app.dependency_overrides[get_recipe_cache] = lambda: None
+    app.dependency_overrides[auth_dependency] = lambda: {"sub": "bench-user"}
+    app.dependency_overrides[extract_token] = lambda: "bench-token"
+
+    middle = args.recipes // 2
+    cursor = encode_cursor({"created_at": f"2025-01-01T00:00:00.{middle:06d}+00:00", "id": middle})
+    scenarios = [
+        ("full listing (select *)", {}),
+        ("limit=50", {"limit": 50}),
+        ("limit=50 + list fields", {"limit": 50, "fields": "id,name,created_at,metadata"}),
+        ("limit=50 deep cursor", {"limit": 50, "cursor": cursor, "fields": "id,name,created_at,metadata"}),
+    ]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for name, params in scenarios:
+            latency, size = await measure(client, params, args.runs)
+            print(f"{name:<28} {size / 1024:10.1f} KiB  p50={latency:8.1f}ms")
+
+    await pool.aclose()
+    app.dependency_overrides.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    logger.remove()
+    url, stop = serve_in_process(functools.partial(seeded_fake_postgrest, recipes=args.recipes))
+    try:
+        asyncio.run(run(args, url))
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: recipe search in Postgres vs. downloading every recipe and filtering client-side.
+
+Seeds a local Postgres with --recipes rows through the same schema and migrations
+the tests use, then times each query three ways: fetching the whole table and
+filtering in Python (what clients did before /recipes/search), the search
+functions without the 002 indexes, and with them. Queries run as the
+`authenticated` role so row-level security applies as it does behind PostgREST.
+Needs psycopg and a database you don't mind wiping. Run from backend/:
+    python -m benchmarks.bench_search --database-url postgresql://postgres@localhost/postgres
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+import psycopg
+from app.fixtures import SUPABASE_SCHEMA, act_as, apply_migrations
+
+DISHES = ["soup", "stew", "curry", "salad", "tart", "pasta", "risotto", "tacos", "pie", "bowl", "roast", "bake"]
+INGREDIENTS = [
+    "tomato", "basil", "garlic", "onion", "chicken", "beef", "lentils", "rice", "potato", "carrot", "ginger",
+    "coconut", "lime", "cumin", "paprika", "spinach", "mushroom", "cheddar", "parmesan", "chickpeas", "salmon",
+    "shrimp", "tofu", "peppers", "zucchini", "eggplant", "cilantro", "yogurt", "butter", "lemon"
+]
+STEPS = ["chop", "saute", "simmer", "roast", "whisk", "fold", "season", "bake", "grill", "blend", "toast", "braise"]
+CUISINES = ["Italian", "Indian", "Mexican", "French", "Thai", "Japanese", "American", "Greek", "Chinese", "Spanish"]
+TYPES = ["entree", "side", "soup", "dessert", "breakfast", "snack"]
+
+QUERIES = {
+    "text": dict(q="tomato basil"),
+    "text + cuisine": dict(q="chicken", cuisine="Indian"),
+    "cuisine + type": dict(cuisine="Thai", recipe_type="soup"),
+    "time range": dict(min_time=20, max_time=25),
+    "rare word": dict(q="eggplant zucchini tofu"),
+}
+
+
+def recipe(rng):
+    ingredients = rng.sample(INGREDIENTS, 6)
+    return (
+        f"{rng.choice(ingredients).title()} {rng.choice(DISHES)}",
+        json.dumps([{"name": name, "amount": "1 cup"} for name in ingredients]),
+        json.dumps([{"text": f"{rng.choice(STEPS)} the {rng.choice(ingredients)} and {rng.choice(STEPS)}"} for _ in range(5)]),
+        json.dumps({"cuisine": rng.choice(CUISINES), "type": rng.choice(TYPES), "total_time": str(rng.randint(5, 120))}),
+    )
+
+
+def seed(conn, total, owners, rng):
+    with conn.cursor() as cursor:
+        with cursor.copy("copy public.recipes (user_id, name, ingredients, preparation, metadata) from stdin") as copy:
+            for i in range(total):
+                copy.write_row((f"cook-{i % owners}",) + recipe(rng))
+    conn.execute("analyze public.recipes")
+
+
+def client_side(conn, q=None, cuisine=None, recipe_type=None, min_time=None, max_time=None):
+    """Roughly what a client had to do: fetch every row, then filter in Python."""
+    rows = conn.execute("select * from public.recipes order by created_at desc, id desc").fetchall()
+    terms = (q or "").lower().split()
+    matches = []
+    for row in rows:
+        _, _, _, name, ingredients, preparation, metadata = row
+        text = " ".join([name or ""] + [i["name"] for i in ingredients] + [p["text"] for p in preparation]).lower()
+        minutes = int(metadata["total_time"]) if metadata["total_time"].isdigit() else None
+        if (all(term in text for term in terms)
+                and (cuisine is None or metadata["cuisine"] == cuisine)
+                and (recipe_type is None or metadata["type"] == recipe_type)
+                and (min_time is None or (minutes is not None and minutes >= min_time))
+                and (max_time is None or (minutes is not None and minutes <= max_time))):
+            matches.append(row)
+    return matches[:20]
+
+
+def database(conn, **filters):
+    arguments = ", ".join(f"{name} => %({name})s" for name in filters)
+    separator = ", " if arguments else ""
+    conn.execute(f"select * from public.search_recipes({arguments}{separator}page_size => 21)", filters).fetchall()
+    return conn.execute(f"select public.recipe_search_facets({arguments})", filters).fetchone()
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), required=not os.getenv("DATABASE_URL"))
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--owners", type=int, default=1, help="users the recipes are spread over; cook-0 is searched")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--client-repeat", type=int, default=1, help="repeats of the slow client-side path")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with psycopg.connect(args.database_url, autocommit=True) as conn:
+        conn.execute(SUPABASE_SCHEMA)
+        start = time.perf_counter()
+        seed(conn, args.recipes, args.owners, random.Random(args.seed))
+        print(f"seeded {args.recipes} recipes in {time.perf_counter() - start:.1f}s")
+
+        act_as(conn, "cook-0")
+        baseline = {label: timed(lambda: client_side(conn, **filters), args.client_repeat) for label, filters in QUERIES.items()}
+
+        # The functions from 002 without its indexes: the same SQL, but sequential scans.
+        conn.execute("reset role")
+        apply_migrations(conn)
+        for index in ("recipes_search_document_idx", "recipes_metadata_idx", "recipes_user_total_minutes_idx"):
+            conn.execute(f"drop index public.{index}")
+        act_as(conn, "cook-0")
+        unindexed = {label: timed(lambda: database(conn, **filters), args.repeat) for label, filters in QUERIES.items()}
+
+        conn.execute("reset role")
+        start = time.perf_counter()
+        apply_migrations(conn)
+        conn.execute("analyze public.recipes")
+        print(f"built indexes in {time.perf_counter() - start:.1f}s")
+        act_as(conn, "cook-0")
+        indexed = {label: timed(lambda: database(conn, **filters), args.repeat) for label, filters in QUERIES.items()}
+        totals = {label: database(conn, **filters)[0]["total"] for label, filters in QUERIES.items()}
+        conn.execute("reset role")
+
+    print(f"\nmedian ms per search (page of 20 + facets), {args.recipes} recipes over {args.owners} owner(s)")
+    print(f"{'query':<16} {'matches':>8} {'client-side':>12} {'no indexes':>11} {'indexed':>9}")
+    for label in QUERIES:
+        print(f"{label:<16} {totals[label]:>8} {baseline[label]:>12.1f} {unindexed[label]:>11.1f} {indexed[label]:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark: wall and CPU time to serialize large GET /recipes/ payloads.
+
+Compares the previous path (jsonable_encoder + stdlib json, what FastAPI does for an
+untyped return) with ORJSONResponse and with validating and dumping through the
+compiled RecipeRead TypeAdapter. Run from backend/:
+    python -m benchmarks.bench_serialization --recipes 1000 --ingredients 40
+"""
+import argparse
+import time
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from loguru import logger
+from app.fixtures import seeded_fake_postgrest
+from app.models.models import RecipeList
+
+
+def make_rows(recipes, ingredients, steps):
+    rows = seeded_fake_postgrest(recipes=recipes).tables["recipes"]
+    for row in rows:
+        row["ingredients"] = [{"name": f"ingredient {j}", "amount": f"{j} cups", "note": "finely chopped"} for j in range(ingredients)]
+        row["preparation"] = [{"text": f"Step {j}: stir, season and simmer until the sauce thickens."} for j in range(steps)]
+    return rows
+
+
+def stdlib_path(rows):
+    return JSONResponse(jsonable_encoder(rows)).body
+
+
+def orjson_path(rows):
+    return ORJSONResponse(rows).body
+
+
+def pydantic_path(rows):
+    return RecipeList.dump_json(RecipeList.validate_python(rows), by_alias=True, exclude_unset=True)
+
+
+def measure(render, rows, iterations):
+    render(rows)
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(iterations):
+        body = render(rows)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return wall / iterations * 1000, cpu / iterations * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=1000)
+    parser.add_argument("--ingredients", type=int, default=40, help="ingredients per recipe")
+    parser.add_argument("--steps", type=int, default=20, help="preparation steps per recipe")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    logger.remove()
+    rows = make_rows(args.recipes, args.ingredients, args.steps)
+
+    print(f"{args.recipes} recipes, {args.ingredients} ingredients and {args.steps} steps each")
+    baseline = None
+    for label, render in (
+        ("jsonable_encoder + json (before)", stdlib_path),
+        ("ORJSONResponse", orjson_path),
+        ("RecipeRead TypeAdapter", pydantic_path),
+    ):
+        wall, cpu, size = measure(render, rows, args.iterations)
+        baseline = baseline or wall
+        print(f"{label:<34} {wall:8.2f} ms wall {cpu:8.2f} ms cpu {size / 1e6:6.2f} MB {baseline / wall:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: cold start of the app, from `import app.main` to the first authenticated response.
+
+Each run is a fresh interpreter that times the import, the lifespan startup, and
+the first two GET /recipes/ requests against local Cognito JWKS and PostgREST
+stand-ins. Work the app defers (JWKS download, TLS/TCP connection setup) lands on
+the first request unless the startup warm-up is enabled. Run from backend/:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PHASES = ("import_ms", "startup_ms", "first_request_ms", "second_request_ms")
+
+
+async def measure(token):
+    start = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter()
+
+    import httpx
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            timings = []
+            for _ in range(2):
+                begin = time.perf_counter()
+                response = await client.get("/recipes/", params={"limit": 20}, headers={"Authorization": f"Bearer {token}"})
+                assert response.status_code == 200, response.text
+                timings.append(time.perf_counter() - begin)
+
+    return {
+        "import_ms": (imported - start) * 1000,
+        "startup_ms": (started - imported) * 1000,
+        "first_request_ms": timings[0] * 1000,
+        "second_request_ms": timings[1] * 1000,
+    }
+
+
+def run_child(env):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+        env={**os.environ, **env}, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--db-latency", type=float, default=0.005, help="seconds added to every PostgREST call")
+    parser.add_argument("--jwks-latency", type=float, default=0.1, help="seconds added to every JWKS fetch")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        import asyncio
+        print(json.dumps(asyncio.run(measure(os.environ["BENCH_TOKEN"]))))
+        return
+
+    import functools
+    from app.fixtures import (
+        StubJWKSServer, make_id_token, make_jwk, seeded_fake_postgrest, serve_in_process,
+        TEST_AUDIENCE, TEST_REGION, TEST_USER_POOL_ID
+    )
+
+    jwks = StubJWKSServer([make_jwk("key-1")], delay=args.jwks_latency)
+    db_url, stop_db = serve_in_process(functools.partial(seeded_fake_postgrest, latency=args.db_latency, recipes=100))
+    env = {
+        "PROJ_URL": db_url,
+        "ANON_KEY": "anon",
+        "SERVICE_ROLE": "service",
+        "REGION": TEST_REGION,
+        "COGNITO_USER_POOL_ID": TEST_USER_POOL_ID,
+        "COGNITO_APP_CLIENT_ID": TEST_AUDIENCE,
+        "COGNITO_JWKS_URL": jwks.url,
+        "LOG_FORMAT": "json",
+        "LOG_LEVEL": "WARNING",
+        "BENCH_TOKEN": make_id_token("key-1", sub="bench-user"),
+    }
+    profiles = (
+        ("lazy (default)", {"STARTUP_WARMUP": "false"}),
+        ("startup warm-up", {"STARTUP_WARMUP": "true"}),
+    )
+
+    print(f"median of {args.runs} runs, milliseconds")
+    print(f"{'profile':<18}" + "".join(f"{phase.removesuffix('_ms'):>16}" for phase in PHASES))
+    try:
+        for label, extra in profiles:
+            runs = [run_child({**env, **extra}) for _ in range(args.runs)]
+            medians = [statistics.median(run[phase] for run in runs) for phase in PHASES]
+            print(f"{label:<18}" + "".join(f"{value:>16.1f}" for value in medians))
+    finally:
+        stop_db()
+        jwks.close()
+
+
+if __name__ == "__main__":
+    main()
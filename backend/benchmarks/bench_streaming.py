@@ -0,0 +1,70 @@
+"""
+Benchmark: time-to-first-byte and peak memory of buffered vs streamed GET /recipes/.
+
+Serves the real app with uvicorn in-process (so tracemalloc sees its allocations)
+against a fake PostgREST in a separate process. Run from backend/:
+    python -m benchmarks.bench_streaming --recipes 10000
+"""
+import argparse
+import functools
+import time
+import tracemalloc
+import httpx
+from loguru import logger
+from app.main import app
+from app.dependencies import auth_dependency, get_supabase, get_recipe_cache
+from app.auth.auth import extract_token
+from app.fixtures import seeded_fake_postgrest, serve_in_process, serve_in_thread
+from app.supabase_clients import SupabaseClients
+
+
+def measure(url, params, headers=None):
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    first_byte, size = None, 0
+
+    with httpx.stream("GET", f"{url}/recipes/", params=params, headers=headers, timeout=120) as response:
+        for chunk in response.iter_raw():
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(chunk)
+
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    return first_byte * 1000, total * 1000, size, (peak - baseline) / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=10000)
+    args = parser.parse_args()
+
+    logger.remove()
+    fake_url, stop_fake = serve_in_process(functools.partial(seeded_fake_postgrest, recipes=args.recipes))
+    pool = SupabaseClients(url=fake_url, anon_key="anon")
+    app.dependency_overrides[get_supabase] = lambda: pool
+    app.dependency_overrides[get_recipe_cache] = lambda: None
+    app.dependency_overrides[auth_dependency] = lambda: {"sub": "bench-user"}
+    app.dependency_overrides[extract_token] = lambda: "bench-token"
+    app_url, stop_app = serve_in_thread(app)
+
+    tracemalloc.start()
+    try:
+        measure(app_url, {"limit": 1})
+        for name, params, headers in [
+            ("buffered JSON", {}, None),
+            ("streamed JSON array", {"stream": "true"}, None),
+            ("streamed NDJSON", {}, {"Accept": "application/x-ndjson"}),
+        ]:
+            ttfb, total, size, peak = measure(app_url, params, headers)
+            print(f"{name:<20} TTFB={ttfb:8.1f}ms total={total:8.1f}ms "
+                  f"size={size / 1024:8.0f} KiB peak={peak:7.1f} MiB")
+    finally:
+        tracemalloc.stop()
+        stop_app()
+        stop_fake()
+
+
+if __name__ == "__main__":
+    main()
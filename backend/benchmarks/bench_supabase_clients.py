@@ -0,0 +1,82 @@
+"""
+Benchmark: per-request create_client() vs the shared SupabaseClients pool.
+
+Drives a GET /rest/v1/recipes query against a local fake PostgREST server and
+reports throughput, connections opened and allocations per request. Run from backend/:
+    python -m benchmarks.bench_supabase_clients --iterations 300 --threads 8
+"""
+import argparse
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+from supabase import create_client, ClientOptions
+from app.fixtures import FakePostgREST, serve_in_thread
+from app.supabase_clients import SupabaseClients
+
+TOKEN = "user-jwt"
+ANON_KEY = "anon-key"
+
+
+def per_request_client(url):
+    def query():
+        client = create_client(supabase_key=ANON_KEY, supabase_url=url,
+                               options=ClientOptions(headers={"Authorization": f"Bearer {TOKEN}"}))
+        return client.from_("recipes").select("*").execute()
+    return query, lambda: None
+
+
+def pooled_client(url):
+    pool = SupabaseClients(url=url, anon_key=ANON_KEY)
+
+    def query():
+        return pool.for_user(TOKEN).from_("recipes").select("*").execute()
+    return query, pool.close
+
+
+def measure(name, factory, url, fake, args):
+    query, close = factory(url)
+    fake.clients.clear()
+    query()
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(50):
+        query()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename") if stat.size_diff > 0)
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(lambda _: query(), range(args.iterations)))
+    elapsed = time.perf_counter() - start
+    close()
+
+    print(f"{name:<22} {args.iterations / elapsed:8.0f} req/s  "
+          f"connections={len(fake.clients):4d}  retained/request={allocated / 50 / 1024:7.1f} KiB "
+          f"({blocks / 50:.0f} blocks)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=20)
+    args = parser.parse_args()
+
+    logger.remove()
+    fake = FakePostgREST()
+    fake.insert("recipes", [{"name": f"recipe {i}", "user_id": "user-1", "ingredients": [], "preparation": []}
+                            for i in range(args.rows)])
+    url, stop = serve_in_thread(fake)
+    try:
+        measure("create_client/request", per_request_client, url, fake, args)
+        measure("SupabaseClients pool", pooled_client, url, fake, args)
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    main()
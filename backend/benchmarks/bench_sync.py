@@ -0,0 +1,71 @@
+"""
+Benchmark: refetching every recipe vs. delta sync after a change vs. an unchanged check.
+
+Seeds one user's recipes into a local Postgres with the schema and migrations the
+tests use, then times, as that user under row-level security: the full listing
+the frontend used to refetch after every change, recipe_changes() after one
+create and one delete, and the single-row version lookup that backs 304s.
+Reports median milliseconds and payload bytes. Needs psycopg and a database you
+don't mind wiping. Run from backend/:
+    python -m benchmarks.bench_sync --database-url postgresql://postgres@localhost/postgres
+"""
+import argparse
+import json
+import os
+import random
+
+import psycopg
+from app.fixtures import SUPABASE_SCHEMA, act_as, apply_migrations
+from app.pagination import select_columns
+from benchmarks.bench_search import recipe, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), required=not os.getenv("DATABASE_URL"))
+    parser.add_argument("--recipes", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with psycopg.connect(args.database_url, autocommit=True) as conn:
+        conn.execute(SUPABASE_SCHEMA)
+        apply_migrations(conn)
+        act_as(conn, "cook-0")
+        with conn.cursor() as cursor:
+            cursor.executemany(
+                "insert into public.recipes (user_id, name, ingredients, preparation, metadata) values ('cook-0', %s, %s, %s, %s)",
+                [recipe(rng) for _ in range(args.recipes)]
+            )
+
+        def full():
+            return conn.execute(
+                f"select coalesce(json_agg(r order by created_at desc, id desc), '[]') from (select {select_columns(None)} from public.recipes) r"
+            ).fetchone()[0]
+
+        def version():
+            return conn.execute("select version from public.recipe_sync_state where user_id = 'cook-0'").fetchone()[0]
+
+        since = version()
+        conn.execute("insert into public.recipes (user_id, name, ingredients, preparation, metadata) values ('cook-0', %s, %s, %s, %s)", recipe(rng))
+        conn.execute("delete from public.recipes where id = (select min(id) from public.recipes)")
+
+        def delta():
+            return conn.execute("select public.recipe_changes(%s)", (since,)).fetchone()[0]
+
+        rows = [
+            ("full refetch", timed(full, args.repeat), len(json.dumps(full()))),
+            ("delta (1 create, 1 delete)", timed(delta, args.repeat), len(json.dumps(delta()))),
+            ("unchanged (version check)", timed(version, args.repeat), len(json.dumps(version()))),
+        ]
+        conn.execute("reset role")
+
+    print(f"{args.recipes} recipes for one user, median of {args.repeat}")
+    print(f"{'request':<28} {'ms':>8} {'bytes':>10}")
+    for label, ms, size in rows:
+        print(f"{label:<28} {ms:>8.2f} {size:>10}")
+
+
+if __name__ == "__main__":
+    main()
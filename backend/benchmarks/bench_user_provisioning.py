@@ -0,0 +1,74 @@
+"""
+Benchmark: a burst of sign-ups provisioned one upsert each vs. through the batched writer.
+
+Sends --users concurrent provisioning calls to a fake PostgREST (in a thread, with
+--latency seconds per request) over a pool of --connections, first as one
+upsert per user, then through UserWriteBatcher. Reports wall time, per-caller
+p50/p99 acknowledgement latency and PostgREST requests. Run from backend/:
+    python -m benchmarks.bench_user_provisioning --users 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from loguru import logger
+from app.fixtures import FakePostgREST, serve_in_thread
+from app.supabase_clients import SupabaseClients
+from app.user_provisioning import UserWriteBatcher, upsert_users, user_row
+
+
+async def burst(provision, users, offset):
+    latencies = []
+
+    async def sign_up(i):
+        start = time.perf_counter()
+        await provision(user_row({"id": f"sub-{offset + i}", "email": f"cook{offset + i}@example.com"}))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(sign_up(i) for i in range(users)))
+    latencies.sort()
+    return (time.perf_counter() - start) * 1000, statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+async def run(args, url, fake):
+    pool = SupabaseClients(url=url, anon_key="anon", service_role="service", max_connections=args.connections)
+    writer = UserWriteBatcher(lambda rows: upsert_users(pool, rows), max_batch=args.batch_size, max_delay=args.max_delay)
+    modes = {
+        "one upsert per user": lambda row: upsert_users(pool, [row]),
+        f"batched (<= {args.batch_size} rows)": writer.submit,
+    }
+    results = {}
+    for offset, (label, provision) in enumerate(modes.items()):
+        before = fake.requests
+        results[label] = await burst(provision, args.users, offset * args.users) + (fake.requests - before,)
+    await writer.aclose()
+    await pool.aclose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--connections", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--max-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    logger.remove()
+    fake = FakePostgREST(latency=args.latency)
+    url, stop = serve_in_thread(fake)
+    try:
+        results = asyncio.run(run(args, url, fake))
+    finally:
+        stop()
+
+    print(f"{args.users} concurrent sign-ups, {args.latency * 1000:.0f}ms per PostgREST request, {args.connections} connections")
+    print(f"{'mode':<24} {'wall ms':>9} {'p50 ms':>8} {'p99 ms':>8} {'requests':>9}")
+    for label, (wall, p50, p99, requests) in results.items():
+        print(f"{label:<24} {wall:>9.1f} {p50:>8.1f} {p99:>8.1f} {requests:>9}")
+
+
+if __name__ == "__main__":
+    main()
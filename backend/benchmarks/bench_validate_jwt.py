@@ -0,0 +1,55 @@
+"""
+Micro-benchmark: validate_jwt throughput with and without prebuilt public keys.
+
+Run from backend/:
+    python -m benchmarks.bench_validate_jwt
+"""
+import argparse
+import time
+from app.auth.get_jwks import CognitoJWKSFetcher
+from app.auth.validate_token import validate_jwt, _jwk_to_public_key
+from app.fixtures import make_jwk, make_id_token, TEST_AUDIENCE, TEST_REGION, TEST_USER_POOL_ID
+from loguru import logger
+
+
+class PreloadedFetcher(CognitoJWKSFetcher):
+    """Fetcher seeded with a key set so the benchmark never touches the network."""
+
+    def __init__(self, jwks):
+        super().__init__(region=TEST_REGION, pool_id=TEST_USER_POOL_ID, cache_ttl=float("inf"))
+        self._load(jwks)
+
+
+class PerRequestKeyFetcher(PreloadedFetcher):
+    """Previous behaviour: rebuild the RSA public key from the JWK on every call."""
+
+    def get_public_key(self, kid):
+        return _jwk_to_public_key(self.get_key_by_kid(kid))
+
+
+def run(fetcher, token, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        validate_jwt(token, fetcher, TEST_AUDIENCE, TEST_REGION, TEST_USER_POOL_ID)
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    logger.remove()
+    jwks = {"keys": [make_jwk("key-1")]}
+    token = make_id_token("key-1")
+
+    before = run(PerRequestKeyFetcher(jwks), token, args.iterations)
+    after = run(PreloadedFetcher(jwks), token, args.iterations)
+
+    print(f"per-request key construction: {before:10.0f} validations/s")
+    print(f"prebuilt public keys:         {after:10.0f} validations/s")
+    print(f"speedup:                      {after / before:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
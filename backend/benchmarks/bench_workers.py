@@ -0,0 +1,112 @@
+"""
+Benchmark: throughput of the production server profile as gunicorn workers are added.
+
+Starts gunicorn with gunicorn.conf.py at each worker count, against the same local
+Cognito JWKS and PostgREST stand-ins as the load test, and drives one scenario at a
+fixed concurrency. Throughput should grow until the workers (plus the fake PostgREST
+and this load generator) saturate the CPUs, so compare against `nproc`. Run from backend/:
+    python -m benchmarks.bench_workers --workers 1 2 4 --concurrency 64
+"""
+import argparse
+import asyncio
+import functools
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+from app.fixtures import (
+    StubJWKSServer, make_id_token, make_jwk, seeded_fake_postgrest, serve_in_process,
+    TEST_AUDIENCE, TEST_REGION, TEST_USER_POOL_ID
+)
+from .loadtest import SCENARIOS, Scenario, run_level
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(workers, env):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        env={**os.environ, **env, "WEB_CONCURRENCY": str(workers), "BIND": f"127.0.0.1:{port}"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{url}/")
+            return url, process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"gunicorn with {workers} workers did not start")
+
+
+def stop_gunicorn(process):
+    process.terminate()
+    process.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--scenario", choices=SCENARIOS, default="list_recipes")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100, help="unmeasured requests, so every worker has its JWKS and token caches warm")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="seconds added to every PostgREST call")
+    parser.add_argument("--page-size", type=int, default=20, help="limit used by list_recipes")
+    parser.add_argument("--tokens", type=int, default=50, help="distinct callers (signed ID tokens)")
+    parser.add_argument("--recipe-cache", choices=["redis", "none"], default="none")
+    args = parser.parse_args()
+
+    deletes = (args.requests + args.warmup) * len(args.workers) if args.scenario == "delete_recipe" else 0
+    jwks = StubJWKSServer([make_jwk("key-1")])
+    db_url, stop_db = serve_in_process(functools.partial(
+        seeded_fake_postgrest, latency=args.db_latency, recipes=max(500, deletes), users=100
+    ))
+    env = {
+        "PROJ_URL": db_url,
+        "ANON_KEY": "anon",
+        "SERVICE_ROLE": "service",
+        "REGION": TEST_REGION,
+        "COGNITO_USER_POOL_ID": TEST_USER_POOL_ID,
+        "COGNITO_APP_CLIENT_ID": TEST_AUDIENCE,
+        "COGNITO_JWKS_URL": jwks.url,
+        "RECIPE_CACHE_BACKEND": args.recipe_cache,
+        "LOG_FORMAT": "json",
+        "LOG_LEVEL": "WARNING",
+    }
+
+    tokens = [make_id_token("key-1", sub=f"load-user-{i}") for i in range(args.tokens)]
+    recipe_ids = itertools.count(1)
+    scenario = Scenario(args.scenario, args, recipe_ids)
+    print(f"{args.scenario}, concurrency {args.concurrency}, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'req/s':>9} {'speedup':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>6}")
+    baseline = None
+    try:
+        for workers in args.workers:
+            url, process = start_gunicorn(workers, env)
+            try:
+                asyncio.run(run_level(url, scenario, tokens, args.concurrency, args.warmup))
+                row = asyncio.run(run_level(url, scenario, tokens, args.concurrency, args.requests))
+            finally:
+                stop_gunicorn(process)
+            baseline = baseline or row["throughput"]
+            print(f"{workers:>7} {row['throughput']:>9.1f} {row['throughput'] / baseline:>7.2f}x "
+                  f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['errors']:>6}")
+    finally:
+        stop_db()
+        jwks.close()
+
+
+if __name__ == "__main__":
+    main()
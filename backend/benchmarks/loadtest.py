@@ -0,0 +1,210 @@
+"""
+Load test: the real app, with real JWT auth, against local Cognito JWKS and PostgREST stand-ins.
+
+The app and the fake PostgREST each run in their own process; the JWKS stub and
+the load generator run here. Each scenario is driven at every concurrency level and
+reports throughput and p50/p95/p99 latency. Results can be saved as JSON and
+compared with an earlier run; a regression beyond --tolerance exits non-zero.
+Run from backend/:
+    python -m benchmarks.loadtest --output results.json
+    python -m benchmarks.loadtest --baseline results.json --tolerance 0.15
+"""
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+from app.fixtures import (
+    StubJWKSServer, make_id_token, make_jwk, seeded_fake_postgrest, serve_in_process,
+    TEST_AUDIENCE, TEST_REGION, TEST_USER_POOL_ID
+)
+
+SCENARIOS = ("list_recipes", "list_users", "create_recipe", "delete_recipe")
+RECIPE = {
+    "name": "Load test stew",
+    "preparation": [{"text": f"Step {i}: stir, season and simmer."} for i in range(6)],
+    "ingredients": [{"name": f"ingredient {i}", "amount": "1 cup"} for i in range(8)],
+    "totalTime": "45",
+    "type": "entree",
+    "cuisine": "Italian"
+}
+
+
+def app_factory(env):
+    """Import the app in the server process, after its environment points at the stand-ins."""
+    os.environ.update(env)
+    from app.main import app
+    return app
+
+
+class Scenario:
+    def __init__(self, name, args, recipe_ids):
+        self.name = name
+        self.page_size = args.page_size
+        self.recipe_ids = recipe_ids
+
+    def request(self, client, headers):
+        if self.name == "list_recipes":
+            return client.get("/recipes/", params={"limit": self.page_size}, headers=headers)
+        if self.name == "list_users":
+            return client.get("/users/", headers=headers)
+        if self.name == "create_recipe":
+            return client.post("/recipes/create-recipe", json=RECIPE, headers=headers)
+        return client.request("DELETE", "/recipes/delete-recipe", json={"id": next(self.recipe_ids)}, headers=headers)
+
+
+async def run_level(base_url, scenario, tokens, concurrency, total):
+    latencies, errors = [], 0
+    headers = itertools.cycle([{"Authorization": f"Bearer {token}"} for token in tokens])
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                start = time.perf_counter()
+                response = await scenario.request(client, next(headers))
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "scenario": scenario.name,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput": round(total / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print deltas against a baseline run; return the rows that regressed beyond tolerance."""
+    previous = {(row["scenario"], row["concurrency"]): row for row in baseline["results"]}
+    regressions = []
+    print(f"\ncompared with baseline from {baseline['meta'].get('timestamp')} ({baseline['meta'].get('commit')})")
+    for row in results:
+        before = previous.get((row["scenario"], row["concurrency"]))
+        if before is None:
+            continue
+        throughput = row["throughput"] / before["throughput"] - 1
+        p95 = row["p95_ms"] / before["p95_ms"] - 1
+        regressed = throughput < -tolerance or p95 > tolerance
+        if regressed:
+            regressions.append(row)
+        print(f"{row['scenario']:<14} c={row['concurrency']:<4} throughput {throughput:+7.1%}  p95 {p95:+7.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=300, help="requests per scenario and concurrency level")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each scenario")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="seconds added to every PostgREST call")
+    parser.add_argument("--jwks-latency", type=float, default=0.05, help="seconds added to every JWKS fetch")
+    parser.add_argument("--recipes", type=int, default=500, help="recipes seeded before the run")
+    parser.add_argument("--users", type=int, default=100, help="users seeded before the run")
+    parser.add_argument("--page-size", type=int, default=20, help="limit used by list_recipes")
+    parser.add_argument("--tokens", type=int, default=50, help="distinct callers (signed ID tokens)")
+    parser.add_argument("--recipe-cache", choices=["memory", "none"], default="memory")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare with results saved by an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative throughput/p95 regression")
+    args = parser.parse_args()
+
+    deletes = args.requests * len(args.concurrency) + args.warmup if "delete_recipe" in args.scenarios else 0
+    jwks = StubJWKSServer([make_jwk("key-1")], delay=args.jwks_latency)
+    db_url, stop_db = serve_in_process(functools.partial(
+        seeded_fake_postgrest, latency=args.db_latency, recipes=max(args.recipes, deletes), users=args.users
+    ))
+    app_url, stop_app = serve_in_process(functools.partial(app_factory, {
+        "PROJ_URL": db_url,
+        "ANON_KEY": "anon",
+        "SERVICE_ROLE": "service",
+        "REGION": TEST_REGION,
+        "COGNITO_USER_POOL_ID": TEST_USER_POOL_ID,
+        "COGNITO_APP_CLIENT_ID": TEST_AUDIENCE,
+        "COGNITO_JWKS_URL": jwks.url,
+        "RECIPE_CACHE_BACKEND": args.recipe_cache,
+        "LOG_FORMAT": "json",
+        "LOG_LEVEL": "WARNING",
+    }))
+
+    tokens = [make_id_token("key-1", sub=f"load-user-{i}") for i in range(args.tokens)]
+    recipe_ids = itertools.count(1)
+    results = []
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{app_url}/")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+
+        print(f"{'scenario':<14} {'conc':>4} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>6}")
+        for name in args.scenarios:
+            scenario = Scenario(name, args, recipe_ids)
+            if args.warmup:
+                asyncio.run(run_level(app_url, scenario, tokens, 1, args.warmup))
+            for concurrency in args.concurrency:
+                row = asyncio.run(run_level(app_url, scenario, tokens, concurrency, args.requests))
+                results.append(row)
+                print(f"{name:<14} {concurrency:>4} {row['throughput']:>9.1f} {row['p50_ms']:>9.2f} "
+                      f"{row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['errors']:>6}")
+    finally:
+        stop_app()
+        stop_db()
+        jwks.close()
+
+    document = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"\nresults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Production server profile: gunicorn managing uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Every setting can be overridden from the environment (or on the command line).
+For local development use the reload profile instead:
+
+    fastapi run app/main.py --port 80 --reload
+"""
+import os
+from app.server import default_workers
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '80')}")
+workers = default_workers()
+# Read back by Settings (preload_app imports the app after this file), so the app
+# can refuse per-process state that would go stale across several workers.
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "app.server.UvicornWorker"
+
+# Pending connections the kernel queues per listening socket while workers are busy.
+backlog = int(os.getenv("BACKLOG", "2048"))
+# Idle keep-alive seconds; keep this above the load balancer's idle timeout so it
+# never reuses a connection the worker has already closed.
+keepalive = int(os.getenv("KEEP_ALIVE", "65"))
+# Seconds a silent worker survives before the arbiter restarts it.
+timeout = int(os.getenv("WORKER_TIMEOUT", "30"))
+# Seconds in-flight requests get to finish after SIGTERM.
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+
+# Import the app once in the arbiter and fork it, so workers start fast and share
+# the imported code pages. Per-process resources (PostgREST clients, caches) are
+# still created by each worker's lifespan.
+preload_app = os.getenv("PRELOAD_APP", "true").lower() != "false"
+
+# Recycle workers now and then to bound slow leaks; 0 disables.
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "0"))
+
+
+def worker_exit(server, worker):
+    # Workers leave without running atexit hooks; flush queued JSON log records first.
+    # (Logging itself is set up per worker by the app lifespan, after the fork.)
+    from app import logging_config
+    if logging_config.sink is not None:
+        logging_config.sink.stop()
@@ -0,0 +1,5 @@
+-- Supports GET /recipes/ keyset pagination: newest-first over (created_at, id),
+-- scoped to the owner by row-level security on user_id.
+-- Built CONCURRENTLY so writes carry on meanwhile; run outside a transaction (see README.md).
+create index concurrently if not exists recipes_user_created_id_idx
+    on public.recipes (user_id, created_at desc, id desc);
@@ -0,0 +1,137 @@
+-- Supports GET /recipes/search: full-text search over name, ingredient names and
+-- preparation steps, filters on metadata cuisine/type/total_time, and facet counts.
+-- Both functions are SECURITY INVOKER, so row-level security still scopes every
+-- query to the caller's recipes. They build their query from the filters actually
+-- given and EXECUTE it, so each call is planned for its own filters and the
+-- indexes below are used however PostgREST passes the arguments.
+
+-- Weighted search document: name (A) > ingredient names (B) > preparation text (C).
+create or replace function public.recipe_search_document(name text, ingredients jsonb, preparation jsonb)
+returns tsvector
+language sql immutable parallel safe
+as $$
+    select setweight(to_tsvector('english', coalesce(name, '')), 'A')
+        || setweight(jsonb_to_tsvector('english', coalesce(jsonb_path_query_array(ingredients, '$[*].name'), '[]'), '["string"]'), 'B')
+        || setweight(jsonb_to_tsvector('english', coalesce(jsonb_path_query_array(preparation, '$[*].text'), '[]'), '["string"]'), 'C')
+$$;
+
+-- metadata.total_time is free text from the client; only plain minute counts are filterable.
+create or replace function public.recipe_total_minutes(metadata jsonb)
+returns integer
+language sql immutable parallel safe
+as $$
+    select case when metadata->>'total_time' ~ '^\s*\d{1,6}\s*$' then trim(metadata->>'total_time')::integer end
+$$;
+
+-- Stored so ranking reads the document instead of rebuilding it per row. Adding the
+-- column rewrites the table; the API selects explicit columns, so it isn't sent to clients.
+alter table public.recipes
+    add column if not exists search_document tsvector
+    generated always as (public.recipe_search_document(name, ingredients, preparation)) stored;
+
+-- Not CONCURRENTLY: the rewrite above already holds the table's exclusive lock until
+-- this file commits. The metadata indexes are built concurrently in the 002_*
+-- no_transaction files that follow.
+create index if not exists recipes_search_document_idx
+    on public.recipes using gin (search_document);
+
+-- WHERE clause shared by both functions; $1..$5 are q, cuisine, recipe_type, min_time, max_time.
+create or replace function public.recipe_search_conditions(
+    q text, cuisine text, recipe_type text, min_time integer, max_time integer, with_text boolean default true
+)
+returns text
+language sql immutable
+as $$
+    select concat_ws(' and ', 'true',
+        case when with_text and q is not null then 'r.search_document @@ websearch_to_tsquery(''english'', $1)' end,
+        case when cuisine is not null then 'r.metadata @> jsonb_build_object(''cuisine'', $2)' end,
+        case when recipe_type is not null then 'r.metadata @> jsonb_build_object(''type'', $3)' end,
+        case when min_time is not null then 'public.recipe_total_minutes(r.metadata) >= $4' end,
+        case when max_time is not null then 'public.recipe_total_minutes(r.metadata) <= $5' end)
+$$;
+
+-- One page of matches: best text match first, then newest first.
+create or replace function public.search_recipes(
+    q text default null,
+    cuisine text default null,
+    recipe_type text default null,
+    min_time integer default null,
+    max_time integer default null,
+    page_size integer default 20,
+    page_offset integer default 0
+)
+returns setof public.recipes
+language plpgsql stable
+as $$
+begin
+    return query execute format(
+        'select r.* from public.recipes r where %s order by %s r.created_at desc, r.id desc limit $6 offset $7',
+        public.recipe_search_conditions(q, cuisine, recipe_type, min_time, max_time),
+        case when q is not null then 'ts_rank_cd(r.search_document, websearch_to_tsquery(''english'', $1)) desc,' else '' end
+    ) using q, cuisine, recipe_type, min_time, max_time, page_size, page_offset;
+end
+$$;
+
+-- Facet counts for the same search. Each facet ignores its own filter, so clients
+-- can show how many results picking a different value would give.
+create or replace function public.recipe_search_facets(
+    q text default null,
+    cuisine text default null,
+    recipe_type text default null,
+    min_time integer default null,
+    max_time integer default null
+)
+returns jsonb
+language plpgsql stable
+as $$
+declare
+    facets jsonb;
+begin
+    execute format($query$
+        with matched as (
+            select
+                r.metadata->>'cuisine' as cuisine,
+                r.metadata->>'type' as recipe_type,
+                public.recipe_total_minutes(r.metadata) as minutes
+            from public.recipes r
+            where %s
+        ),
+        flagged as (
+            select
+                m.*,
+                ($2::text is null or m.cuisine = $2) as cuisine_ok,
+                ($3::text is null or m.recipe_type = $3) as type_ok,
+                (($4::integer is null or m.minutes >= $4) and ($5::integer is null or m.minutes <= $5)) as time_ok,
+                case
+                    when m.minutes is null then null
+                    when m.minutes <= 15 then '0-15'
+                    when m.minutes <= 30 then '16-30'
+                    when m.minutes <= 60 then '31-60'
+                    else '61+'
+                end as time_bucket
+            from matched m
+        )
+        select jsonb_build_object(
+            'total', (select count(*) from flagged where cuisine_ok and type_ok and time_ok),
+            'cuisine', (
+                select coalesce(jsonb_object_agg(cuisine, n), '{}'::jsonb)
+                from (select cuisine, count(*) as n from flagged
+                      where type_ok and time_ok and cuisine is not null group by cuisine) s
+            ),
+            'type', (
+                select coalesce(jsonb_object_agg(recipe_type, n), '{}'::jsonb)
+                from (select recipe_type, count(*) as n from flagged
+                      where cuisine_ok and time_ok and recipe_type is not null group by recipe_type) s
+            ),
+            'total_time', (
+                select coalesce(jsonb_object_agg(time_bucket, n), '{}'::jsonb)
+                from (select time_bucket, count(*) as n from flagged
+                      where cuisine_ok and type_ok and time_bucket is not null group by time_bucket) s
+            )
+        )
+    $query$, public.recipe_search_conditions(q, null, null, null, null))
+    into facets
+    using q, cuisine, recipe_type, min_time, max_time;
+    return facets;
+end
+$$;
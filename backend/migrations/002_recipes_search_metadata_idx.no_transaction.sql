@@ -0,0 +1,3 @@
+-- GET /recipes/search cuisine and type filters (metadata @> ...).
+create index concurrently if not exists recipes_metadata_idx
+    on public.recipes using gin (metadata jsonb_path_ops);
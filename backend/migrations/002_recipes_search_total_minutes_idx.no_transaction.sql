@@ -0,0 +1,3 @@
+-- GET /recipes/search min_time / max_time filters over recipe_total_minutes() from 002.
+create index concurrently if not exists recipes_user_total_minutes_idx
+    on public.recipes (user_id, public.recipe_total_minutes(metadata));
@@ -0,0 +1,139 @@
+-- Supports GET /recipes/sync: a per-user change version, bumped by every write to
+-- recipes and stamped on the written row (or on a tombstone when the row is
+-- deleted), so clients fetch only what changed since the version they last saw.
+-- Versions are assigned under a lock on the user's sync_state row, so they
+-- commit in order and a client can never skip past an uncommitted change the
+-- way a created_at watermark can.
+
+create table if not exists public.recipe_sync_state (
+    user_id text primary key,
+    version bigint not null default 0,
+    -- Tombstones up to this version were pruned; clients behind it must resync in full.
+    pruned_version bigint not null default 0
+);
+
+create table if not exists public.recipe_tombstones (
+    user_id text not null,
+    version bigint not null,
+    recipe_id bigint not null,
+    deleted_at timestamptz not null default now(),
+    primary key (user_id, version)
+);
+
+-- Existing rows get version 0 and are only delivered by a full sync.
+alter table public.recipes add column if not exists sync_version bigint not null default 0;
+
+alter table public.recipe_sync_state enable row level security;
+alter table public.recipe_tombstones enable row level security;
+grant select on public.recipe_sync_state, public.recipe_tombstones to authenticated;
+
+drop policy if exists recipe_sync_state_owner on public.recipe_sync_state;
+create policy recipe_sync_state_owner on public.recipe_sync_state for select to authenticated
+    using (user_id = (select current_setting('request.jwt.claims', true)::jsonb ->> 'sub'));
+
+drop policy if exists recipe_tombstones_owner on public.recipe_tombstones;
+create policy recipe_tombstones_owner on public.recipe_tombstones for select to authenticated
+    using (user_id = (select current_setting('request.jwt.claims', true)::jsonb ->> 'sub'));
+
+-- SECURITY DEFINER so versions and tombstones can't be written by clients directly.
+create or replace function public.bump_recipe_sync_version(owner text)
+returns bigint
+language sql volatile security definer
+set search_path = ''
+as $$
+    insert into public.recipe_sync_state as s (user_id, version) values (owner, 1)
+    on conflict (user_id) do update set version = s.version + 1
+    returning version
+$$;
+
+revoke execute on function public.bump_recipe_sync_version(text) from public;
+
+create or replace function public.recipes_stamp_sync_version()
+returns trigger
+language plpgsql security definer
+set search_path = ''
+as $$
+begin
+    new.sync_version := public.bump_recipe_sync_version(new.user_id);
+    return new;
+end
+$$;
+
+create or replace function public.recipes_record_tombstone()
+returns trigger
+language plpgsql security definer
+set search_path = ''
+as $$
+begin
+    insert into public.recipe_tombstones (user_id, version, recipe_id)
+    values (old.user_id, public.bump_recipe_sync_version(old.user_id), old.id);
+    return old;
+end
+$$;
+
+drop trigger if exists recipes_stamp_sync_version on public.recipes;
+create trigger recipes_stamp_sync_version before insert or update on public.recipes
+    for each row execute function public.recipes_stamp_sync_version();
+
+drop trigger if exists recipes_record_tombstone on public.recipes;
+create trigger recipes_record_tombstone after delete on public.recipes
+    for each row execute function public.recipes_record_tombstone();
+
+-- The caller's changes after `since`: recipes written since then (newest first) and
+-- ids deleted since then. Without `since` (or 0), or when it is older than the
+-- pruned tombstones or newer than the current version, every recipe is returned
+-- with "full": true. One statement snapshot, so "version" matches the rows returned.
+create or replace function public.recipe_changes(since bigint default null)
+returns jsonb
+language plpgsql stable
+as $$
+declare
+    state public.recipe_sync_state;
+    current_version bigint;
+    full_sync boolean;
+begin
+    -- Row-level security leaves only the caller's row.
+    select * into state from public.recipe_sync_state limit 1;
+    current_version := coalesce(state.version, 0);
+    full_sync := since is null or since = 0 or since < coalesce(state.pruned_version, 0) or since > current_version;
+
+    return jsonb_build_object(
+        'version', current_version,
+        'full', full_sync,
+        'recipes', coalesce((
+            select jsonb_agg(to_jsonb(r) - 'search_document' - 'sync_version' order by r.created_at desc, r.id desc)
+            from public.recipes r
+            where full_sync or r.sync_version > since
+        ), '[]'::jsonb),
+        'deleted', case when full_sync then '[]'::jsonb else coalesce((
+            select jsonb_agg(t.recipe_id order by t.version)
+            from public.recipe_tombstones t
+            where t.version > since
+        ), '[]'::jsonb) end
+    );
+end
+$$;
+
+-- Run periodically as an operator (API roles can't delete tombstones): drops old
+-- tombstones and records how far each user's history now reaches.
+create or replace function public.prune_recipe_tombstones(older_than interval default interval '30 days')
+returns bigint
+language plpgsql
+as $$
+declare
+    pruned bigint;
+begin
+    with removed as (
+        delete from public.recipe_tombstones
+        where deleted_at < now() - older_than
+        returning user_id, version
+    ), horizon as (
+        update public.recipe_sync_state s
+        set pruned_version = greatest(s.pruned_version, r.version)
+        from (select user_id, max(version) as version from removed group by user_id) r
+        where s.user_id = r.user_id
+    )
+    select count(*) into pruned from removed;
+    return pruned;
+end
+$$;
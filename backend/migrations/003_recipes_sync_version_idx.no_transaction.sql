@@ -0,0 +1,3 @@
+-- Recipes written since a client's version, for recipe_changes() in 003.
+create index concurrently if not exists recipes_user_sync_version_idx
+    on public.recipes (user_id, sync_version);
@@ -1,3 +1,32 @@
+// Cognito gives the trigger 5 seconds; keep every attempt and backoff inside that.
+const ATTEMPTS = 3;
+const ATTEMPT_TIMEOUT_MS = 1200;
+const BACKOFF_MS = 200;
+
+// The backend upserts on the Cognito sub and replays responses per
+// Idempotency-Key, so resending the same request is always safe.
+async function sendWithRetry(url, init) {
+	for (let attempt = 1; ; attempt++) {
+		try {
+			const response = await fetch(url, {
+				...init,
+				signal: AbortSignal.timeout(ATTEMPT_TIMEOUT_MS),
+			});
+			const retryable = response.status >= 500 || response.status === 429;
+			if (!retryable || attempt === ATTEMPTS) {
+				return response;
+			}
+			console.warn(`Backend responded ${response.status}, retrying (attempt ${attempt})`);
+		} catch (error) {
+			if (attempt === ATTEMPTS) {
+				throw error;
+			}
+			console.warn(`Backend request failed (${error.name}), retrying (attempt ${attempt})`);
+		}
+		await new Promise((resolve) => setTimeout(resolve, BACKOFF_MS * attempt));
+	}
+}
+
 async function handler(event, context) {
 	console.log("=== POST-CONFIRMATION LAMBDA TRIGGERED ===");
 	console.log("Event:", JSON.stringify(event, null, 2));
@@ -21,11 +50,12 @@ async function handler(event, context) {
 
 		console.log("Sending request to backend...");
 
-		const response = await fetch(`${process.env.BACKEND_URL}`, {
+		const response = await sendWithRetry(`${process.env.BACKEND_URL}`, {
 			method: "POST",
 			headers: {
 				Authorization: `Bearer ${process.env.BACKEND_SECRET}`,
 				"Content-Type": "application/json",
+				"Idempotency-Key": `post-confirmation:${userId}`,
 			},
 			body: JSON.stringify(requestBody),
 		});